@@ -0,0 +1,303 @@
+"""
+Bootcamp F2025
+
+Single process alternative to bootcamp_main: every stage is a coroutine of one event loop,
+sharing one connection, so nothing is pickled and no connection is shared between processes
+"""
+
+import asyncio
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.common.modules.logger import logger_main_setup
+from modules.common.modules.read_yaml import read_yaml
+from modules.command import command
+from modules.heartbeat import heartbeat_receiver
+from modules.heartbeat import heartbeat_sender
+from modules.telemetry import telemetry
+from utilities.workers import async_connection
+
+
+# MAVLink connection
+CONNECTION_STRING = "tcp:localhost:12345"
+
+# Run time of main
+RUN_TIME = 100  # seconds
+# Longest main waits on its queues before checking on the heartbeat
+MAIN_WAIT_TIMEOUT = 0.5  # seconds
+# Treat the drone as disconnected if the heartbeat receiver reports nothing for this long
+HEARTBEAT_STATUS_TIMEOUT = 10  # seconds
+# Longest time stages get to leave their loops once exit is requested
+SHUTDOWN_TIMEOUT = 5  # seconds
+# Same timing as the workers
+HEARTBEAT_PERIOD = 1  # seconds
+HEARTBEAT_TIMEOUT = HEARTBEAT_PERIOD + 1e-2  # seconds
+TELEMETRY_TIMEOUT = 1 + 1e-1  # seconds
+TARGET = command.Position(10, 20, 30)
+
+
+def put_latest(queue: "asyncio.Queue[object]", item: object) -> None:
+    """
+    Puts the item, dropping the oldest item if the queue is full,
+    so a slow consumer never stalls its producer.
+    """
+    if queue.full():
+        queue.get_nowait()
+
+    queue.put_nowait(item)
+
+
+async def heartbeat_sender_stage(
+    sender: heartbeat_sender.HeartbeatSender,
+    exit_event: asyncio.Event,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Sends a heartbeat every period.
+    """
+    while not exit_event.is_set():
+        now = sender.run()
+        try:
+            await asyncio.wait_for(exit_event.wait(), HEARTBEAT_PERIOD)
+        except asyncio.TimeoutError:
+            pass
+
+        local_logger.info(f"Sent Heartbeat {time.time() - now}")
+
+
+async def heartbeat_receiver_stage(
+    connection: async_connection.StageConnection,
+    receiver: heartbeat_receiver.HeartbeatReceiver,
+    output_queue: "asyncio.Queue[object]",
+    exit_event: asyncio.Event,
+) -> None:
+    """
+    Reports the connection status after every heartbeat or missed heartbeat.
+    """
+    while not exit_event.is_set():
+        await connection.wait_message(HEARTBEAT_TIMEOUT)
+        put_latest(output_queue, receiver.run(HEARTBEAT_TIMEOUT))
+
+
+async def telemetry_stage(
+    connection: async_connection.StageConnection,
+    telemetry_obj: telemetry.Telemetry,
+    output_queue: "asyncio.Queue[object]",
+    exit_event: asyncio.Event,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Combines attitude and position messages into telemetry.
+    """
+    while not exit_event.is_set():
+        await connection.wait_message(TELEMETRY_TIMEOUT)
+        data = telemetry_obj.run()
+        if isinstance(data, telemetry.TelemetryData):
+            put_latest(output_queue, data)
+            local_logger.info("Recieved telemetry data")
+        elif data is None:
+            local_logger.info("timeout")
+
+
+async def command_stage(
+    command_obj: command.Command,
+    input_queue: "asyncio.Queue[object]",
+    output_queue: "asyncio.Queue[object]",
+    exit_event: asyncio.Event,
+) -> None:
+    """
+    Sends commands as soon as telemetry arrives, and rate limited ones once allowed.
+    """
+    while not exit_event.is_set():
+        timeout = TELEMETRY_TIMEOUT
+        flush_delay = command_obj.scheduler.get_flush_delay()
+        if flush_delay is not None:
+            timeout = min(timeout, flush_delay)
+
+        try:
+            data = await asyncio.wait_for(input_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            # Changes that waited for their rate are reported once sent
+            for status in command_obj.flush():
+                put_latest(output_queue, status)
+            continue
+
+        status = command_obj.run(data, TARGET)  # type: ignore
+        if status is not None:
+            put_latest(output_queue, status)
+
+
+async def run_pipeline(connection: mavutil.mavfile, main_logger: logger.Logger) -> int:
+    """
+    Runs every stage until RUN_TIME passes or the drone disconnects.
+    """
+    result, shared_connection = async_connection.AsyncConnection.create(connection)
+    if not result:
+        main_logger.error("Connection cannot be read from the event loop")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert shared_connection is not None
+
+    loggers = {}
+    for name in ["heartbeat_sender", "heartbeat_receiver", "telemetry", "command"]:
+        result, stage_logger = logger.Logger.create(f"{name}_async", True)
+        if not result:
+            main_logger.error(f"Failed to create logger for {name}")
+            return -1
+
+        loggers[name] = stage_logger
+
+    receiver_connection = shared_connection.subscribe(["HEARTBEAT"])
+    telemetry_connection = shared_connection.subscribe(["ATTITUDE", "LOCAL_POSITION_NED"])
+
+    # The stages reuse the classes of the workers, with the views in place of the connection
+    result, sender = heartbeat_sender.HeartbeatSender.create(
+        connection, mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+    )
+    if not result:
+        main_logger.error("Could not create heartbeat sender")
+        return -1
+
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        receiver_connection, loggers["heartbeat_receiver"]  # type: ignore
+    )
+    if not result:
+        main_logger.error("Could not create heartbeat receiver")
+        return -1
+
+    result, telemetry_obj = telemetry.Telemetry.create(
+        telemetry_connection, loggers["telemetry"]  # type: ignore
+    )
+    if not result:
+        main_logger.error("Could not create telemetry")
+        return -1
+
+    result, command_obj = command.Command.create(connection, loggers["command"])
+    if not result:
+        main_logger.error("Could not create command")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert sender is not None
+    assert receiver is not None
+    assert telemetry_obj is not None
+    assert command_obj is not None
+
+    # Each stage only ever needs the newest item
+    heartbeat_queue: "asyncio.Queue[object]" = asyncio.Queue(1)
+    telemetry_data_queue: "asyncio.Queue[object]" = asyncio.Queue(1)
+    command_queue: "asyncio.Queue[object]" = asyncio.Queue(1)
+    exit_event = asyncio.Event()
+
+    shared_connection.start()
+    stages = [
+        asyncio.create_task(
+            heartbeat_sender_stage(sender, exit_event, loggers["heartbeat_sender"])
+        ),
+        asyncio.create_task(
+            heartbeat_receiver_stage(receiver_connection, receiver, heartbeat_queue, exit_event)
+        ),
+        asyncio.create_task(
+            telemetry_stage(
+                telemetry_connection,
+                telemetry_obj,
+                telemetry_data_queue,
+                exit_event,
+                loggers["telemetry"],
+            )
+        ),
+        asyncio.create_task(
+            command_stage(command_obj, telemetry_data_queue, command_queue, exit_event)
+        ),
+    ]
+
+    main_logger.info("Started")
+
+    # Whichever queue has data is handled first, so a quiet queue cannot delay the other
+    pending = {
+        asyncio.create_task(heartbeat_queue.get()): heartbeat_queue,
+        asyncio.create_task(command_queue.get()): command_queue,
+    }
+    now = time.time()
+    last_heartbeat_status_time = now
+    disconnected = False
+    while time.time() - now < RUN_TIME and not disconnected:
+        done, _ = await asyncio.wait(
+            pending.keys(), timeout=MAIN_WAIT_TIMEOUT, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            ready_queue = pending.pop(task)
+            pending[asyncio.create_task(ready_queue.get())] = ready_queue
+            status = task.result()
+            main_logger.info(status)
+            if ready_queue is heartbeat_queue:
+                last_heartbeat_status_time = time.time()
+                disconnected = disconnected or status == "Disconnected"
+
+        if not shared_connection.is_link_up():
+            main_logger.error("Drone closed the connection, treating as disconnected")
+            break
+
+        if len(done) == 0 and time.time() - last_heartbeat_status_time > HEARTBEAT_STATUS_TIMEOUT:
+            main_logger.error("No heartbeat status received, treating as disconnected")
+            break
+
+    main_logger.info("Requested exit")
+    exit_event.set()
+    for task in pending:
+        task.cancel()
+
+    _, unfinished = await asyncio.wait(stages, timeout=SHUTDOWN_TIMEOUT)
+    for task in unfinished:
+        task.cancel()
+
+    shared_connection.stop()
+    if len(unfinished) > 0:
+        main_logger.error("Stages did not exit in time")
+
+    main_logger.info("Stopped")
+    main_logger.info(
+        f"Dropped heartbeats: {receiver_connection.get_dropped_count()}, "
+        f"dropped telemetry messages: {telemetry_connection.get_dropped_count()}"
+    )
+
+    return 0
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    # Configuration settings
+    result, config = read_yaml.open_config(logger.CONFIG_FILE_PATH)
+    if not result:
+        print("ERROR: Failed to load configuration file")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert config is not None
+
+    # Setup main logger
+    result, main_logger, _ = logger_main_setup.setup_main_logger(config)
+    if not result:
+        print("ERROR: Failed to create main logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert main_logger is not None
+
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+    connection.wait_heartbeat(timeout=30)  # Wait for the "drone" to connect
+
+    return asyncio.run(run_pipeline(connection, main_logger))
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
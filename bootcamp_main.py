@@ -5,35 +5,47 @@ Main process to setup and manage all the other working processes
 """
 
 import multiprocessing as mp
+import pathlib
 import time
 
-from pymavlink import mavutil
-
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
 from modules.command import command
-from modules.command import command_worker
-from modules.heartbeat import heartbeat_receiver_worker
-from modules.heartbeat import heartbeat_sender_worker
-from modules.telemetry import telemetry_worker
-from utilities.workers import queue_proxy_wrapper
+from modules.mavlink_router import mavlink_router
+from utilities.workers import pipeline_builder
+from utilities.workers import queue_selector
 from utilities.workers import worker_controller
-from utilities.workers import worker_manager
+from utilities.workers import worker_resources
+from utilities.workers import worker_shutdown
+from utilities.workers import worker_supervisor
 
 
 # MAVLink connection
 CONNECTION_STRING = "tcp:localhost:12345"
+# Everything received is recorded here for replay, None to not record
+TLOG_PATH: "pathlib.Path | None" = None  # For example pathlib.Path("logs", "bootcamp.tlog")
+# Alone owns the connection to the drone, so the pipeline must run exactly one of it
+ROUTER_TARGET = "modules.mavlink_router.mavlink_router_worker.mavlink_router_worker"
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
-# Set queue max sizes (<= 0 for infinity)
-QUEUE_MAX_SIZE = 1
-# Set worker counts
-WORKER_COUNT = 1
+# Queues, worker counts and how the workers are connected
+PIPELINE_CONFIG_FILE_PATH = pathlib.Path("pipeline.yaml")
 
 # Any other constants
+# Run time of main
+RUN_TIME = 100  # seconds
+# Longest main waits on its queues before checking on the heartbeat
+MAIN_WAIT_TIMEOUT = 0.5  # seconds
+# Treat the drone as disconnected if the heartbeat receiver reports nothing for this long
+HEARTBEAT_STATUS_TIMEOUT = 10  # seconds
+# Longest time workers get to leave their loops once exit is requested
+SHUTDOWN_TIMEOUT = 5  # seconds
+# Resource use of each worker is sampled this often, and summarized in the log this often
+RESOURCE_SAMPLE_PERIOD = 1  # seconds
+RESOURCE_SUMMARY_PERIOD = 10  # seconds
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -62,13 +74,10 @@ def main() -> int:
     # Get Pylance to stop complaining
     assert main_logger is not None
 
-    # Create a connection to the drone. Assume that this is safe to pass around to all processes
-    # In reality, this will not work, but to simplify the bootamp, preetend it is allowed
+    # Only the router worker connects to the drone. The other workers get a stand-in for
+    # mavutil.mavfile that receives the messages routed to them and sends through the router
     # To test, you will run each of your workers individually to see if they work
     # (test "drones" are provided for you test your workers)
-    # NOTE: If you want to have type annotations for the connection, it is of type mavutil.mavfile
-    connection = mavutil.mavlink_connection(CONNECTION_STRING)
-    connection.wait_heartbeat(timeout=30)  # Wait for the "drone" to connect
 
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
@@ -77,127 +86,154 @@ def main() -> int:
     controller = worker_controller.WorkerController()
     # Create a multiprocess manager for synchronized queues
     mp_manager = mp.Manager()
-    # Create queues
-    heartbeat_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE)
-    telemetry_data_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE)
-    command_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE)
-    # Create worker properties for each worker type (what inputs it takes, how many workers)
-    success, heartbeat_sender_properties = worker_manager.WorkerProperties.create(
-        WORKER_COUNT,
-        heartbeat_sender_worker.heartbeat_sender_worker,
-        (mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_TYPE_INVALID, 0, 0, 0),
-        [],
-        [],
-        controller,
-        main_logger,
-    )
-    if not success:
-        main_logger.error("Couldn't Create heartbeat sender properties")
-    assert heartbeat_sender_properties is not None
-
-    success, heartbeat_reciever_properties = worker_manager.WorkerProperties.create(
-        WORKER_COUNT,
-        heartbeat_receiver_worker.heartbeat_receiver_worker,
-        (connection,),
-        [],
-        [heartbeat_queue],
-        controller,
-        main_logger,
-    )
-    if not success:
-        main_logger.error("Couldn't Create heartbeat reciever properties")
-    assert heartbeat_reciever_properties is not None
-
-    success, telemetry_worker_properties = worker_manager.WorkerProperties.create(
-        WORKER_COUNT,
-        telemetry_worker.telemetry_worker,
-        (connection,),
-        [],
-        [telemetry_data_queue],
-        controller,
-        main_logger,
+
+    success, router = mavlink_router.MavlinkRouter.create(
+        CONNECTION_STRING, mp_manager, tlog_path=TLOG_PATH
     )
     if not success:
-        main_logger.error("Couldn't create telemetry worker properties")
-    assert telemetry_worker_properties is not None
-    success, command_worker_properties = worker_manager.WorkerProperties.create(
-        WORKER_COUNT,
-        command_worker.command_worker,
-        (connection, command.Position(10, 20, 30)),
-        [telemetry_data_queue],
-        [command_queue],
+        main_logger.error("could not create MAVLink router")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert router is not None
+
+    # Subscribe before the workers start
+    connections = {
+        "router": router,
+        "heartbeat_sender_connection": router.create_sender(),
+        "heartbeat_receiver_connection": router.subscribe(["HEARTBEAT"]),
+        "telemetry_connection": router.subscribe(["ATTITUDE", "LOCAL_POSITION_NED"]),
+        "command_connection": router.subscribe(["COMMAND_ACK"]),
+    }
+
+    # Create the queues and workers described in the pipeline topology
+    result, pipeline_config = read_yaml.open_config(PIPELINE_CONFIG_FILE_PATH)
+    if not result:
+        main_logger.error("Failed to load pipeline configuration file")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert pipeline_config is not None
+
+    success, pipeline = pipeline_builder.Pipeline.create(
+        pipeline_config,
         controller,
+        mp_manager,
+        {**connections, "target": command.Position(10, 20, 30)},
         main_logger,
+        [ROUTER_TARGET],
     )
     if not success:
-        main_logger.error("couldn't create command worker properties")
-    assert command_worker_properties is not None
-
-    # Heartbeat sender
+        main_logger.error("could not create pipeline")
+        return -1
 
-    # Heartbeat receiver
+    # Get Pylance to stop complaining
+    assert pipeline is not None
 
-    # Telemetry
+    heartbeat_queue = pipeline.get_queue("heartbeat_queue")
+    command_queue = pipeline.get_queue("command_queue")
+    worker_managers = pipeline.get_worker_managers()
 
-    # Command
+    # Start process workers before thread workers, consumers first
+    pipeline.start()
 
-    # Create the workers (processes) and obtain their managers
-    success, heartbeat_sender_manager = worker_manager.WorkerManager.create(
-        heartbeat_sender_properties, main_logger
-    )
+    # Restart workers that die, in the background
+    success, supervisor = worker_supervisor.WorkerSupervisor.create(worker_managers, main_logger)
     if not success:
-        main_logger.error("could not create heartbeat sender manager")
-    assert heartbeat_sender_manager is not None
-    success, heartbeat_receiver_manager = worker_manager.WorkerManager.create(
-        heartbeat_reciever_properties, main_logger
-    )
-    if not success:
-        main_logger.error("could not create heartbeat reciever manager")
-    assert heartbeat_receiver_manager is not None
-    success, telemetry_manager = worker_manager.WorkerManager.create(
-        telemetry_worker_properties, main_logger
-    )
-    if not success:
-        main_logger.error("could not create telemetry manager")
-    assert telemetry_manager is not None
-    success, command_manager = worker_manager.WorkerManager.create(
-        command_worker_properties, main_logger
+        main_logger.error("could not create worker supervisor")
+        # Workers are already running, they must exit before giving up
+        worker_shutdown.shutdown_workers(
+            controller,
+            worker_managers,
+            pipeline.get_queues() + router.get_queues(),
+            SHUTDOWN_TIMEOUT,
+            main_logger,
+        )
+        pipeline.close()
+        return -1
+
+    # Get Pylance to stop complaining
+    assert supervisor is not None
+    supervisor.start()
+
+    # Sample CPU, memory, context switches and I/O of every worker, in the background
+    success, resource_monitor = worker_resources.ResourceMonitor.create(
+        worker_managers,
+        main_logger,
+        mp_manager,
+        RESOURCE_SAMPLE_PERIOD,
+        summary_period=RESOURCE_SUMMARY_PERIOD,
     )
     if not success:
-        main_logger.error("could not create command manager")
-    assert command_manager is not None
-    # Start worker processes
-    heartbeat_sender_manager.start_workers()
-    heartbeat_receiver_manager.start_workers()
-    telemetry_manager.start_workers()
-    command_manager.start_workers()
+        main_logger.error("could not create resource monitor")
+        # Workers are already running, they must exit before giving up
+        supervisor.stop()
+        worker_shutdown.shutdown_workers(
+            controller,
+            worker_managers,
+            pipeline.get_queues() + router.get_queues(),
+            SHUTDOWN_TIMEOUT,
+            main_logger,
+        )
+        pipeline.close()
+        return -1
+
+    # Get Pylance to stop complaining
+    assert resource_monitor is not None
+    resource_monitor.start()
 
     main_logger.info("Started")
 
     # Main's work: read from all queues that output to main, and log any commands that we make
-    # Continue running for 100 seconds or until the drone disconnects
+    # Continue running for RUN_TIME seconds or until the drone disconnects
+    # Whichever queue has data is handled first, so a quiet queue cannot delay the other
+    selector = queue_selector.QueueSelector([heartbeat_queue, command_queue])
     now = time.time()
-    while time.time() - now < 100:
-        connected = heartbeat_queue.queue.get()
-        main_logger.info(connected)
-        if connected == "Disconnected":
+    last_heartbeat_status_time = now
+    while time.time() - now < RUN_TIME:
+        ready_queue, status = selector.wait_any(MAIN_WAIT_TIMEOUT)
+        if ready_queue is heartbeat_queue:
+            last_heartbeat_status_time = time.time()
+            main_logger.info(status)
+            if status == "Disconnected":
+                break
+        elif ready_queue is command_queue:
+            main_logger.info(status)
+        elif time.time() - last_heartbeat_status_time > HEARTBEAT_STATUS_TIMEOUT:
+            main_logger.error("No heartbeat status received, treating as disconnected")
             break
-        main_logger.info(command_queue.queue.get())
 
     main_logger.info("Requested exit")
-    controller.request_exit()
-    # Fill and drain queues from END TO START
-    command_queue.fill_and_drain_queue()
-    heartbeat_queue.fill_and_drain_queue()
-    telemetry_data_queue.fill_and_drain_queue()
-    main_logger.info("Queues cleared")
-    # Clean up worker processes
-    heartbeat_receiver_manager.join_workers()
-    heartbeat_sender_manager.join_workers()
-    telemetry_manager.join_workers()
-    command_manager.join_workers()
+    # Workers exiting must not be restarted
+    supervisor.stop()
+    resource_monitor.stop()
+    # Unblock queues from START TO END until every worker acknowledges exit, then join them
+    success = worker_shutdown.shutdown_workers(
+        controller,
+        worker_managers,
+        pipeline.get_queues() + router.get_queues(),
+        SHUTDOWN_TIMEOUT,
+        main_logger,
+    )
+    if not success:
+        main_logger.error("Workers did not exit in time")
 
     main_logger.info("Stopped")
+    main_logger.info(
+        f"Dropped heartbeat statuses: {heartbeat_queue.get_dropped_count()}, "
+        f"dropped command statuses: {command_queue.get_dropped_count()}"
+    )
+    inbound_dropped_count, outbound_dropped_count = router.get_dropped_count()
+    main_logger.info(
+        f"Router dropped received messages: {inbound_dropped_count}, "
+        f"dropped messages to send: {outbound_dropped_count}, "
+        f"connections to the drone: {router.link_state.get_generation()}"
+    )
+    for status in supervisor.get_status():
+        main_logger.info(status)
+    for report in resource_monitor.get_resource_report():
+        main_logger.info(report)
+    pipeline.close()
     # We can reset controller in case we want to reuse it
     controller.clear_exit()
     # Alternatively, create a new WorkerController instance
@@ -0,0 +1,229 @@
+"""
+Memory and latency of the bootcamp_main topology with heartbeat workers as processes or threads.
+Workers are stand-ins with the same queues and timing, so no drone is needed. Linux only. To run:
+```
+python -m documentation.benchmarks.execution_mode_benchmark
+```
+"""
+
+import multiprocessing as mp
+import time
+
+# Imported by every worker, as the real workers do
+from pymavlink import mavutil  # pylint: disable=unused-import
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_shutdown
+
+
+RUN_TIME = 5  # seconds
+HEARTBEAT_PERIOD = 0.05  # seconds
+TELEMETRY_PERIOD = 0.05  # seconds
+QUEUE_MAX_SIZE = 1
+SHUTDOWN_TIMEOUT = 5  # seconds
+
+
+def heartbeat_sender_stand_in(controller: worker_controller.WorkerController) -> None:
+    """
+    Sends nothing, sleeps like the heartbeat sender.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(HEARTBEAT_PERIOD)
+
+
+def heartbeat_receiver_stand_in(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Reports the time of each heartbeat period as its status.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(HEARTBEAT_PERIOD)
+        output_queue.queue.put(time.monotonic())
+
+
+def telemetry_stand_in(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Produces telemetry carrying the time it was produced.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(TELEMETRY_PERIOD)
+        output_queue.queue.put(telemetry.TelemetryData(0, time.monotonic()))
+
+
+def command_stand_in(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Forwards the time each telemetry was produced as its status.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        for telemetry_data in input_queue.get_many(1, TELEMETRY_PERIOD):
+            if telemetry_data is None:
+                continue
+
+            output_queue.queue.put(telemetry_data.x)
+
+
+def read_memory(pid: int) -> "tuple[int, int]":
+    """
+    Returns the resident and proportional set sizes of the process in kB.
+    """
+    rss = 0
+    with open(f"/proc/{pid}/status", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+
+    pss = 0
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("Pss:"):
+                pss = int(line.split()[1])
+
+    return rss, pss
+
+
+def run(
+    heartbeat_mode: worker_manager.ExecutionMode, local_logger: logger.Logger
+) -> "tuple[int, int, int, float, float]":
+    """
+    Runs the topology for RUN_TIME.
+
+    Returns the process count, total RSS and PSS in kB,
+    and the mean heartbeat and command status latencies in seconds.
+    """
+    controller = worker_controller.WorkerController()
+    mp_manager = mp.Manager()
+    heartbeat_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, policy=queue_proxy_wrapper.BackpressurePolicy.DROP_OLDEST
+    )
+    telemetry_data_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.MAILBOX,
+        record_type=telemetry.TelemetryData,
+    )
+    command_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, QUEUE_MAX_SIZE, policy=queue_proxy_wrapper.BackpressurePolicy.DROP_OLDEST
+    )
+
+    stages = [
+        (heartbeat_sender_stand_in, [], [], heartbeat_mode),
+        (heartbeat_receiver_stand_in, [], [heartbeat_queue], heartbeat_mode),
+        (telemetry_stand_in, [], [telemetry_data_queue], worker_manager.ExecutionMode.PROCESS),
+        (
+            command_stand_in,
+            [telemetry_data_queue],
+            [command_queue],
+            worker_manager.ExecutionMode.PROCESS,
+        ),
+    ]
+    worker_managers = []
+    for target, input_queues, output_queues, execution_mode in stages:
+        result, properties = worker_manager.WorkerProperties.create(
+            1, target, (), input_queues, output_queues, controller, local_logger
+        )
+        assert result and properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(
+            properties, local_logger, execution_mode=execution_mode
+        )
+        assert result and manager is not None
+
+        worker_managers.append(manager)
+
+    worker_manager.localize_thread_queues(worker_managers)
+    for manager in worker_managers:
+        manager.start_workers()
+
+    heartbeat_latencies = []
+    command_latencies = []
+    selector = queue_selector.QueueSelector([heartbeat_queue, command_queue])
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < RUN_TIME:
+        ready_queue, sent_time = selector.wait_any(HEARTBEAT_PERIOD)
+        if ready_queue is heartbeat_queue:
+            heartbeat_latencies.append(time.monotonic() - sent_time)
+        elif ready_queue is command_queue:
+            command_latencies.append(time.monotonic() - sent_time)
+
+    # Main, the SyncManager server, and every worker process
+    # pylint: disable-next=protected-access
+    pids = {mp.current_process().pid, mp_manager._process.pid}
+    for manager in worker_managers:
+        pids.update(worker.pid for worker in manager.get_workers())
+
+    rss_total = 0
+    pss_total = 0
+    for pid in pids:
+        rss, pss = read_memory(pid)
+        rss_total += rss
+        pss_total += pss
+
+    worker_shutdown.shutdown_workers(
+        controller,
+        worker_managers,
+        [telemetry_data_queue, command_queue, heartbeat_queue],
+        SHUTDOWN_TIMEOUT,
+        local_logger,
+    )
+    telemetry_data_queue.close()
+    mp_manager.shutdown()
+
+    return (
+        len(pids),
+        rss_total,
+        pss_total,
+        sum(heartbeat_latencies) / max(len(heartbeat_latencies), 1),
+        sum(command_latencies) / max(len(command_latencies), 1),
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("execution_mode_benchmark", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    for heartbeat_mode in worker_manager.ExecutionMode:
+        process_count, rss, pss, heartbeat_latency, command_latency = run(
+            heartbeat_mode, local_logger
+        )
+        print(
+            f"Heartbeat workers as {heartbeat_mode.name.lower():>7}: {process_count} processes, "
+            f"RSS {rss / 1024:6.1f} MB, PSS {pss / 1024:6.1f} MB, "
+            f"heartbeat latency {heartbeat_latency * 1e6:7.1f} us, "
+            f"command latency {command_latency * 1e6:7.1f} us"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
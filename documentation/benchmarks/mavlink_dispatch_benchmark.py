@@ -0,0 +1,162 @@
+"""
+Parse throughput of recv_match() filtering compared to dispatching by message id,
+on a recorded stream. To run:
+```
+python -m documentation.benchmarks.mavlink_dispatch_benchmark [raw capture file]
+```
+Without a file, records a stream like an autopilot sends.
+"""
+
+import pathlib
+import sys
+import time
+
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_dispatcher
+
+
+RECORDING_DURATION = 60  # seconds of stream
+REPETITIONS = 5
+# Types the telemetry and heartbeat receiver workers use
+WANTED_TYPES = ["HEARTBEAT", "ATTITUDE", "LOCAL_POSITION_NED"]
+
+
+class RecordedStream(mavutil.mavfile):
+    """
+    Connection that replays a recording, in reads of at most the requested size.
+    """
+
+    def __init__(self, recording: bytes) -> None:
+        self.__recording = recording
+        self.__position = 0
+        super().__init__(None, "recording")
+
+    def recv(self, n: "int | None" = None) -> bytes:
+        if n is None:
+            n = self.mav.bytes_needed()
+
+        data = self.__recording[self.__position : self.__position + n]
+        self.__position += len(data)
+        return data
+
+
+def record_stream(duration: int) -> bytes:
+    """
+    Returns the bytes an autopilot streaming its usual telemetry sends over the duration.
+    """
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    stream = bytearray()
+    # 50 Hz ticks
+    for tick in range(duration * 50):
+        time_boot_ms = tick * 20
+        messages = [
+            mav.attitude_encode(time_boot_ms, 0.01, 0.02, 1.57, 0.001, 0.002, 0.003),
+            mav.raw_imu_encode(time_boot_ms * 1000, 1, 2, 1000, 3, 4, 5, 100, 200, 300),
+            mav.servo_output_raw_encode(time_boot_ms * 1000, 0, 1500, 1500, 1500, 1500, 0, 0, 0, 0),
+        ]
+        if tick % 5 == 0:
+            messages += [
+                mav.local_position_ned_encode(time_boot_ms, 1.0, 2.0, -3.0, 0.1, 0.2, 0.3),
+                mav.global_position_int_encode(
+                    time_boot_ms, 435000000, -805000000, 300000, 3000, 10, 20, 30, 9000
+                ),
+                mav.vfr_hud_encode(1.0, 1.1, 90, 50, 30.0, 0.3),
+            ]
+        if tick % 10 == 0:
+            messages += [
+                mav.gps_raw_int_encode(
+                    time_boot_ms * 1000, 3, 435000000, -805000000, 300000, 100, 100, 1, 0, 10
+                ),
+                mav.rc_channels_encode(time_boot_ms, 8, *([1500] * 18), 255),
+            ]
+        if tick % 50 == 0:
+            messages += [
+                mav.heartbeat_encode(2, 3, 0, 0, 4),
+                mav.sys_status_encode(0, 0, 0, 500, 12000, 1000, 80, 0, 0, 0, 0, 0, 0),
+                mav.system_time_encode(time_boot_ms * 1000, time_boot_ms),
+            ]
+
+        for message in messages:
+            stream += message.pack(mav)
+
+    return bytes(stream)
+
+
+def count_frames(recording: bytes) -> int:
+    """
+    Returns the number of messages in the recording.
+    """
+    connection = RecordedStream(recording)
+    count = 0
+    while connection.recv_msg() is not None:
+        count += 1
+
+    return count
+
+
+def run_recv_match(recording: bytes) -> int:
+    """
+    Filters like the workers used to, returns the number of wanted messages.
+    """
+    connection = RecordedStream(recording)
+    count = 0
+    while connection.recv_match(type=WANTED_TYPES) is not None:
+        count += 1
+
+    return count
+
+
+def run_dispatcher(recording: bytes) -> int:
+    """
+    Dispatches like the router worker, returns the number of wanted messages.
+    """
+    result, dispatcher = mavlink_dispatcher.MavlinkDispatcher.create(RecordedStream(recording))
+    assert result
+    assert dispatcher is not None
+
+    received: "list[object]" = []
+    for message_type in WANTED_TYPES:
+        dispatcher.register(message_type, received.append)
+
+    while dispatcher.dispatch() > 0:
+        pass
+
+    return len(received)
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    if len(sys.argv) > 1:
+        recording = pathlib.Path(sys.argv[1]).read_bytes()
+    else:
+        recording = record_stream(RECORDING_DURATION)
+
+    frame_count = count_frames(recording)
+    print(f"Recording: {len(recording)} bytes, {frame_count} messages")
+    print(f"{'method':<16}{'wanted':>8}{'msgs/s':>12}{'MB/s':>8}")
+
+    for name, method in [("recv_match", run_recv_match), ("dispatcher", run_dispatcher)]:
+        best_time = float("inf")
+        wanted_count = 0
+        for _ in range(REPETITIONS):
+            start_time = time.perf_counter()
+            wanted_count = method(recording)
+            best_time = min(best_time, time.perf_counter() - start_time)
+
+        print(
+            f"{name:<16}{wanted_count:>8}{frame_count / best_time:>12.0f}"
+            f"{len(recording) / best_time / 1e6:>8.2f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,202 @@
+"""
+Throughput of the documentation pipeline (countup to add random to concatenator)
+at different queue batch sizes. To run:
+```
+python -m documentation.benchmarks.queue_batch_benchmark
+```
+The stages do the same data transformations as the example workers,
+but without the simulated work, so the queues are the bottleneck.
+"""
+
+import multiprocessing as mp
+import time
+
+from documentation.multiprocess_example import intermediate_struct
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Same topology as documentation/multiprocess_example/pipeline.yaml
+COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE = 5
+ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE = 5
+COUNTUP_WORKER_COUNT = 2
+ADD_RANDOM_WORKER_COUNT = 2
+CONCATENATOR_WORKER_COUNT = 2
+
+BATCH_SIZES = [1, 8, 64, 512]
+ITEMS_PER_COUNTUP_WORKER = 8192
+SHARED_MEMORY_SLOT_SIZE = 64 * 1024  # bytes, fits the largest batch
+GET_TIMEOUT = 0.1  # seconds
+
+
+def countup_stage(
+    start: int,
+    item_count: int,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Produces item_count consecutive integers.
+    """
+    batch = []
+    for value in range(start, start + item_count):
+        batch.append(value)
+        if len(batch) >= output_queue.batch_size:
+            output_queue.put_many(batch)
+            batch = []
+
+        if controller.is_exit_requested():
+            return
+
+    output_queue.put_many(batch)
+
+
+def add_random_stage(
+    term: int,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Adds a fixed term and packs the intermediate struct.
+    """
+    while not controller.is_exit_requested():
+        values = input_queue.get_many(input_queue.batch_size, GET_TIMEOUT)
+        output_queue.put_many(
+            [
+                intermediate_struct.IntermediateStruct(value + term, "even")
+                for value in values
+                if value is not None
+            ]
+        )
+
+
+def concatenator_stage(
+    prefix: str,
+    suffix: str,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    done_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Concatenates and reports how many items it consumed.
+    """
+    count = 0
+    while not controller.is_exit_requested():
+        for middle in input_queue.get_many(input_queue.batch_size, GET_TIMEOUT):
+            if middle is None:
+                continue
+
+            _ = prefix + str(middle.number) + suffix
+            count += 1
+
+        # Report progress in chunks to keep the done queue quiet
+        if count > 0:
+            done_queue.queue.put(count)
+            count = 0
+
+
+def run_pipeline(
+    mp_manager: "mp.managers.SyncManager",
+    backend: queue_proxy_wrapper.QueueBackend,
+    batch_size: int,
+) -> float:
+    """
+    Runs the pipeline until every produced item is consumed.
+
+    Returns the throughput in items per second.
+    """
+    controller = worker_controller.WorkerController()
+    countup_to_add_random_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE,
+        backend,
+        SHARED_MEMORY_SLOT_SIZE,
+        batch_size,
+    )
+    add_random_to_concatenator_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE,
+        backend,
+        SHARED_MEMORY_SLOT_SIZE,
+        batch_size,
+    )
+    done_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+
+    workers = []
+    for i in range(COUNTUP_WORKER_COUNT):
+        workers.append(
+            mp.Process(
+                target=countup_stage,
+                args=(
+                    i * ITEMS_PER_COUNTUP_WORKER,
+                    ITEMS_PER_COUNTUP_WORKER,
+                    countup_to_add_random_queue,
+                    controller,
+                ),
+            )
+        )
+    for _ in range(ADD_RANDOM_WORKER_COUNT):
+        workers.append(
+            mp.Process(
+                target=add_random_stage,
+                args=(5, countup_to_add_random_queue, add_random_to_concatenator_queue, controller),
+            )
+        )
+    for _ in range(CONCATENATOR_WORKER_COUNT):
+        workers.append(
+            mp.Process(
+                target=concatenator_stage,
+                args=(
+                    "Hello ",
+                    " world!",
+                    add_random_to_concatenator_queue,
+                    done_queue,
+                    controller,
+                ),
+            )
+        )
+
+    total_items = COUNTUP_WORKER_COUNT * ITEMS_PER_COUNTUP_WORKER
+
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.start()
+
+    consumed = 0
+    while consumed < total_items:
+        consumed += done_queue.queue.get()
+
+    elapsed = time.perf_counter() - start_time
+
+    controller.request_exit()
+    for worker in workers:
+        worker.join()
+
+    countup_to_add_random_queue.close()
+    add_random_to_concatenator_queue.close()
+
+    return total_items / elapsed
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = mp.Manager()
+
+    print(f"{'backend':<15}{'batch size':>12}{'items/s':>14}")
+    for backend in queue_proxy_wrapper.QueueBackend:
+        for batch_size in BATCH_SIZES:
+            throughput = run_pipeline(mp_manager, backend, batch_size)
+            print(f"{backend.name:<15}{batch_size:>12}{throughput:>14.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
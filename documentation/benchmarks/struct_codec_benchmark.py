@@ -0,0 +1,71 @@
+"""
+Size and speed of the struct codec compared to pickle. To run:
+```
+python -m documentation.benchmarks.struct_codec_benchmark
+```
+"""
+
+import pickle
+import timeit
+
+from documentation.multiprocess_example import intermediate_struct
+from modules.command import command
+from modules.telemetry import telemetry
+from utilities.workers import struct_codec
+
+
+REPETITIONS = 100_000
+
+
+def measure(name: str, item: object) -> None:
+    """
+    Prints bytes per item and nanoseconds per encode and decode for both formats.
+    """
+    pickled = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+    record = struct_codec.encode(item)
+
+    pickle_encode_ns = (
+        timeit.timeit(lambda: pickle.dumps(item, pickle.HIGHEST_PROTOCOL), number=REPETITIONS)
+        / REPETITIONS
+        * 1e9
+    )
+    pickle_decode_ns = (
+        timeit.timeit(lambda: pickle.loads(pickled), number=REPETITIONS) / REPETITIONS * 1e9
+    )
+    codec_encode_ns = (
+        timeit.timeit(lambda: struct_codec.encode(item), number=REPETITIONS) / REPETITIONS * 1e9
+    )
+    codec_decode_ns = (
+        timeit.timeit(lambda: struct_codec.decode(record), number=REPETITIONS) / REPETITIONS * 1e9
+    )
+
+    print(
+        f"{name:<20}{'pickle':<8}{len(pickled):>8}{pickle_encode_ns:>12.0f}{pickle_decode_ns:>12.0f}"
+    )
+    print(f"{'':<20}{'codec':<8}{len(record):>8}{codec_encode_ns:>12.0f}{codec_decode_ns:>12.0f}")
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    print(f"{'type':<20}{'format':<8}{'bytes':>8}{'encode ns':>12}{'decode ns':>12}")
+    measure(
+        "TelemetryData",
+        telemetry.TelemetryData(
+            123456, 1.0, 2.0, -3.0, 0.1, 0.2, 0.3, 0.01, 0.02, 1.57, 0.001, 0.002, 0.003
+        ),
+    )
+    measure("TelemetryData empty", telemetry.TelemetryData())
+    measure("Position", command.Position(10, 20, 30))
+    measure("IntermediateStruct", intermediate_struct.IntermediateStruct(3252, "even"))
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
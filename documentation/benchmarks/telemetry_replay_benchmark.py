@@ -0,0 +1,169 @@
+"""
+Throughput of the telemetry module on a recorded flight, replayed as fast as it is read,
+and how closely a paced replay keeps its speed. No drone is needed. To run:
+```
+python -m documentation.benchmarks.telemetry_replay_benchmark [tlog file]
+```
+Without a file, records a flight to a temporary tlog.
+The router records one when its tlog_path is set, see bootcamp_main.py .
+"""
+
+import pathlib
+import sys
+import tempfile
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.mavlink_router import mavlink_recorder
+from modules.mavlink_router import mavlink_replay
+from modules.telemetry import telemetry
+
+
+RECORDING_DURATION = 60  # seconds of flight
+START_TIME = 1_700_000_000.0  # recorded time of the first message
+PACED_SPEED = 100.0  # multiple of the recorded pace
+
+
+def record_flight(path: pathlib.Path, duration: int) -> bool:
+    """
+    Records attitude at 50 Hz, local position at 10 Hz, and heartbeats at 1 Hz.
+
+    Returns whether the flight was recorded.
+    """
+    result, recorder = mavlink_recorder.TlogRecorder.create(path)
+    if not result:
+        return False
+
+    # Get Pylance to stop complaining
+    assert recorder is not None
+
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    for tick in range(duration * 50):
+        time_boot_ms = tick * 20
+        receive_time = START_TIME + tick * 0.02
+        messages = [mav.attitude_encode(time_boot_ms, 0.01, 0.02, 1.57, 0.001, 0.002, 0.003)]
+        if tick % 5 == 0:
+            messages.append(
+                mav.local_position_ned_encode(time_boot_ms, 1.0, 2.0, -3.0, 0.1, 0.2, 0.3)
+            )
+        if tick % 50 == 0:
+            messages.append(mav.heartbeat_encode(2, 3, 0, 0, 4))
+
+        for message in messages:
+            recorder.record(message.pack(mav), receive_time)
+
+    recorder.close()
+    return True
+
+
+def run_recv_msg(path: pathlib.Path, speed: "float | None") -> "tuple[int, float]":
+    """
+    Receives every message.
+
+    Returns the number of messages and the time taken in seconds.
+    """
+    result, replay = mavlink_replay.MavlinkReplay.create(path, speed)
+    assert result
+    assert replay is not None
+
+    start_time = time.perf_counter()
+    while not replay.is_finished():
+        replay.recv_match(blocking=True, timeout=1.0)
+    duration = time.perf_counter() - start_time
+
+    replayed_count, _ = replay.get_counts()
+    replay.close()
+    return replayed_count, duration
+
+
+def run_telemetry(path: pathlib.Path, local_logger: logger.Logger) -> "tuple[int, int, float]":
+    """
+    Runs the telemetry module on every message.
+
+    Returns the number of messages, of telemetry produced, and the time taken in seconds.
+    """
+    result, replay = mavlink_replay.MavlinkReplay.create(path, None)
+    assert result
+    assert replay is not None
+
+    result, telemetry_instance = telemetry.Telemetry.create(replay, local_logger)
+    assert result
+    assert telemetry_instance is not None
+
+    output_count = 0
+    start_time = time.perf_counter()
+    while not replay.is_finished():
+        if isinstance(telemetry_instance.run(), telemetry.TelemetryData):
+            output_count += 1
+    duration = time.perf_counter() - start_time
+
+    replayed_count, _ = replay.get_counts()
+    replay.close()
+    return replayed_count, output_count, duration
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("telemetry_replay_benchmark", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 1:
+            path = pathlib.Path(sys.argv[1])
+        else:
+            path = pathlib.Path(directory, "flight.tlog")
+            if not record_flight(path, RECORDING_DURATION):
+                print("ERROR: Failed to record flight")
+                return -1
+
+        print(f"Recording: {path.stat().st_size} bytes")
+        print(f"{'replay':<20}{'messages':>10}{'outputs':>10}{'msgs/s':>12}{'speed':>10}")
+
+        message_count, duration = run_recv_msg(path, None)
+        print(
+            f"{'recv_match, max':<20}{message_count:>10}{'':>10}{message_count / duration:>12.0f}"
+        )
+
+        message_count, output_count, duration = run_telemetry(path, local_logger)
+        print(
+            f"{'telemetry, max':<20}{message_count:>10}{output_count:>10}"
+            f"{message_count / duration:>12.0f}"
+        )
+
+        # Achieved speed, from the recorded span
+        result, replay = mavlink_replay.MavlinkReplay.create(path, None)
+        assert result
+        assert replay is not None
+        first_message = replay.recv_msg()
+        last_message = first_message
+        while not replay.is_finished():
+            last_message = replay.recv_msg()
+        # pymavlink stamps messages with _timestamp
+        # pylint: disable-next=protected-access
+        recorded_span = last_message._timestamp - first_message._timestamp  # type: ignore
+        replay.close()
+
+        message_count, duration = run_recv_msg(path, PACED_SPEED)
+        print(
+            f"{f'recv_match, x{PACED_SPEED:.0f}':<20}{message_count:>10}{'':>10}"
+            f"{message_count / duration:>12.0f}{recorded_span / duration:>10.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
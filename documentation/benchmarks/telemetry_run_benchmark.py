@@ -0,0 +1,260 @@
+"""
+Cost of Telemetry.run() per message, with the dict based implementation it replaced
+for comparison, on decoded messages so that receiving costs nothing. To run:
+```
+python -m documentation.benchmarks.telemetry_run_benchmark
+```
+Kept memory is what is still allocated after each message while every output is kept,
+as a consumer would until it is done with them.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+
+
+MESSAGE_COUNT = 60_000
+REPETITIONS = 5
+POOL_SIZE = 4
+
+
+class DecodedStream:
+    """
+    Connection that returns the given messages in turn, whatever the requested types.
+    """
+
+    def __init__(self, messages: "list[object]") -> None:
+        self.__next_message = iter(messages).__next__
+
+    def recv_match(self, **kwargs: object) -> object:  # pylint: disable=unused-argument
+        """
+        Returns the next message, or None after the last.
+        """
+        try:
+            return self.__next_message()
+        except StopIteration:
+            return None
+
+
+class DictTelemetryData:  # pylint: disable=too-many-instance-attributes
+    """
+    TelemetryData before __slots__.
+    """
+
+    def __init__(self, *fields: object) -> None:
+        (
+            self.time_since_boot,
+            self.x,
+            self.y,
+            self.z,
+            self.x_velocity,
+            self.y_velocity,
+            self.z_velocity,
+            self.roll,
+            self.pitch,
+            self.yaw,
+            self.roll_speed,
+            self.pitch_speed,
+            self.yaw_speed,
+        ) = fields
+
+
+class DictTelemetry:
+    """
+    Telemetry before __slots__, with the attributes in a dict and up to 3 clock reads per message.
+    """
+
+    def __init__(self, connection: DecodedStream) -> None:
+        self.connection = connection
+        self.attributes = {
+            "time_last_attitude": 0,
+            "time_last_local_position_ned": 0,
+            "x": None,
+            "y": None,
+            "z": None,
+            "vx": None,
+            "vy": None,
+            "vz": None,
+            "pitch": None,
+            "yaw": None,
+            "roll": None,
+            "rollspeed": None,
+            "pitchspeed": None,
+            "yawspeed": None,
+        }
+        self.times = {"attitude": 0, "position": 0}
+
+    def run(self) -> "DictTelemetryData | str | None":
+        """
+        Telemetry.run() as it was.
+        """
+        msg = self.connection.recv_match(type=["ATTITUDE", "LOCAL_POSITION_NED"])
+        telemetry_data = "Not Ready"
+        if msg is not None:
+            if msg.get_type() == "ATTITUDE":  # type: ignore
+                self.times["attitude"] = time.time()
+                self.attributes["time_last_attitude"] = msg.time_boot_ms  # type: ignore
+                self.attributes["roll"] = msg.roll  # type: ignore
+                self.attributes["yaw"] = msg.yaw  # type: ignore
+                self.attributes["pitch"] = msg.pitch  # type: ignore
+                self.attributes["yawspeed"] = msg.yawspeed  # type: ignore
+                self.attributes["pitchspeed"] = msg.pitchspeed  # type: ignore
+                self.attributes["rollspeed"] = msg.rollspeed  # type: ignore
+            else:
+                self.times["position"] = time.time()
+                self.attributes["time_last_local_position_ned"] = msg.time_boot_ms  # type: ignore
+                self.attributes["x"] = msg.x  # type: ignore
+                self.attributes["y"] = msg.y  # type: ignore
+                self.attributes["z"] = msg.z  # type: ignore
+                self.attributes["vx"] = msg.vx  # type: ignore
+                self.attributes["vy"] = msg.vy  # type: ignore
+                self.attributes["vz"] = msg.vz  # type: ignore
+            if self.attributes["x"] is not None and self.attributes["roll"] is not None:
+                if (
+                    abs(
+                        self.attributes["time_last_local_position_ned"]  # type: ignore
+                        - self.attributes["time_last_attitude"]
+                    )
+                    >= 1000
+                ):
+                    return None
+                if (
+                    time.time() - self.times["attitude"] > 1
+                    or time.time() - self.times["position"] > 1
+                ):
+                    return None
+                telemetry_data = DictTelemetryData(
+                    max(
+                        self.attributes["time_last_local_position_ned"],  # type: ignore
+                        self.attributes["time_last_attitude"],  # type: ignore
+                    ),
+                    self.attributes["x"],
+                    self.attributes["y"],
+                    self.attributes["z"],
+                    self.attributes["vx"],
+                    self.attributes["vy"],
+                    self.attributes["vz"],
+                    self.attributes["roll"],
+                    self.attributes["pitch"],
+                    self.attributes["yaw"],
+                    self.attributes["rollspeed"],
+                    self.attributes["pitchspeed"],
+                    self.attributes["yawspeed"],
+                )
+                for index in self.attributes:
+                    self.attributes[index] = None
+        else:
+            telemetry_data = None
+            for index in self.attributes:
+                self.attributes[index] = None
+        return telemetry_data
+
+
+def create_messages(count: int) -> "list[object]":
+    """
+    Returns attitudes at 50 Hz and local positions at 10 Hz, like an autopilot streams them.
+    """
+    messages: "list[object]" = []
+    for tick in range(count):
+        time_boot_ms = tick * 20
+        if tick % 6 == 5:
+            messages.append(
+                mavutil.mavlink.MAVLink_local_position_ned_message(
+                    time_boot_ms, 1.0, 2.0, -3.0, 0.1, 0.2, 0.3
+                )
+            )
+        else:
+            messages.append(
+                mavutil.mavlink.MAVLink_attitude_message(
+                    time_boot_ms, 0.01, 0.02, 1.57, 0.001, 0.002, 0.003
+                )
+            )
+
+    return messages
+
+
+def create_implementations(
+    messages: "list[object]", local_logger: logger.Logger
+) -> "list[tuple[str, object]]":
+    """
+    Returns every implementation, reading the messages.
+    """
+    implementations: "list[tuple[str, object]]" = [("dict", DictTelemetry(DecodedStream(messages)))]
+    for name, pool_size in [("slots", 0), (f"slots, pool {POOL_SIZE}", POOL_SIZE)]:
+        result, telemetry_instance = telemetry.Telemetry.create(
+            DecodedStream(messages), local_logger, pool_size  # type: ignore
+        )
+        assert result
+        implementations.append((name, telemetry_instance))
+
+    return implementations
+
+
+def run(implementation: object, count: int, outputs: "list[object] | None") -> None:
+    """
+    Runs the implementation on every message, keeping the outputs if there is a list for them,
+    with room for one per message.
+    """
+    run_once = implementation.run  # type: ignore
+    if outputs is None:
+        for _ in range(count):
+            run_once()
+        return
+
+    for i in range(count):
+        outputs[i] = run_once()
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("telemetry_run_benchmark", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    messages = create_messages(MESSAGE_COUNT)
+    print(f"{MESSAGE_COUNT} messages, Python {sys.version.split()[0]}")
+    print(f"{'telemetry':<18}{'msgs/s':>12}{'kept blocks/msg':>18}{'kept bytes/msg':>16}")
+
+    for index in range(3):
+        best_time = float("inf")
+        for _ in range(REPETITIONS):
+            name, implementation = create_implementations(messages, local_logger)[index]
+            start_time = time.perf_counter()
+            run(implementation, MESSAGE_COUNT, None)
+            best_time = min(best_time, time.perf_counter() - start_time)
+
+        name, implementation = create_implementations(messages, local_logger)[index]
+        outputs: "list[object]" = [None] * MESSAGE_COUNT
+        tracemalloc.start()
+        start_blocks = sys.getallocatedblocks()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        run(implementation, MESSAGE_COUNT, outputs)
+        kept_blocks = sys.getallocatedblocks() - start_blocks
+        kept_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{name:<18}{MESSAGE_COUNT / best_time:>12.0f}"
+            f"{kept_blocks / MESSAGE_COUNT:>18.2f}{(kept_bytes - start_bytes) / MESSAGE_COUNT:>16.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,90 @@
+"""
+Per-iteration overhead of the worker loop checks. To run:
+```
+python -m documentation.benchmarks.worker_controller_benchmark
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import worker_controller
+
+
+ITERATIONS = 200_000
+
+
+class QueueWorkerController:
+    """
+    Previous implementation for comparison: exit is a pipe-backed queue, pause is a semaphore.
+    """
+
+    def __init__(self) -> None:
+        self.__pause = mp.BoundedSemaphore(1)
+        self.__exit_queue = mp.Queue(1)
+
+    def check_pause(self) -> None:
+        """
+        Semaphore acquire and release.
+        """
+        self.__pause.acquire()
+        self.__pause.release()
+
+    def is_exit_requested(self) -> bool:
+        """
+        Queue empty check.
+        """
+        return not self.__exit_queue.empty()
+
+
+def loop(
+    controller: "worker_controller.WorkerController | QueueWorkerController",
+    results: "mp.Queue",
+) -> None:
+    """
+    Empty worker loop, reports nanoseconds per iteration.
+    """
+    start_time = time.perf_counter_ns()
+    for _ in range(ITERATIONS):
+        if controller.is_exit_requested():
+            break
+
+        controller.check_pause()
+
+    results.put((time.perf_counter_ns() - start_time) / ITERATIONS)
+
+
+def measure(controller: "worker_controller.WorkerController | QueueWorkerController") -> float:
+    """
+    Runs the loop in a worker process.
+
+    Returns nanoseconds per iteration.
+    """
+    results = mp.Queue()
+    worker = mp.Process(target=loop, args=(controller, results))
+    worker.start()
+    nanoseconds = results.get()
+    worker.join()
+    return nanoseconds
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    before = measure(QueueWorkerController())
+    after = measure(worker_controller.WorkerController())
+
+    print(f"{'controller':<25}{'ns/iteration':>14}")
+    print(f"{'queue and semaphore':<25}{before:>14.0f}")
+    print(f"{'shared state word':<25}{after:>14.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,125 @@
+"""
+Time from starting a worker process to its first loop iteration, per start method. To run:
+```
+python -m documentation.benchmarks.worker_startup_benchmark
+```
+"""
+
+import multiprocessing as mp
+import time
+
+# Imported by every worker, as the real workers do
+from pymavlink import mavutil  # pylint: disable=unused-import
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+WORKER_COUNT = 4
+# Modules the forkserver imports once for all workers, "__main__" is this module
+FORKSERVER_PRELOAD = [
+    "__main__",
+    "pymavlink.mavutil",
+    "modules.common.modules.logger.logger",
+    "utilities.workers.worker_manager",
+]
+STARTUP_TIMEOUT = 30  # seconds
+
+
+def idle_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker that only loops until exit.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(0.001)
+
+
+def wait_for_startup(manager: worker_manager.WorkerManager) -> "list[float]":
+    """
+    Waits until every worker has reached its loop.
+
+    Returns the startup time of each worker in seconds.
+    """
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        startup_times = manager.get_startup_times()
+        if None not in startup_times:
+            return startup_times  # type: ignore
+
+        time.sleep(0.001)
+
+    raise TimeoutError("Workers did not reach their loops")
+
+
+def measure(
+    start_method: str, preload: "list[str] | None", local_logger: logger.Logger
+) -> "tuple[float, float]":
+    """
+    Starts the workers, then kills and restarts one of them.
+
+    Returns the mean cold start time and the restart time in seconds.
+    """
+    controller = worker_controller.WorkerController()
+    result, properties = worker_manager.WorkerProperties.create(
+        WORKER_COUNT, idle_worker, (), [], [], controller, local_logger
+    )
+    assert result and properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(
+        properties, local_logger, start_method, preload
+    )
+    assert result and manager is not None
+
+    manager.start_workers()
+    cold_start_times = wait_for_startup(manager)
+
+    worker = manager.get_workers()[0]
+    worker.kill()
+    worker.join()
+    manager.restart_worker(0)
+    restart_time = wait_for_startup(manager)[0]
+
+    controller.request_exit()
+    manager.join_workers()
+
+    return sum(cold_start_times) / len(cold_start_times), restart_time
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("worker_startup_benchmark", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    # Controllers created with the fork start method cannot be passed to workers started
+    # any other way, and the other way around works
+    mp.set_start_method("spawn")
+
+    configurations = [("fork", None), ("spawn", None), ("forkserver", FORKSERVER_PRELOAD)]
+    for start_method, preload in configurations:
+        if start_method not in mp.get_all_start_methods():
+            continue
+
+        cold_start_time, restart_time = measure(start_method, preload, local_logger)
+        print(
+            f"{start_method:>10}: cold start {cold_start_time * 1000:8.1f} ms, "
+            f"restart {restart_time * 1000:8.1f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -6,27 +6,27 @@ python -m documentation.main_multiprocess_example
 """
 
 import multiprocessing as mp
+import pathlib
 import time
 
-from documentation.multiprocess_example.add_random import add_random_worker
-from documentation.multiprocess_example.concatenator import concatenator_worker
-from documentation.multiprocess_example.countup import countup_worker
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
-from utilities.workers import queue_proxy_wrapper
+from utilities.workers import pipeline_builder
+from utilities.workers import worker_autoscaler
 from utilities.workers import worker_controller
-from utilities.workers import worker_manager
+from utilities.workers import worker_shutdown
+from utilities.workers import worker_supervisor
 
 
-# Play with these numbers to see queue bottlenecks
-COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE = 5
-ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE = 5
+# Queues, worker counts and how the workers are connected
+PIPELINE_CONFIG_FILE_PATH = pathlib.Path("documentation", "multiprocess_example", "pipeline.yaml")
 
-# Play with these numbers to see process bottlenecks
-COUNTUP_WORKER_COUNT = 2
-ADD_RANDOM_WORKER_COUNT = 2
-CONCATENATOR_WORKER_COUNT = 2
+# Concatenator workers are added while its input queue stays full, up to this many
+CONCATENATOR_MAX_WORKER_COUNT = 3
+
+# Longest time workers get to leave their loops once exit is requested
+SHUTDOWN_TIMEOUT = 5  # seconds
 
 
 # main() is required for early return
@@ -62,122 +62,63 @@ def main() -> int:
     # See 2nd note: https://docs.python.org/3/library/multiprocessing.html#pipes-and-queues
     mp_manager = mp.Manager()
 
-    # Queue maxsize should always be >= the larger of producers/consumers count
-    # Example: Producers 3, consumers 2, so queue maxsize minimum is 3
-    countup_to_add_random_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE,
-    )
-    add_random_to_concatenator_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE,
-    )
-
-    # Worker properties
-    result, countup_worker_properties = worker_manager.WorkerProperties.create(
-        count=COUNTUP_WORKER_COUNT,  # How many workers
-        target=countup_worker.countup_worker,  # What's the function that this worker runs
-        work_arguments=(  # The function's arguments excluding input/output queues and controller
-            3,
-            100,
-        ),
-        input_queues=[],  # Note that input/output queues must be in the proper order
-        output_queues=[countup_to_add_random_queue],
-        controller=controller,  # Worker controller
-        local_logger=main_logger,  # Main logger to log any failures during worker creation
-    )
+    # Queues and workers are created from the topology, which is validated first
+    result, pipeline_config = read_yaml.open_config(PIPELINE_CONFIG_FILE_PATH)
     if not result:
-        print("Failed to create arguments for Countup")
+        print("Failed to load pipeline configuration file")
         return -1
 
     # Get Pylance to stop complaining
-    assert countup_worker_properties is not None
-
-    result, add_random_worker_properties = worker_manager.WorkerProperties.create(
-        count=ADD_RANDOM_WORKER_COUNT,
-        target=add_random_worker.add_random_worker,
-        work_arguments=(
-            252,
-            10,
-            5,
-        ),
-        input_queues=[countup_to_add_random_queue],
-        output_queues=[add_random_to_concatenator_queue],
-        controller=controller,
-        local_logger=main_logger,
-    )
-    if not result:
-        print("Failed to create arguments for Add Random")
-        return -1
+    assert pipeline_config is not None
 
-    # Get Pylance to stop complaining
-    assert add_random_worker_properties is not None
-
-    result, concatenator_worker_properties = worker_manager.WorkerProperties.create(
-        count=CONCATENATOR_WORKER_COUNT,
-        target=concatenator_worker.concatenator_worker,
-        work_arguments=(
-            "Hello ",
-            " world!",
-        ),
-        input_queues=[add_random_to_concatenator_queue],
-        output_queues=[],
-        controller=controller,
-        local_logger=main_logger,
+    result, pipeline = pipeline_builder.Pipeline.create(
+        pipeline_config, controller, mp_manager, {}, main_logger
     )
     if not result:
-        print("Failed to create arguments for Concatenator")
+        print("Failed to create pipeline")
         return -1
 
     # Get Pylance to stop complaining
-    assert concatenator_worker_properties is not None
+    assert pipeline is not None
 
-    # Prepare processes
-    # Data path: countup_worker to add_random_worker to concatenator_workers
-    worker_managers: list[worker_manager.WorkerManager] = []  # List of all worker managers
+    worker_managers = pipeline.get_worker_managers()
+    concatenator_manager = pipeline.get_worker_manager("concatenator")
+    add_random_to_concatenator_queue = pipeline.get_queue("add_random_to_concatenator_queue")
 
-    result, countup_manager = worker_manager.WorkerManager.create(
-        worker_properties=countup_worker_properties,
-        local_logger=main_logger,
-    )
+    # Start worker processes, consumers first
+    pipeline.start()
+
+    # The supervisor restarts dead workers and runs the autoscaler
+    result, autoscaler = worker_autoscaler.WorkerAutoscaler.create(main_logger)
     if not result:
-        print("Failed to create manager for Countup")
+        print("Failed to create autoscaler")
         return -1
 
     # Get Pylance to stop complaining
-    assert countup_manager is not None
-
-    worker_managers.append(countup_manager)
-
-    result, add_random_manager = worker_manager.WorkerManager.create(
-        worker_properties=add_random_worker_properties,
-        local_logger=main_logger,
+    assert autoscaler is not None
+
+    # Concatenator is the slowest stage, scale it while its input queue is full
+    result = autoscaler.add_stage(
+        concatenator_manager,
+        concatenator_manager.get_worker_count(),
+        CONCATENATOR_MAX_WORKER_COUNT,
+        add_random_to_concatenator_queue.maxsize,
     )
     if not result:
-        print("Failed to create manager for Add Random")
+        print("Failed to autoscale Concatenator")
         return -1
 
-    # Get Pylance to stop complaining
-    assert add_random_manager is not None
-
-    worker_managers.append(add_random_manager)
-
-    result, concatenator_manager = worker_manager.WorkerManager.create(
-        worker_properties=concatenator_worker_properties,
-        local_logger=main_logger,
+    result, supervisor = worker_supervisor.WorkerSupervisor.create(
+        worker_managers, main_logger, autoscaler=autoscaler
     )
     if not result:
-        print("Failed to create manager for Concatenator")
+        print("Failed to create supervisor")
         return -1
 
     # Get Pylance to stop complaining
-    assert concatenator_manager is not None
-
-    worker_managers.append(concatenator_manager)
+    assert supervisor is not None
 
-    # Start worker processes
-    for manager in worker_managers:
-        manager.start_workers()
+    supervisor.start()
 
     main_logger.info("Started", True)
 
@@ -194,21 +135,26 @@ def main() -> int:
     time.sleep(2)
 
     # Stop the processes
-    controller.request_exit()
-
-    main_logger.info("Requested exit", True)
-
-    # Fill and drain queues from END TO START
-    countup_to_add_random_queue.fill_and_drain_queue()
-    add_random_to_concatenator_queue.fill_and_drain_queue()
-
-    main_logger.info("Queues cleared", True)
-
-    # Clean up worker processes
-    for manager in worker_managers:
-        manager.join_workers()
+    # Queues are unblocked from START TO END until every worker has acknowledged exit
+    # Workers are joined once they all have
+    main_logger.info("Requesting exit", True)
+    for status in autoscaler.get_status():
+        main_logger.info(str(status), True)
+
+    supervisor.stop()
+    result = worker_shutdown.shutdown_workers(
+        controller,
+        worker_managers,
+        pipeline.get_queues(),
+        SHUTDOWN_TIMEOUT,
+        main_logger,
+    )
+    if not result:
+        print("Workers did not exit in time")
+        return -1
 
     main_logger.info("Stopped", True)
+    pipeline.close()
 
     # We can reset controller in case we want to reuse it
     # Alternatively, create a new WorkerController instance
@@ -11,6 +11,10 @@ from utilities.workers import worker_controller
 from . import concatenator
 
 
+# Longest wait for input before checking for an exit request again
+INPUT_TIMEOUT = 0.1  # seconds
+
+
 def concatenator_worker(
     prefix: str,
     suffix: str,
@@ -46,22 +50,21 @@ def concatenator_worker(
         controller.check_pause()
 
         # Get an item from the queue
-        # If the queue is empty, the worker process will block
-        # until the queue is non-empty
-        input_data = input_queue.queue.get()
-
-        # Exit on sentinel
-        if input_data is None:
-            break
+        # If the queue is empty, the worker process will block until the queue is non-empty
+        # or the timeout passes, so that a worker retired by the autoscaler can exit
+        for input_data in input_queue.get_many(1, INPUT_TIMEOUT):
+            # Exit on sentinel
+            if input_data is None:
+                return
 
-        # All of the work should be done within the class
-        # Getting the output is as easy as calling a single method
-        # The class is reponsible for unpacking the intermediate type
-        result, value = concatenator_instance.run_concatenation(input_data)
+            # All of the work should be done within the class
+            # Getting the output is as easy as calling a single method
+            # The class is reponsible for unpacking the intermediate type
+            result, value = concatenator_instance.run_concatenation(input_data)
 
-        # Check result
-        if not result:
-            continue
+            # Check result
+            if not result:
+                continue
 
-        # Print just the string
-        local_logger.info(str(value), None)
+            # Print just the string
+            local_logger.info(str(value), None)
@@ -2,6 +2,8 @@
 Example of an intermediate struct representation.
 """
 
+from utilities.workers import struct_codec
+
 
 class IntermediateStruct:
     """
@@ -14,3 +16,7 @@ class IntermediateStruct:
         """
         self.number = number
         self.sentence = sentence
+
+
+# Optional, lets queues send the struct as a compact fixed-size record instead of a pickle
+struct_codec.register(IntermediateStruct, 3, [("number", "q"), ("sentence", "64s")])
@@ -5,6 +5,9 @@ Decision-making logic.
 import math
 import time
 from pymavlink import mavutil
+from utilities.workers import struct_codec
+from . import command_ack_tracker
+from . import command_scheduler
 from ..common.modules.logger import logger
 from ..telemetry import telemetry
 
@@ -20,6 +23,9 @@ class Position:
         self.z = z
 
 
+struct_codec.register(Position, 2, [("x", "d"), ("y", "d"), ("z", "d")])
+
+
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
@@ -36,18 +42,32 @@ class Command:  # pylint: disable=too-many-instance-attributes
         cls,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        ack_timeout: float | None = None,
     ) -> "tuple[bool,Command]|tuple[bool,None]":
         """
         Falliable create (instantiation) method to create a Command object.
+        ack_timeout: seconds to wait for a COMMAND_ACK before retrying, None to not wait for them
         """
         if connection is None:
             return False, None
-        return True, cls(cls.__private_key, connection, local_logger)
+        ack_tracker = None
+        if ack_timeout is not None:
+            result, ack_tracker = command_ack_tracker.CommandAckTracker.create(ack_timeout)
+            if not result:
+                return False, None
+        # Telemetry can arrive faster than commands are worth sending
+        result, scheduler = command_scheduler.CommandScheduler.create(
+            connection, ack_tracker=ack_tracker
+        )
+        if not result:
+            return False, None
+        return True, cls(cls.__private_key, connection, scheduler, local_logger)
 
     def __init__(
         self,
         key: object,
         connection: mavutil.mavfile,
+        scheduler: command_scheduler.CommandScheduler,
         local_logger: logger.Logger,
     ) -> None:
         """
@@ -56,10 +76,14 @@ class Command:  # pylint: disable=too-many-instance-attributes
         :param self: class object
         :param key: key from create method
         :param connection: mavlink communication object
+        :param scheduler: rate limits the commands sent on the connection
         :param local_logger: Logger to log data and warnings
         """
         assert key is Command.__private_key, "Use create() method"
         self.connection = connection
+        self.scheduler = scheduler
+        # Parameters and description of each command waiting for its rate, by MAV_CMD
+        self.deferred: "dict[int, tuple[tuple[float, ...], str]]" = {}
         self.local_logger = local_logger
         self.velocity_sum = [0, 0, 0]
         self.time = time.time()
@@ -78,6 +102,7 @@ class Command:  # pylint: disable=too-many-instance-attributes
         :param data: Telemetry data object
         :param target: Target position object vector
         :param queue: output queue to log commands
+        :return: description of the command sent, None if none was sent now
         """
         command = None
         turn_angle = 0
@@ -89,20 +114,11 @@ class Command:  # pylint: disable=too-many-instance-attributes
         )
         self.i += 1
         if abs(target.z - data.z) > 0.5:
-            self.connection.mav.command_long_send(
-                1,
-                0,
+            return self.submit(
                 mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT,
-                0,
-                1,
-                0,
-                0,
-                0,
-                0,
-                0,
-                data.z + (target.z - data.z),
+                (1, 0, 0, 0, 0, 0, data.z + (target.z - data.z)),
+                f"CHANGE ALTITUDE: {target.z-data.z}",
             )
-            return f"CHANGE ALTITUDE: {target.z-data.z}"
         deltax = target.x - data.x
         deltay = target.y - data.y
         current_yaw = data.yaw * 180 / math.pi
@@ -131,22 +147,51 @@ class Command:  # pylint: disable=too-many-instance-attributes
         else:
             direction = -1
         if abs(turn_angle) > 5:
-            self.connection.mav.command_long_send(
-                1,
-                0,
+            return self.submit(
                 mavutil.mavlink.MAV_CMD_CONDITION_YAW,
-                0,
-                abs(turn_angle),
-                5,
-                direction,
-                1,
-                0,
-                0,
-                0,
+                (abs(turn_angle), 5, direction, 1, 0, 0, 0),
+                f"CHANGE YAW: {turn_angle}",
             )
-            return f"CHANGE YAW: {turn_angle}"
         return command
 
+    def submit(self, command: int, params: "tuple[float, ...]", description: str) -> str | None:
+        """
+        Docstring for submit
+        Submit a command to the scheduler, remembering its description if it has to wait.
+
+        :param self: class object
+        :param command: MAV_CMD of the command
+        :param params: the 7 parameters of the command
+        :param description: description of the command to report to main
+        :return: description of the command if it was sent now, None otherwise
+        """
+        outcome = self.scheduler.submit(command, params)
+        # Only report changes actually sent to the drone
+        if outcome == command_scheduler.SubmitOutcome.DEFERRED:
+            self.deferred[command] = (params, description)
+        else:
+            self.deferred.pop(command, None)
+        if outcome != command_scheduler.SubmitOutcome.SENT:
+            self.local_logger.info(f"{description} {outcome.name.lower()}")
+            return None
+        return description
+
+    def flush(self) -> "list[str]":
+        """
+        Docstring for flush
+        Send the waiting commands the rate now allows, and the retries due.
+
+        :param self: class object
+        :return: descriptions of the waiting commands sent, retries are not reported again
+        """
+        descriptions = []
+        for command, params in self.scheduler.flush():
+            params_and_description = self.deferred.get(command)
+            if params_and_description is not None and params_and_description[0] == params:
+                del self.deferred[command]
+                descriptions.append(params_and_description[1])
+        return descriptions
+
         # Log average velocity for this trip so far
 
         # Use COMMAND_LONG (76) message, assume the target_system=1 and target_componenet=0
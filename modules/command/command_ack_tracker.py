@@ -0,0 +1,234 @@
+"""
+Matching COMMAND_ACKs to sent commands, and retrying the unacknowledged ones.
+"""
+
+import collections
+import time
+
+from pymavlink import mavutil
+
+
+# Retries of a command before giving up, each with the next confirmation number
+MAX_RETRIES = 3
+# Multiplies the acknowledgement timeout after every retry
+RETRY_BACKOFF = 2.0
+# Acknowledgement latencies kept for the percentiles
+LATENCY_HISTORY = 1000
+
+
+class CommandAckReport:
+    """
+    Delivery of the tracked commands.
+    """
+
+    def __init__(
+        self,
+        counts: "tuple[int, int, int, int, int]",
+        latency_percentiles: "dict[int, float]",
+    ) -> None:
+        """
+        counts: Number of commands tracked, acknowledged, rejected, retried and given up on.
+        latency_percentiles: Time in seconds from the first send to the acknowledgement,
+            by percentile, empty if nothing was acknowledged.
+        """
+        (
+            self.tracked_count,
+            self.acknowledged_count,
+            self.rejected_count,
+            self.retried_count,
+            self.failed_count,
+        ) = counts
+        self.latency_percentiles = latency_percentiles
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        latencies = ", ".join(
+            f"p{percentile}: {latency * 1000:.1f} ms"
+            for percentile, latency in self.latency_percentiles.items()
+        )
+        return (
+            f"{self.__class__}, tracked: {self.tracked_count}, "
+            f"acknowledged: {self.acknowledged_count}, rejected: {self.rejected_count}, "
+            f"retries: {self.retried_count}, given up: {self.failed_count}, "
+            f"ack latency: {latencies if latencies else 'none'}"
+        )
+
+
+class _InFlightCommand:
+    """
+    Parameters and send attempts of a command waiting for its acknowledgement.
+    """
+
+    def __init__(self, params: "tuple[float, ...]", now: float, timeout: float) -> None:
+        self.params = params
+        self.confirmation = 0
+        self.first_send_time = now
+        self.deadline = now + timeout
+
+
+class CommandAckTracker:  # pylint: disable=too-many-instance-attributes
+    """
+    Table of the commands waiting for their COMMAND_ACK, one per command id,
+    so different commands are outstanding at the same time.
+
+    A command not acknowledged before its timeout is sent again with the next confirmation
+    number and a longer timeout, until it runs out of retries.
+    Tracking a command again replaces the older parameters still in flight.
+
+    Times are wall clock, like the receive time pymavlink stamps on messages.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        ack_timeout: float,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = RETRY_BACKOFF,
+        history: int = LATENCY_HISTORY,
+    ) -> "tuple[bool, CommandAckTracker | None]":
+        """
+        ack_timeout: Time in seconds to wait for the first acknowledgement.
+        max_retries: Retries before giving up, at most 255.
+        backoff: Multiplies the timeout after every retry, at least 1.
+        history: Latencies kept for the percentiles.
+
+        Returns whether the tracker was created and the tracker.
+        """
+        if ack_timeout <= 0.0 or not 0 <= max_retries <= 255 or backoff < 1.0 or history < 1:
+            return False, None
+
+        return True, CommandAckTracker(cls.__create_key, ack_timeout, max_retries, backoff, history)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        ack_timeout: float,
+        max_retries: int,
+        backoff: float,
+        history: int,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is CommandAckTracker.__create_key, "Use create() method"
+
+        self.__ack_timeout = ack_timeout
+        self.__max_retries = max_retries
+        self.__backoff = backoff
+
+        # In flight commands by command id
+        self.__in_flight: "dict[int, _InFlightCommand]" = {}
+        self.__latencies: "collections.deque[float]" = collections.deque(maxlen=history)
+        self.__tracked_count = 0
+        self.__acknowledged_count = 0
+        self.__rejected_count = 0
+        self.__retried_count = 0
+        self.__failed_count = 0
+
+    def track(self, command: int, params: "tuple[float, ...]") -> None:
+        """
+        Starts waiting for the acknowledgement of a command just sent with confirmation 0.
+
+        command: MAV_CMD of the command.
+        params: The 7 parameters of the command.
+        """
+        self.__in_flight[command] = _InFlightCommand(params, time.time(), self.__ack_timeout)
+        self.__tracked_count += 1
+
+    def get_in_flight(self, command: int) -> "tuple[float, ...] | None":
+        """
+        Returns the parameters of the command waiting for its acknowledgement, None if none is.
+        """
+        in_flight = self.__in_flight.get(command)
+        if in_flight is None:
+            return None
+
+        return in_flight.params
+
+    def acknowledge(self, command: int, result: int, receive_time: "float | None" = None) -> bool:
+        """
+        Stops tracking the command.
+
+        command: Command field of the COMMAND_ACK.
+        result: MAV_RESULT of the COMMAND_ACK.
+        receive_time: Time the COMMAND_ACK was received, None for now.
+
+        Returns whether the command was in flight.
+        """
+        in_flight = self.__in_flight.pop(command, None)
+        if in_flight is None:
+            return False
+
+        if receive_time is None:
+            receive_time = time.time()
+
+        self.__latencies.append(max(receive_time - in_flight.first_send_time, 0.0))
+        if result in (mavutil.mavlink.MAV_RESULT_ACCEPTED, mavutil.mavlink.MAV_RESULT_IN_PROGRESS):
+            self.__acknowledged_count += 1
+        else:
+            self.__rejected_count += 1
+
+        return True
+
+    def get_due_retries(self) -> "list[tuple[int, tuple[float, ...], int]]":
+        """
+        Gives up on the commands out of retries, and schedules the next retry of the others.
+
+        Returns the command, parameters and confirmation number of each command to send again.
+        """
+        now = time.time()
+        retries = []
+        for command, in_flight in list(self.__in_flight.items()):
+            if now < in_flight.deadline:
+                continue
+
+            if in_flight.confirmation >= self.__max_retries:
+                del self.__in_flight[command]
+                self.__failed_count += 1
+                continue
+
+            in_flight.confirmation += 1
+            in_flight.deadline = now + self.__ack_timeout * self.__backoff**in_flight.confirmation
+            self.__retried_count += 1
+            retries.append((command, in_flight.params, in_flight.confirmation))
+
+        return retries
+
+    def get_retry_delay(self) -> "float | None":
+        """
+        Returns the time in seconds until the next timeout, or None if nothing is in flight.
+        """
+        if len(self.__in_flight) == 0:
+            return None
+
+        deadline = min(in_flight.deadline for in_flight in self.__in_flight.values())
+        return max(deadline - time.time(), 0.0)
+
+    def get_report(self, percentiles: "tuple[int, ...]" = (50, 90, 99)) -> CommandAckReport:
+        """
+        percentiles: Percentiles of the acknowledgement latency to report.
+
+        Returns the counts and latency percentiles.
+        """
+        latencies = sorted(self.__latencies)
+        latency_percentiles = {}
+        if len(latencies) > 0:
+            for percentile in percentiles:
+                # Nearest rank
+                rank = max(-(-percentile * len(latencies) // 100), 1)
+                latency_percentiles[percentile] = latencies[rank - 1]
+
+        return CommandAckReport(
+            (
+                self.__tracked_count,
+                self.__acknowledged_count,
+                self.__rejected_count,
+                self.__retried_count,
+                self.__failed_count,
+            ),
+            latency_percentiles,
+        )
@@ -0,0 +1,309 @@
+"""
+Rate limiting and coalescing of outbound COMMAND_LONGs.
+"""
+
+import enum
+import math
+import time
+
+from pymavlink import mavutil
+
+from . import command_ack_tracker
+
+
+# Sends per second per command, and sends allowed at once after a quiet period
+COMMAND_RATE = 4.0
+COMMAND_BURST = 1
+# Time in seconds a sent command is assumed to still be in progress on the drone
+IN_FLIGHT_TIMEOUT = 0.4
+# Parameters closer than this are the same, in their own units (meters, degrees),
+# so float rounding in computing them does not defeat dropping repeats
+PARAMS_TOLERANCE = 1e-3
+
+
+class SubmitOutcome(enum.Enum):
+    """
+    What the scheduler did with a submitted command.
+    """
+
+    # Sent now
+    SENT = 0
+    # Waiting for its rate, sent by a later submit() or flush() unless replaced
+    DEFERRED = 1
+    # Dropped, the same command is in flight
+    SUPPRESSED = 2
+
+
+def _is_same_params(first: "tuple[float, ...] | None", second: "tuple[float, ...] | None") -> bool:
+    """
+    Returns whether both parameters are given and equal within the tolerance.
+    """
+    if first is None or second is None or len(first) != len(second):
+        return False
+
+    return all(
+        math.isclose(first_param, second_param, abs_tol=PARAMS_TOLERANCE)
+        for first_param, second_param in zip(first, second)
+    )
+
+
+class _CommandState:
+    """
+    Token bucket, newest unsent parameters, and last sent parameters of one command.
+    """
+
+    def __init__(self, burst: int, now: float) -> None:
+        self.tokens = float(burst)
+        self.refill_time = now
+        self.pending: "tuple[float, ...] | None" = None
+        self.in_flight: "tuple[float, ...] | None" = None
+        self.in_flight_time = 0.0
+
+
+class CommandScheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Sends COMMAND_LONGs at most at a rate per command, each command with its own token bucket.
+
+    A command submitted while its bucket is empty waits, and replaces any earlier waiting
+    command of the same kind, so only the newest parameters are sent.
+    A command with the same parameters as the one just sent, within PARAMS_TOLERANCE,
+    is dropped while that one is in flight, until complete() or the in flight timeout.
+
+    With an acknowledgement tracker, a command is in flight until it is acknowledged or
+    given up on instead, and flush() also sends the retries.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        rate: float = COMMAND_RATE,
+        burst: int = COMMAND_BURST,
+        in_flight_timeout: float = IN_FLIGHT_TIMEOUT,
+        target_system: int = 1,
+        target_component: int = 0,
+        ack_tracker: command_ack_tracker.CommandAckTracker | None = None,
+    ) -> "tuple[bool, CommandScheduler | None]":
+        """
+        connection: Connection to send the commands on.
+        rate: Sends per second allowed per command.
+        burst: Sends allowed at once per command.
+        in_flight_timeout: Time in seconds to drop repeats of a sent command, 0 to never drop them.
+        target_system: System the commands are sent to.
+        target_component: Component the commands are sent to.
+        ack_tracker: Tracks the acknowledgements of the commands sent, None to not track them.
+
+        Returns whether the scheduler was created and the scheduler.
+        """
+        if connection is None:
+            return False, None
+
+        if rate <= 0.0 or burst < 1 or in_flight_timeout < 0.0:
+            return False, None
+
+        return True, CommandScheduler(
+            cls.__create_key,
+            connection,
+            rate,
+            burst,
+            in_flight_timeout,
+            target_system,
+            target_component,
+            ack_tracker,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection: mavutil.mavfile,
+        rate: float,
+        burst: int,
+        in_flight_timeout: float,
+        target_system: int,
+        target_component: int,
+        ack_tracker: command_ack_tracker.CommandAckTracker | None,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is CommandScheduler.__create_key, "Use create() method"
+
+        self.__connection = connection
+        self.__rate = rate
+        self.__burst = burst
+        self.__in_flight_timeout = in_flight_timeout
+        self.__target_system = target_system
+        self.__target_component = target_component
+        self.__ack_tracker = ack_tracker
+
+        # States by command
+        self.__states: "dict[int, _CommandState]" = {}
+        self.__sent_count = 0
+        self.__merged_count = 0
+        self.__suppressed_count = 0
+
+    def submit(self, command: int, params: "tuple[float, ...]") -> SubmitOutcome:
+        """
+        Sends the command now if its rate allows, otherwise on a later submit() or flush().
+
+        command: MAV_CMD of the command.
+        params: The 7 parameters of the command.
+
+        Returns whether the command was sent now, is waiting, or was dropped.
+        """
+        now = time.monotonic()
+        state = self.__states.get(command)
+        if state is None:
+            state = _CommandState(self.__burst, now)
+            self.__states[command] = state
+
+        if self.__is_in_flight(command, state, params, now):
+            # The drone is already doing exactly this, anything older waiting is stale
+            self.__suppressed_count += 1
+            state.pending = None
+            return SubmitOutcome.SUPPRESSED
+
+        if state.pending is not None:
+            self.__merged_count += 1
+
+        state.pending = params
+        if self.__send_if_allowed(command, state, now):
+            return SubmitOutcome.SENT
+
+        return SubmitOutcome.DEFERRED
+
+    def flush(self) -> "list[tuple[int, tuple[float, ...]]]":
+        """
+        Sends every retry due, then every waiting command whose rate allows.
+
+        Returns the command and parameters of each command sent, in the order sent.
+        """
+        now = time.monotonic()
+        sent = []
+        if self.__ack_tracker is not None:
+            # Retries are bounded by the backoff, not the rate
+            for command, params, confirmation in self.__ack_tracker.get_due_retries():
+                self.__send(command, params, confirmation)
+                sent.append((command, params))
+
+        for command, state in self.__states.items():
+            params = state.pending
+            if params is not None and self.__send_if_allowed(command, state, now):
+                sent.append((command, params))
+
+        return sent
+
+    def complete(self, command: int) -> None:
+        """
+        Stops dropping repeats of the command, when there is no acknowledgement tracker.
+
+        command: MAV_CMD of the command.
+        """
+        state = self.__states.get(command)
+        if state is not None:
+            state.in_flight = None
+
+    def acknowledge(self, message: object) -> bool:
+        """
+        Matches a COMMAND_ACK to the command in flight.
+
+        message: COMMAND_ACK received.
+
+        Returns whether the command was in flight, always False without a tracker.
+        """
+        if self.__ack_tracker is None:
+            return False
+
+        return self.__ack_tracker.acknowledge(
+            message.command,  # type: ignore
+            message.result,  # type: ignore
+            getattr(message, "_timestamp", None),
+        )
+
+    def get_ack_report(self) -> command_ack_tracker.CommandAckReport | None:
+        """
+        Returns the delivery of the commands sent, or None without a tracker.
+        """
+        if self.__ack_tracker is None:
+            return None
+
+        return self.__ack_tracker.get_report()
+
+    def get_flush_delay(self) -> "float | None":
+        """
+        Returns the time in seconds until the next waiting command can be sent or retried,
+        or None if no command is waiting or in flight.
+        """
+        now = time.monotonic()
+        delay = None
+        if self.__ack_tracker is not None:
+            delay = self.__ack_tracker.get_retry_delay()
+
+        for state in self.__states.values():
+            if state.pending is None:
+                continue
+
+            tokens = state.tokens + (now - state.refill_time) * self.__rate
+            command_delay = max((1.0 - tokens) / self.__rate, 0.0)
+            if delay is None or command_delay < delay:
+                delay = command_delay
+
+        return delay
+
+    def get_counts(self) -> "tuple[int, int, int]":
+        """
+        Returns the number of commands sent including retries, of commands replaced by newer parameters
+        before being sent, and of repeats dropped while in flight.
+        """
+        return self.__sent_count, self.__merged_count, self.__suppressed_count
+
+    def __send_if_allowed(self, command: int, state: _CommandState, now: float) -> bool:
+        """
+        Sends the waiting parameters of the command if its bucket has a token.
+
+        Returns whether the command was sent.
+        """
+        state.tokens = min(
+            float(self.__burst), state.tokens + (now - state.refill_time) * self.__rate
+        )
+        state.refill_time = now
+        if state.tokens < 1.0:
+            return False
+
+        params = state.pending
+        assert params is not None
+
+        state.tokens -= 1.0
+        state.pending = None
+        state.in_flight = params
+        state.in_flight_time = now
+        self.__send(command, params, 0)
+        if self.__ack_tracker is not None:
+            self.__ack_tracker.track(command, params)
+
+        return True
+
+    def __send(self, command: int, params: "tuple[float, ...]", confirmation: int) -> None:
+        """
+        Sends the COMMAND_LONG.
+        """
+        self.__sent_count += 1
+        self.__connection.mav.command_long_send(
+            self.__target_system, self.__target_component, command, confirmation, *params
+        )
+
+    def __is_in_flight(
+        self, command: int, state: _CommandState, params: "tuple[float, ...]", now: float
+    ) -> bool:
+        """
+        Returns whether the command is in flight with the same parameters.
+        """
+        if self.__ack_tracker is not None:
+            return _is_same_params(self.__ack_tracker.get_in_flight(command), params)
+
+        return (
+            _is_same_params(state.in_flight, params)
+            and now - state.in_flight_time < self.__in_flight_timeout
+        )
@@ -19,6 +19,7 @@ from ..common.modules.logger import logger
 def command_worker(
     connection: mavutil.mavfile,
     target: command.Position,
+    ack_timeout: float | None,
     queue_input: queue_proxy_wrapper.QueueProxyWrapper,
     queue_output: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
@@ -29,6 +30,7 @@ def command_worker(
 
     :param connection: mavlink communication object
     :param target: position object as 3d vector
+    :param ack_timeout: seconds to wait for a COMMAND_ACK before retrying, None to not wait
     :param queue_input: input queue to recieve data
     :param queue_output: output queue to send data
     :param controller: controller object
@@ -54,19 +56,41 @@ def command_worker(
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
     # Instantiate class object (command.Command)
-    success, command_obj = command.Command.create(connection, local_logger)
+    success, command_obj = command.Command.create(connection, local_logger, ack_timeout)
     if not success:
         local_logger.error("Could not create command object")
     assert command_obj is not None
     queue_info = None
     while not controller.is_exit_requested():
         controller.check_pause()
-        data = queue_input.queue.get()
-        if data is None:
-            continue
-        queue_info = command_obj.run(data, target)
-        if queue_info is not None:
-            queue_output.queue.put(queue_info)
+        outputs = []
+        # Wake up to send a rate limited command even if no telemetry arrives
+        flush_delay = command_obj.scheduler.get_flush_delay()
+        for data in queue_input.get_many(queue_input.batch_size, flush_delay):
+            if data is None:
+                continue
+            queue_info = command_obj.run(data, target)
+            if queue_info is not None:
+                outputs.append(queue_info)
+        # Acknowledgements first, so nothing acknowledged is retried
+        while ack_timeout is not None:
+            ack = connection.recv_match(type="COMMAND_ACK", blocking=False)
+            if ack is None:
+                break
+            command_obj.scheduler.acknowledge(ack)
+        # Changes that waited for their rate are reported once sent
+        outputs.extend(command_obj.flush())
+        queue_output.put_many(outputs)
+
+    sent_count, merged_count, suppressed_count = command_obj.scheduler.get_counts()
+    local_logger.info(
+        f"Sent {sent_count} commands, merged {merged_count}, "
+        f"suppressed {suppressed_count} already in flight",
+        True,
+    )
+    ack_report = command_obj.scheduler.get_ack_report()
+    if ack_report is not None:
+        local_logger.info(ack_report, True)
 
     # Main loop: do work.
 
@@ -53,9 +53,14 @@ def heartbeat_receiver_worker(
     if not success:
         local_logger.error("Couldn't create heartbeat reciever")
         return
+    # Routed connections know when the router lost the link and is reconnecting,
+    # which only becomes Disconnected once the usual number of heartbeats are missed
+    is_link_up = getattr(connection, "is_link_up", None)
     while not controller.is_exit_requested():
         controller.check_pause()
         status = recieve.run(timeout + 1e-2)
+        if status == "Connected" and is_link_up is not None and not is_link_up():
+            status = "Reconnecting"
         queue.queue.put(status)
 
 
@@ -0,0 +1,261 @@
+"""
+Keeping the MAVLink connection of the router up.
+"""
+
+import random
+import socket
+import threading
+import time
+
+from pymavlink import mavutil
+
+from . import mavlink_router
+
+
+# Delay before the second attempt to reconnect, doubled after every failed attempt
+RECONNECT_INITIAL_DELAY = 0.05  # seconds
+RECONNECT_MAX_DELAY = 1.0  # seconds
+# Fraction of each delay removed at random, so reconnecting clients do not synchronize
+RECONNECT_JITTER = 0.5
+# Time without receiving anything before a link that did not close is considered lost,
+# longer than the period of the drone heartbeat
+LINK_TIMEOUT = 3.0  # seconds
+# Longest wait for the drone to accept a connection, a drone that does not answer
+# would otherwise stall the router until the OS gives up, minutes later
+CONNECT_TIMEOUT = 1.0  # seconds
+
+# Guards the default socket timeout, which is process wide
+_connect_lock = threading.Lock()
+
+
+class MavlinkConnectionManager:  # pylint: disable=too-many-instance-attributes
+    """
+    Opens the connection of the router, detects when it breaks, and reopens it
+    with jittered exponential backoff. The first attempt after a loss is immediate.
+
+    A link is broken when the peer closes or resets it, or when nothing is received
+    for the link timeout. Messages sent while the link is down are dropped, except that
+    the last heartbeat is sent again as soon as the link is back.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        connection_string: str,
+        link_state: "mavlink_router.LinkState",
+        initial_delay: float = RECONNECT_INITIAL_DELAY,
+        max_delay: float = RECONNECT_MAX_DELAY,
+        jitter: float = RECONNECT_JITTER,
+        link_timeout: float = LINK_TIMEOUT,
+        connect_timeout: float = CONNECT_TIMEOUT,
+    ) -> "tuple[bool, MavlinkConnectionManager | None]":
+        """
+        connection_string: Connection to open, as given to mavutil.mavlink_connection().
+        link_state: Shared with the workers, updated on every connection and loss.
+        initial_delay: Time in seconds before the second attempt.
+        max_delay: Longest time in seconds between attempts.
+        jitter: Fraction of each delay removed at random, between 0 and 1.
+        link_timeout: Time in seconds without receiving anything before the link is lost.
+        connect_timeout: Time in seconds waiting for the connection to be accepted.
+
+        Returns whether the manager was created and the manager.
+        """
+        if initial_delay <= 0.0 or max_delay < initial_delay or not 0.0 <= jitter <= 1.0:
+            return False, None
+
+        if link_timeout <= 0.0 or connect_timeout <= 0.0:
+            return False, None
+
+        return True, MavlinkConnectionManager(
+            cls.__create_key,
+            connection_string,
+            link_state,
+            initial_delay,
+            max_delay,
+            jitter,
+            link_timeout,
+            connect_timeout,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection_string: str,
+        link_state: "mavlink_router.LinkState",
+        initial_delay: float,
+        max_delay: float,
+        jitter: float,
+        link_timeout: float,
+        connect_timeout: float,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert (
+            class_private_create_key is MavlinkConnectionManager.__create_key
+        ), "Use create() method"
+
+        self.__connection_string = connection_string
+        self.__link_state = link_state
+        self.__initial_delay = initial_delay
+        self.__max_delay = max_delay
+        self.__jitter = jitter
+        self.__link_timeout = link_timeout
+        self.__connect_timeout = connect_timeout
+
+        # Guards the connection, which the sender thread uses while the reader replaces it
+        self.__lock = threading.Lock()
+        self.__connection: "mavutil.mavfile | None" = None
+        self.__last_heartbeat: "object | None" = None
+        self.__failed_attempts = 0
+        self.__next_attempt_time = 0.0
+        self.__last_receive_time = 0.0
+        self.__dropped_count = 0
+
+    def get_connection(self) -> "mavutil.mavfile | None":
+        """
+        Returns the open connection, or None while the link is down.
+        """
+        return self.__connection
+
+    def connect(self) -> bool:
+        """
+        Attempts to open the connection if it is down and the backoff allows.
+
+        Returns whether the connection is open.
+        """
+        if self.__connection is not None:
+            return True
+
+        if time.monotonic() < self.__next_attempt_time:
+            return False
+
+        try:
+            connection = self.__open()
+        # Including timing out
+        except OSError:
+            # From the end of the attempt, which can take up to the connect timeout
+            now = time.monotonic()
+            delay = min(self.__initial_delay * 2**self.__failed_attempts, self.__max_delay) * (
+                1.0 - self.__jitter * random.random()
+            )
+            self.__failed_attempts += 1
+            self.__next_attempt_time = now + delay
+            return False
+
+        with self.__lock:
+            self.__connection = connection
+            self.__failed_attempts = 0
+            self.__last_receive_time = time.monotonic()
+            # Let the drone know right away that the ground station is back
+            if self.__last_heartbeat is not None:
+                self.__send_locked(self.__last_heartbeat)
+
+        self.__link_state.set_up()
+        return True
+
+    def __open(self) -> "mavutil.mavfile":
+        """
+        Opens the connection in a single attempt, waiting at most the connect timeout.
+        pymavlink connects without a timeout, so new sockets default to it meanwhile.
+        pymavlink makes the socket non blocking once connected, which replaces the timeout.
+
+        Returns the connection.
+        """
+        with _connect_lock:
+            default_timeout = socket.getdefaulttimeout()
+            socket.setdefaulttimeout(self.__connect_timeout)
+            try:
+                # A single attempt, the backoff is done here
+                return mavutil.mavlink_connection(self.__connection_string, retries=0)
+            finally:
+                socket.setdefaulttimeout(default_timeout)
+
+    def disconnect(self) -> None:
+        """
+        Closes the broken connection, the next connect() attempts to reopen it right away.
+        """
+        with self.__lock:
+            connection = self.__connection
+            self.__connection = None
+
+        if connection is None:
+            return
+
+        self.__link_state.set_down()
+        self.__next_attempt_time = 0.0
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+    def get_retry_delay(self) -> float:
+        """
+        Returns the time in seconds until connect() attempts to reopen the connection.
+        """
+        return max(self.__next_attempt_time - time.monotonic(), 0.0)
+
+    def mark_received(self) -> None:
+        """
+        Records that the link is alive, call whenever something is received.
+        """
+        self.__last_receive_time = time.monotonic()
+
+    def is_silent(self) -> bool:
+        """
+        Returns whether nothing was received for the link timeout.
+        """
+        return time.monotonic() - self.__last_receive_time > self.__link_timeout
+
+    def send(self, message: object) -> bool:
+        """
+        Sends the message if the link is up.
+
+        message: MAVLink message to pack and send.
+
+        Returns whether the message was sent.
+        """
+        with self.__lock:
+            if message.get_type() == "HEARTBEAT":  # type: ignore
+                self.__last_heartbeat = message
+
+            if self.__connection is None:
+                self.__dropped_count += 1
+                return False
+
+            return self.__send_locked(message)
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of messages dropped because the link was down.
+        """
+        return self.__dropped_count
+
+    def close(self) -> None:
+        """
+        Closes the connection without reporting a lost link.
+        """
+        with self.__lock:
+            connection = self.__connection
+            self.__connection = None
+
+        if connection is not None:
+            connection.close()
+
+    def __send_locked(self, message: object) -> bool:
+        """
+        Sends on the open connection, the lock must be held.
+
+        Returns whether the message was sent.
+        """
+        assert self.__connection is not None
+
+        try:
+            self.__connection.mav.send(message)
+        except OSError:
+            self.__dropped_count += 1
+            return False
+
+        return True
@@ -0,0 +1,201 @@
+"""
+Dispatching MAVLink messages to handlers by message id.
+"""
+
+import time
+from typing import Callable
+
+from pymavlink import mavutil
+
+from . import mavlink_recorder
+
+
+# Bytes asked for in one read, more than a connection buffers between polls
+READ_SIZE = 65536
+
+# Start of frame markers
+_MAGIC_V1 = 0xFE
+_MAGIC_V2 = 0xFD
+# Header, then payload, then checksum, then the signature of signed v2 frames
+_HEADER_LENGTH_V1 = 6
+_HEADER_LENGTH_V2 = 10
+_CHECKSUM_LENGTH = 2
+_SIGNATURE_LENGTH = 13
+_INCOMPAT_FLAG_SIGNED = 0x01
+
+
+class MavlinkDispatcher:  # pylint: disable=too-many-instance-attributes
+    """
+    Reads everything available on a connection at once, splits it into frames,
+    and decodes only the frames with a registered handler.
+
+    The message id is read from the frame header, so frames of unregistered ids are skipped
+    without decoding or checking their checksum. Registered frames are decoded by pymavlink,
+    and a frame failing its checksum is dropped one byte at a time until the next frame.
+
+    Unlike recv_msg(), the connection does not keep the last message of each type.
+    A recorder gets every frame, skipped or decoded.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        read_size: int = READ_SIZE,
+        recorder: mavlink_recorder.TlogRecorder | None = None,
+    ) -> "tuple[bool, MavlinkDispatcher | None]":
+        """
+        connection: Connection to read, only read through the dispatcher afterwards.
+        read_size: Most bytes read at once.
+        recorder: Records every frame, None to not record.
+
+        Returns whether the dispatcher was created and the dispatcher.
+        """
+        if read_size <= 0:
+            return False, None
+
+        return True, MavlinkDispatcher(cls.__create_key, connection, read_size, recorder)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection: mavutil.mavfile,
+        read_size: int,
+        recorder: mavlink_recorder.TlogRecorder | None,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkDispatcher.__create_key, "Use create() method"
+
+        self.__connection = connection
+        self.__read_size = read_size
+        self.__recorder = recorder
+        # Handlers by message id
+        self.__handlers: "dict[int, Callable[[object], None]]" = {}
+        # Bytes of a frame not yet fully received
+        self.__buffer = bytearray()
+        self.__dispatched_count = 0
+        self.__skipped_count = 0
+        self.__error_count = 0
+
+    def register(self, message_type: str, handler: "Callable[[object], None]") -> bool:
+        """
+        Calls the handler with every message of the type, replacing its previous handler.
+
+        message_type: Type of the messages, for example "HEARTBEAT".
+        handler: Called with the decoded message.
+
+        Returns whether the type exists in the dialect.
+        """
+        message_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{message_type}", None)
+        if message_id is None:
+            return False
+
+        self.__handlers[message_id] = handler
+        return True
+
+    def dispatch(self) -> int:
+        """
+        Reads once without blocking, then calls the handlers of every complete frame,
+        in order. Wait for the connection with select() first.
+
+        Returns the number of bytes read.
+        """
+        data = self.__connection.recv(self.__read_size)
+        if len(data) > 0:
+            if self.__connection.logfile_raw:
+                self.__connection.logfile_raw.write(data)
+            if self.__connection.first_byte:
+                self.__connection.auto_mavlink_version(data)
+
+            self.__buffer += data
+
+        self.__parse()
+        return len(data)
+
+    def get_counts(self) -> "tuple[int, int, int]":
+        """
+        Returns the number of messages dispatched, of frames skipped because no handler
+        is registered, and of frames dropped because they failed to decode.
+        """
+        return self.__dispatched_count, self.__skipped_count, self.__error_count
+
+    def __parse(self) -> None:
+        """
+        Dispatches the complete frames in the buffer, keeping the incomplete one at the end.
+        """
+        buffer = self.__buffer
+        handlers = self.__handlers
+        recorder = self.__recorder
+        receive_time = time.time()
+        end = len(buffer)
+        start = 0
+        while start < end:
+            magic = buffer[start]
+            if magic not in (_MAGIC_V1, _MAGIC_V2):
+                # Noise or a dropped frame, skip to the next marker
+                start = self.__find_magic(start + 1)
+                continue
+
+            if magic == _MAGIC_V1:
+                if end - start < _HEADER_LENGTH_V1:
+                    break
+
+                message_id = buffer[start + 5]
+                frame_length = _HEADER_LENGTH_V1 + buffer[start + 1] + _CHECKSUM_LENGTH
+            else:
+                if end - start < _HEADER_LENGTH_V2:
+                    break
+
+                message_id = (
+                    buffer[start + 7] | (buffer[start + 8] << 8) | (buffer[start + 9] << 16)
+                )
+                frame_length = _HEADER_LENGTH_V2 + buffer[start + 1] + _CHECKSUM_LENGTH
+                if buffer[start + 2] & _INCOMPAT_FLAG_SIGNED:
+                    frame_length += _SIGNATURE_LENGTH
+
+            if end - start < frame_length:
+                break
+
+            handler = handlers.get(message_id)
+            if handler is None:
+                if recorder is not None:
+                    recorder.record(buffer[start : start + frame_length], receive_time)
+                self.__skipped_count += 1
+                start += frame_length
+                continue
+
+            try:
+                message = self.__connection.mav.decode(buffer[start : start + frame_length])
+            except mavutil.mavlink.MAVError:
+                # Not a frame after all, resynchronize from the next byte
+                self.__error_count += 1
+                start = self.__find_magic(start + 1)
+                continue
+
+            if recorder is not None:
+                recorder.record(buffer[start : start + frame_length], receive_time)
+
+            # Receive time, like recv_msg() stamps it
+            message._timestamp = receive_time  # pylint: disable=protected-access
+            self.__dispatched_count += 1
+            handler(message)
+            start += frame_length
+
+        del buffer[:start]
+
+    def __find_magic(self, start: int) -> int:
+        """
+        Returns the index of the next start of frame marker from start,
+        or the end of the buffer if there is none.
+        """
+        end = len(self.__buffer)
+        for magic in (_MAGIC_V1, _MAGIC_V2):
+            index = self.__buffer.find(magic, start, end)
+            if index != -1:
+                end = index
+
+        return end
@@ -0,0 +1,76 @@
+"""
+Recording the MAVLink stream of the router to a tlog file.
+"""
+
+import pathlib
+import struct
+from typing import BinaryIO
+
+
+# Timestamp before every frame, microseconds since the epoch, big endian like pymavlink writes it
+_TIMESTAMP_FORMAT = ">Q"
+
+
+class TlogRecorder:
+    """
+    Writes every frame the router receives, each after its receive time, in the tlog format
+    mavutil.mavlink_connection() and MavlinkReplay read.
+
+    Frames are written as received, including the types nobody subscribed to,
+    so a recording replays the whole stream.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(cls, path: pathlib.Path) -> "tuple[bool, TlogRecorder | None]":
+        """
+        path: File to write, created with its directories, or replaced.
+
+        Returns whether the file was opened and the recorder.
+        """
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # pylint: disable-next=consider-using-with
+            file = open(path, "wb")
+        except OSError:
+            return False, None
+
+        return True, TlogRecorder(cls.__create_key, path, file)
+
+    def __init__(
+        self, class_private_create_key: object, path: pathlib.Path, file: BinaryIO
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is TlogRecorder.__create_key, "Use create() method"
+
+        self.path = path
+        self.__file = file
+        self.__pack_timestamp = struct.Struct(_TIMESTAMP_FORMAT).pack
+        self.__recorded_count = 0
+
+    def record(self, frame: "bytes | bytearray | memoryview", receive_time: float) -> None:
+        """
+        Appends the frame.
+
+        frame: Whole MAVLink frame, from the start marker to the checksum or signature.
+        receive_time: Time the frame was received, from time.time().
+        """
+        # The low 2 bits are the link number in tlogs
+        self.__file.write(self.__pack_timestamp(int(receive_time * 1.0e6) & ~3))
+        self.__file.write(frame)
+        self.__recorded_count += 1
+
+    def get_recorded_count(self) -> int:
+        """
+        Returns the number of frames recorded.
+        """
+        return self.__recorded_count
+
+    def close(self) -> None:
+        """
+        Writes what is buffered and closes the file.
+        """
+        self.__file.close()
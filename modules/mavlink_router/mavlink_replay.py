@@ -0,0 +1,225 @@
+"""
+Replaying a recorded tlog as a MAVLink connection.
+"""
+
+import mmap
+import pathlib
+import struct
+import time
+
+from pymavlink import mavutil
+
+
+_TIMESTAMP_FORMAT = ">Q"
+_TIMESTAMP_LENGTH = 8
+# Start of frame markers
+_MAGIC_V1 = 0xFE
+_MAGIC_V2 = 0xFD
+# Header, then payload, then checksum, then the signature of signed v2 frames
+_HEADER_LENGTH_V1 = 6
+_HEADER_LENGTH_V2 = 10
+_CHECKSUM_LENGTH = 2
+_SIGNATURE_LENGTH = 13
+_INCOMPAT_FLAG_SIGNED = 0x01
+
+
+def _frame_length(recording: mmap.mmap, start: int) -> "int | None":
+    """
+    Returns the length of the frame starting at start, or None if there is no whole frame.
+    """
+    available = len(recording) - start
+    if available < 1:
+        return None
+
+    magic = recording[start]
+    if magic == _MAGIC_V1:
+        if available < _HEADER_LENGTH_V1:
+            return None
+
+        length = _HEADER_LENGTH_V1 + recording[start + 1] + _CHECKSUM_LENGTH
+    elif magic == _MAGIC_V2:
+        if available < _HEADER_LENGTH_V2:
+            return None
+
+        length = _HEADER_LENGTH_V2 + recording[start + 1] + _CHECKSUM_LENGTH
+        if recording[start + 2] & _INCOMPAT_FLAG_SIGNED:
+            length += _SIGNATURE_LENGTH
+    else:
+        return None
+
+    if available < length:
+        return None
+
+    return length
+
+
+class MavlinkReplay(mavutil.mavfile):  # pylint: disable=too-many-instance-attributes
+    """
+    Connection that receives the messages of a tlog, such as one written by TlogRecorder,
+    at the pace they were recorded, a multiple of it, or as fast as they are read.
+    The file is read through a memory map.
+
+    Use it anywhere a mavutil.mavfile is expected, for example Telemetry.create().
+    Messages are stamped with their recorded time. Sent messages are counted and discarded.
+    The replay stops at the end of the file or at the first record that is not a frame,
+    after which receiving times out like on a silent link.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls, path: pathlib.Path, speed: "float | None" = 1.0
+    ) -> "tuple[bool, MavlinkReplay | None]":
+        """
+        path: Recorded tlog.
+        speed: Multiple of the recorded pace, None to replay as fast as possible.
+
+        Returns whether the file was opened and the connection.
+        """
+        if speed is not None and speed <= 0.0:
+            return False, None
+
+        try:
+            with open(path, "rb") as file:
+                recording = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Empty files cannot be mapped
+        except (OSError, ValueError):
+            return False, None
+
+        return True, MavlinkReplay(cls.__create_key, path, recording, speed)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        path: pathlib.Path,
+        recording: mmap.mmap,
+        speed: "float | None",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkReplay.__create_key, "Use create() method"
+
+        self.__recording = recording
+        self.__speed = speed
+        self.__unpack_timestamp = struct.Struct(_TIMESTAMP_FORMAT).unpack_from
+        self.__position = 0
+        # Recorded time and frame bounds of the next record, once read
+        self.__next_record: "tuple[float, int, int] | None" = None
+        # Times the replay started at, wall clock and recorded
+        self.__start_time: "float | None" = None
+        self.__first_timestamp = 0.0
+        self.__replayed_count = 0
+        self.__sent_count = 0
+
+        # No file descriptor, the replay is paced by select()
+        super().__init__(None, str(path))
+
+    def recv_msg(self) -> "object | None":
+        """
+        Returns the next message if it is due, otherwise None.
+        """
+        while True:
+            record = self.__peek()
+            if record is None:
+                return None
+
+            timestamp, start, end = record
+            if self.__get_wait_time(timestamp) > 0.0:
+                return None
+
+            self.__next_record = None
+            self.__position = end
+            try:
+                message = self.mav.decode(bytearray(self.__recording[start:end]))
+            # Recorded unchecked, a frame nobody subscribed to can be corrupt
+            except mavutil.mavlink.MAVError:
+                continue
+
+            self._timestamp = timestamp
+            self.post_message(message)
+            self.__replayed_count += 1
+            return message
+
+    def select(self, timeout: float) -> bool:
+        """
+        Waits up to timeout seconds for the next message to be due.
+
+        Returns whether a message is due.
+        """
+        record = self.__peek()
+        if record is None:
+            time.sleep(timeout)
+            return False
+
+        wait_time = self.__get_wait_time(record[0])
+        if wait_time > timeout:
+            time.sleep(timeout)
+            return False
+
+        if wait_time > 0.0:
+            time.sleep(wait_time)
+
+        return True
+
+    def recv(self, n: "int | None" = None) -> bytes:  # pylint: disable=unused-argument
+        """
+        Messages are only received through recv_msg().
+        """
+        return b""
+
+    def write(self, buf: bytes) -> None:
+        """
+        Counts and discards a sent message.
+        """
+        self.__sent_count += 1
+
+    def is_finished(self) -> bool:
+        """
+        Returns whether every message was replayed.
+        """
+        return self.__peek() is None
+
+    def get_counts(self) -> "tuple[int, int]":
+        """
+        Returns the number of messages replayed, and of messages sent.
+        """
+        return self.__replayed_count, self.__sent_count
+
+    def close(self) -> None:
+        """
+        Unmaps the file.
+        """
+        self.__recording.close()
+
+    def __peek(self) -> "tuple[float, int, int] | None":
+        """
+        Returns the recorded time and frame bounds of the next record,
+        or None at the end of the replay.
+        """
+        if self.__next_record is None:
+            start = self.__position + _TIMESTAMP_LENGTH
+            length = _frame_length(self.__recording, start)
+            if length is None:
+                return None
+
+            (timestamp_us,) = self.__unpack_timestamp(self.__recording, self.__position)
+            self.__next_record = (timestamp_us * 1.0e-6, start, start + length)
+
+        return self.__next_record
+
+    def __get_wait_time(self, timestamp: float) -> float:
+        """
+        Returns the time in seconds until the message recorded at the timestamp is due.
+        """
+        if self.__speed is None:
+            return 0.0
+
+        now = time.monotonic()
+        if self.__start_time is None:
+            self.__start_time = now
+            self.__first_timestamp = timestamp
+
+        due_time = self.__start_time + (timestamp - self.__first_timestamp) / self.__speed
+        return due_time - now
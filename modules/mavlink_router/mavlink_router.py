@@ -0,0 +1,332 @@
+"""
+Routing MAVLink messages between one connection and many workers.
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import pathlib
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+
+
+# Messages kept for a subscriber that falls behind, older ones are dropped
+INBOUND_QUEUE_MAX_SIZE = 16
+# Messages kept waiting to be sent while the router is busy, older ones are dropped
+OUTBOUND_QUEUE_MAX_SIZE = 64
+
+
+class LinkState:
+    """
+    Whether the router is connected, shared with the workers so they learn about outages
+    without being restarted. Share it through worker arguments.
+    """
+
+    def __init__(self) -> None:
+        self.__up = mp.Event()
+        # Incremented on every connection, so a new number means the link was lost in between
+        self.__generation = mp.Value("i", 0)
+
+    def set_up(self) -> int:
+        """
+        Marks the link connected.
+
+        Returns the generation of the new connection.
+        """
+        with self.__generation.get_lock():
+            self.__generation.value += 1
+            generation = self.__generation.value
+
+        self.__up.set()
+        return generation
+
+    def set_down(self) -> None:
+        """
+        Marks the link lost.
+        """
+        self.__up.clear()
+
+    def is_up(self) -> bool:
+        """
+        Returns whether the link is connected.
+        """
+        return self.__up.is_set()
+
+    def wait_up(self, timeout: "float | None" = None) -> bool:
+        """
+        Waits until the link is connected.
+
+        timeout: Time waiting in seconds, None waits forever.
+
+        Returns whether the link is connected.
+        """
+        return self.__up.wait(timeout)
+
+    def get_generation(self) -> int:
+        """
+        Returns the number of connections so far, 0 before the first.
+        """
+        return self.__generation.value
+
+
+class _RoutedMAVLink(mavutil.mavlink.MAVLink):
+    """
+    MAVLink encoder whose messages are sent by the router instead of written to a file.
+    All the *_send() methods go through send().
+    """
+
+    def __init__(self, outbound_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        outbound_queue: Queue the router sends from.
+        """
+        super().__init__(None)
+        self.__outbound_queue = outbound_queue
+
+    def send(
+        self, mavmsg: object, force_mavlink1: bool = False  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Posts the message to the router, which packs it with its own sequence number
+        and MAVLink version.
+        """
+        self.__outbound_queue.queue.put(mavmsg)
+        self.total_packets_sent += 1
+
+
+class RoutedConnection:
+    """
+    Stands in for a mavutil.mavfile in a worker, receiving only the messages
+    the router routes to it and sending through the router.
+    """
+
+    def __init__(
+        self,
+        inbound_queue: "queue_proxy_wrapper.QueueProxyWrapper | None",
+        outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        link_state: LinkState,
+    ) -> None:
+        """
+        inbound_queue: Queue the router puts the subscribed messages in, None to only send.
+        outbound_queue: Queue the router sends from.
+        link_state: Whether the router is connected.
+        """
+        self.__inbound_queue = inbound_queue
+        self.__outbound_queue = outbound_queue
+        self.__link_state = link_state
+        # Created in the worker on first use
+        self.__mav: "_RoutedMAVLink | None" = None
+
+    @property
+    def mav(self) -> _RoutedMAVLink:
+        """
+        Encoder with the *_send() methods of mavfile.mav.
+        """
+        if self.__mav is None:
+            self.__mav = _RoutedMAVLink(self.__outbound_queue)
+
+        return self.__mav
+
+    def __getstate__(self) -> dict:
+        """
+        The encoder is not sent to workers, they create their own.
+        """
+        state = self.__dict__.copy()
+        state["_RoutedConnection__mav"] = None
+        return state
+
+    def recv_match(
+        self,
+        condition: "str | None" = None,
+        type: "str | list[str] | None" = None,  # pylint: disable=redefined-builtin
+        blocking: bool = False,
+        timeout: "float | None" = None,
+    ) -> "object | None":
+        """
+        Same arguments as mavfile.recv_match().
+
+        Returns the next routed message of the type, discarding routed messages of other types,
+        or None if there is none before the timeout.
+        """
+        if self.__inbound_queue is None:
+            return None
+
+        if type is not None and not isinstance(type, list):
+            type = [type]
+
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+
+        while True:
+            wait_time = 0.0
+            if blocking:
+                wait_time = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+            messages = self.__inbound_queue.get_many(1, wait_time)
+            if len(messages) == 0:
+                return None
+
+            message = messages[0]
+            # Shutdown sentinel
+            if message is None:
+                continue
+
+            message_type = message.get_type()  # type: ignore
+            if type is not None and message_type not in type:
+                continue
+
+            if not mavutil.evaluate_condition(condition, {message_type: message}):
+                continue
+
+            return message
+
+    def is_link_up(self) -> bool:
+        """
+        Returns whether the router is connected. Messages sent while it is not are dropped.
+        """
+        return self.__link_state.is_up()
+
+    def get_link_generation(self) -> int:
+        """
+        Returns the number of times the router connected, which changes after every outage.
+        """
+        return self.__link_state.get_generation()
+
+    def wait_heartbeat(
+        self, blocking: bool = True, timeout: "float | None" = None
+    ) -> "object | None":
+        """
+        Same arguments as mavfile.wait_heartbeat().
+
+        Returns the next routed heartbeat, or None if there is none before the timeout.
+        """
+        return self.recv_match(type="HEARTBEAT", blocking=blocking, timeout=timeout)
+
+
+class MavlinkRouter:  # pylint: disable=too-many-instance-attributes
+    """
+    Settings and queues of the router worker, which alone owns the connection.
+
+    The router reads the connection once, parses each message once, and puts it in the
+    inbound queue of every subscriber of its type, so no worker consumes messages meant for
+    another. It sends everything posted to its outbound queue from a single thread,
+    with a single sequence number.
+
+    Subscribe before the router and the subscribers are started,
+    and run exactly one router worker.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        connection_string: str,
+        mp_manager: multiprocessing.managers.SyncManager,
+        inbound_max_size: int = INBOUND_QUEUE_MAX_SIZE,
+        outbound_max_size: int = OUTBOUND_QUEUE_MAX_SIZE,
+        tlog_path: pathlib.Path | None = None,
+    ) -> "tuple[bool, MavlinkRouter | None]":
+        """
+        connection_string: Connection the router opens, as given to mavutil.mavlink_connection().
+        mp_manager: Manager to create the queues with.
+        inbound_max_size: Messages kept per subscriber.
+        outbound_max_size: Messages kept waiting to be sent.
+        tlog_path: File to record everything received to, None to not record.
+
+        Returns whether the router was created and the router.
+        """
+        if inbound_max_size <= 0 or outbound_max_size <= 0:
+            return False, None
+
+        return True, MavlinkRouter(
+            cls.__create_key,
+            connection_string,
+            mp_manager,
+            inbound_max_size,
+            outbound_max_size,
+            tlog_path,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection_string: str,
+        mp_manager: multiprocessing.managers.SyncManager,
+        inbound_max_size: int,
+        outbound_max_size: int,
+        tlog_path: pathlib.Path | None,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkRouter.__create_key, "Use create() method"
+
+        self.connection_string = connection_string
+        self.tlog_path = tlog_path
+        self.__mp_manager = mp_manager
+        self.__inbound_max_size = inbound_max_size
+        # Sending must never block a worker
+        self.outbound_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            outbound_max_size,
+            policy=queue_proxy_wrapper.BackpressurePolicy.DROP_OLDEST,
+        )
+        self.link_state = LinkState()
+        # Inbound queues by message type
+        self.routes: "dict[str, list[queue_proxy_wrapper.QueueProxyWrapper]]" = {}
+        self.__inbound_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]" = []
+
+    def __getstate__(self) -> dict:
+        """
+        The manager is only needed to subscribe, in main.
+        """
+        state = self.__dict__.copy()
+        state["_MavlinkRouter__mp_manager"] = None
+        return state
+
+    def subscribe(self, message_types: "list[str]") -> RoutedConnection:
+        """
+        Routes the types of messages to a new subscriber.
+
+        message_types: Types of the messages, for example "HEARTBEAT".
+
+        Returns the connection for the subscriber.
+        """
+        assert self.__mp_manager is not None, "Subscribe in main"
+
+        # The router must never stall on a slow subscriber
+        inbound_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            self.__mp_manager,
+            self.__inbound_max_size,
+            policy=queue_proxy_wrapper.BackpressurePolicy.DROP_OLDEST,
+        )
+        self.__inbound_queues.append(inbound_queue)
+        for message_type in message_types:
+            self.routes.setdefault(message_type, []).append(inbound_queue)
+
+        return RoutedConnection(inbound_queue, self.outbound_queue, self.link_state)
+
+    def create_sender(self) -> RoutedConnection:
+        """
+        Returns a connection for a worker that only sends.
+        """
+        return RoutedConnection(None, self.outbound_queue, self.link_state)
+
+    def get_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the outbound queue, then the inbound queues, in the order shutdown unblocks them.
+        """
+        return [self.outbound_queue] + self.__inbound_queues
+
+    def get_dropped_count(self) -> "tuple[int, int]":
+        """
+        Returns the number of messages dropped because subscribers fell behind,
+        and because the router fell behind sending.
+        """
+        return (
+            sum(inbound_queue.get_dropped_count() for inbound_queue in self.__inbound_queues),
+            self.outbound_queue.get_dropped_count(),
+        )
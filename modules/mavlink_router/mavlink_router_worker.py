@@ -0,0 +1,206 @@
+"""
+Router worker that alone owns the MAVLink connection.
+"""
+
+import os
+import pathlib
+import threading
+import time
+from typing import Callable
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from . import mavlink_connection_manager
+from . import mavlink_dispatcher
+from . import mavlink_recorder
+from . import mavlink_router
+from ..common.modules.logger import logger
+
+
+# Longest wait on the connection or the outbound queue before checking for exit
+ROUTER_POLL_TIMEOUT = 0.1  # seconds
+
+
+def _send_outbound(
+    connection_manager: mavlink_connection_manager.MavlinkConnectionManager,
+    router: mavlink_router.MavlinkRouter,
+    controller: worker_controller.WorkerController,
+    stop_event: threading.Event,
+) -> None:
+    """
+    Sends everything posted by the workers, the only writer of the connection.
+    """
+    outbound_queue = router.outbound_queue
+    while not controller.is_exit_requested() and not stop_event.is_set():
+        for message in outbound_queue.get_many(outbound_queue.batch_size, ROUTER_POLL_TIMEOUT):
+            # Shutdown sentinel
+            if message is None:
+                continue
+
+            # Dropped while the link is down, what the workers send then is stale
+            connection_manager.send(message)
+
+
+def _route_to(
+    inbound_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+) -> "Callable[[object], None]":
+    """
+    Returns a handler that puts the message in every inbound queue.
+    """
+
+    def handler(message: object) -> None:
+        for inbound_queue in inbound_queues:
+            inbound_queue.queue.put(message)
+
+    return handler
+
+
+def _create_dispatcher(
+    connection: mavutil.mavfile,
+    router: mavlink_router.MavlinkRouter,
+    recorder: "mavlink_recorder.TlogRecorder | None",
+    local_logger: logger.Logger,
+) -> mavlink_dispatcher.MavlinkDispatcher:
+    """
+    Returns a dispatcher of the connection routing the subscribed types,
+    the only ones it decodes, and recording everything.
+    """
+    result, dispatcher = mavlink_dispatcher.MavlinkDispatcher.create(connection, recorder=recorder)
+    assert result
+    assert dispatcher is not None
+
+    for message_type, inbound_queues in router.routes.items():
+        if not dispatcher.register(message_type, _route_to(inbound_queues)):
+            local_logger.error(f"Unknown message type {message_type}, not routed", True)
+
+    return dispatcher
+
+
+def _receive(
+    connection: mavutil.mavfile,
+    dispatcher: mavlink_dispatcher.MavlinkDispatcher,
+    connection_manager: mavlink_connection_manager.MavlinkConnectionManager,
+) -> bool:
+    """
+    Waits for the connection, then dispatches everything already received.
+
+    Returns whether the link is still up.
+    """
+    if not connection.select(ROUTER_POLL_TIMEOUT):
+        return not connection_manager.is_silent()
+
+    try:
+        # Readable without data is the peer closing the connection
+        if dispatcher.dispatch() == 0:
+            return False
+
+        # Everything already received, in as few reads as possible
+        while dispatcher.dispatch() > 0:
+            pass
+    except OSError:
+        return False
+
+    connection_manager.mark_received()
+    return True
+
+
+def mavlink_router_worker(
+    router: mavlink_router.MavlinkRouter,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Opens the connection, then routes incoming messages by type to the subscribers,
+    decoding only the subscribed types,
+    and sends outgoing messages from a second thread.
+    Reopens the connection whenever it breaks, without stopping the workers.
+
+    router: Settings and queues of the router.
+    controller: Worker controller.
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    result, connection_manager = mavlink_connection_manager.MavlinkConnectionManager.create(
+        router.connection_string, router.link_state
+    )
+    if not result:
+        local_logger.error("Failed to create connection manager", True)
+        return
+
+    # Get Pylance to stop complaining
+    assert connection_manager is not None
+
+    recorder = None
+    if router.tlog_path is not None:
+        result, recorder = mavlink_recorder.TlogRecorder.create(router.tlog_path)
+        if not result:
+            local_logger.error(f"Failed to open {router.tlog_path}, not recording", True)
+
+    # Stops the sender if routing fails
+    stop_event = threading.Event()
+    sender = threading.Thread(
+        target=_send_outbound,
+        args=(connection_manager, router, controller, stop_event),
+        name="mavlink_router_sender",
+    )
+    sender.start()
+
+    dispatcher = None
+    # Totals over every connection
+    counts = [0, 0, 0]
+    try:
+        while not controller.is_exit_requested():
+            controller.check_pause()
+
+            connection = connection_manager.get_connection()
+            if connection is None:
+                if not connection_manager.connect():
+                    time.sleep(min(connection_manager.get_retry_delay(), ROUTER_POLL_TIMEOUT))
+                    continue
+
+                connection = connection_manager.get_connection()
+                local_logger.info(
+                    f"Connected to {router.connection_string}, "
+                    f"link generation {router.link_state.get_generation()}",
+                    True,
+                )
+                dispatcher = _create_dispatcher(connection, router, recorder, local_logger)
+
+            assert dispatcher is not None
+
+            if not _receive(connection, dispatcher, connection_manager):
+                local_logger.warning(f"Lost {router.connection_string}, reconnecting", True)
+                connection_manager.disconnect()
+                counts = [total + count for total, count in zip(counts, dispatcher.get_counts())]
+                dispatcher = None
+    finally:
+        if dispatcher is not None:
+            counts = [total + count for total, count in zip(counts, dispatcher.get_counts())]
+
+        local_logger.info(
+            f"Dispatched {counts[0]} messages, skipped {counts[1]}, "
+            f"dropped {counts[2]} that failed to decode, "
+            f"dropped {connection_manager.get_dropped_count()} sends while the link was down, "
+            f"link generation {router.link_state.get_generation()}",
+            True,
+        )
+        stop_event.set()
+        sender.join()
+        connection_manager.close()
+        if recorder is not None:
+            local_logger.info(
+                f"Recorded {recorder.get_recorded_count()} messages to {recorder.path}", True
+            )
+            recorder.close()
@@ -5,6 +5,7 @@ Telemetry gathering logic.
 import time
 from pymavlink import mavutil
 
+from utilities.workers import struct_codec
 from ..common.modules.logger import logger
 
 
@@ -13,6 +14,23 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
     Python struct to represent Telemtry Data. Contains the most recent attitude and position reading.
     """
 
+    # Created for every output, fixed fields are smaller and faster to set than a dict
+    __slots__ = (
+        "time_since_boot",
+        "x",
+        "y",
+        "z",
+        "x_velocity",
+        "y_velocity",
+        "z_velocity",
+        "roll",
+        "pitch",
+        "yaw",
+        "roll_speed",
+        "pitch_speed",
+        "yaw_speed",
+    )
+
     def __init__(
         self,
         time_since_boot: int | None = None,  # ms
@@ -61,14 +79,47 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
         }}"""
 
 
+struct_codec.register(
+    TelemetryData,
+    1,
+    [
+        ("time_since_boot", "Q"),
+        ("x", "d"),
+        ("y", "d"),
+        ("z", "d"),
+        ("x_velocity", "d"),
+        ("y_velocity", "d"),
+        ("z_velocity", "d"),
+        ("roll", "d"),
+        ("pitch", "d"),
+        ("yaw", "d"),
+        ("roll_speed", "d"),
+        ("pitch_speed", "d"),
+        ("yaw_speed", "d"),
+    ],
+)
+
+
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
-class Telemetry:
+class Telemetry:  # pylint: disable=too-many-instance-attributes
     """
     Telemetry class to read position and attitude (orientation).
     """
 
+    # Run once per message, fixed fields are faster than a dict and have no per instance dict
+    __slots__ = (
+        "connection",
+        "local_logger",
+        "attitude",
+        "position",
+        "attitude_time",
+        "position_time",
+        "pool",
+        "pool_index",
+    )
+
     __private_key = object()
 
     @classmethod
@@ -76,19 +127,27 @@ class Telemetry:
         cls,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        pool_size: int = 0,
     ) -> "tuple[bool,Telemetry]|tuple[bool,None]":
         """
         Falliable create (instantiation) method to create a Telemetry object.
+
+        pool_size: Number of TelemetryData objects to reuse in turn, 0 to create one per output.
+            Only reuse them if every output is encoded or consumed before pool_size more are
+            produced, for example when put on a mailbox one at a time.
         """
         if connection is None:
             return False, None
-        return True, cls(cls.__private_key, connection, local_logger)
+        if pool_size < 0:
+            return False, None
+        return True, cls(cls.__private_key, connection, local_logger, pool_size)
 
     def __init__(
         self,
         key: object,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        pool_size: int,
     ) -> None:
         """
         Docstring for __init__
@@ -97,28 +156,19 @@ class Telemetry:
         :param key: key from create method
         :param connection: mavlink communication object
         :param local_logger: logger to log info and errors
+        :param pool_size: number of TelemetryData objects to reuse
         """
         assert key is Telemetry.__private_key, "Use create() method"
         self.connection = connection
         self.local_logger = local_logger
         local_logger.info("Initialized")
-        self.attributes = {
-            "time_last_attitude": 0,
-            "time_last_local_position_ned": 0,
-            "x": None,
-            "y": None,
-            "z": None,
-            "vx": None,
-            "vy": None,
-            "vz": None,
-            "pitch": None,
-            "yaw": None,
-            "roll": None,
-            "rollspeed": None,
-            "pitchspeed": None,
-            "yawspeed": None,
-        }
-        self.times = {"attitude": 0, "position": 0}
+        # Most recent messages not yet combined, and the time each was received
+        self.attitude = None
+        self.position = None
+        self.attitude_time = 0.0
+        self.position_time = 0.0
+        self.pool = [TelemetryData() for _ in range(pool_size)]
+        self.pool_index = 0
 
     def run(
         self,
@@ -133,64 +183,68 @@ class Telemetry:
         msg = self.connection.recv_match(
             type=["ATTITUDE", "LOCAL_POSITION_NED"], blocking=True, timeout=1 + 10e-2
         )
-        telemetry_data = "Not Ready"
-        if msg is not None:
-            if msg.get_type() == "ATTITUDE":
-                self.times["attitude"] = time.time()
-                self.attributes["time_last_attitude"] = msg.time_boot_ms
-                self.attributes["roll"] = msg.roll
-                self.attributes["yaw"] = msg.yaw
-                self.attributes["pitch"] = msg.pitch
-                self.attributes["yawspeed"] = msg.yawspeed
-                self.attributes["pitchspeed"] = msg.pitchspeed
-                self.attributes["rollspeed"] = msg.rollspeed
-            else:
-                self.times["position"] = time.time()
-                self.attributes["time_last_local_position_ned"] = msg.time_boot_ms
-                self.attributes["x"] = msg.x
-                self.attributes["y"] = msg.y
-                self.attributes["z"] = msg.z
-                self.attributes["vx"] = msg.vx
-                self.attributes["vy"] = msg.vy
-                self.attributes["vz"] = msg.vz
-            if self.attributes["x"] is not None and self.attributes["roll"] is not None:
-                if (
-                    abs(
-                        self.attributes["time_last_local_position_ned"]
-                        - self.attributes["time_last_attitude"]
-                    )
-                    >= 1000
-                ):
-                    return None
-                if (
-                    time.time() - self.times["attitude"] > 1
-                    or time.time() - self.times["position"] > 1
-                ):
-                    return None
-                telemetry_data = TelemetryData(
-                    max(
-                        self.attributes["time_last_local_position_ned"],
-                        self.attributes["time_last_attitude"],
-                    ),
-                    self.attributes["x"],
-                    self.attributes["y"],
-                    self.attributes["z"],
-                    self.attributes["vx"],
-                    self.attributes["vy"],
-                    self.attributes["vz"],
-                    self.attributes["roll"],
-                    self.attributes["pitch"],
-                    self.attributes["yaw"],
-                    self.attributes["rollspeed"],
-                    self.attributes["pitchspeed"],
-                    self.attributes["yawspeed"],
-                )
-                for index in self.attributes:
-                    self.attributes[index] = None
+        if msg is None:
+            self.attitude = None
+            self.position = None
+            return None
+
+        # The message just received is fresh, only the other one can be stale
+        now = time.time()
+        if msg.get_type() == "ATTITUDE":
+            self.attitude = msg
+            self.attitude_time = now
         else:
-            telemetry_data = None
-            for index in self.attributes:
-                self.attributes[index] = None
+            self.position = msg
+            self.position_time = now
+
+        attitude = self.attitude
+        position = self.position
+        if attitude is None or position is None:
+            return "Not Ready"
+
+        if abs(position.time_boot_ms - attitude.time_boot_ms) >= 1000:
+            return None
+        if now - self.attitude_time > 1 or now - self.position_time > 1:
+            return None
+
+        self.attitude = None
+        self.position = None
+        if not self.pool:
+            return TelemetryData(
+                max(position.time_boot_ms, attitude.time_boot_ms),
+                position.x,
+                position.y,
+                position.z,
+                position.vx,
+                position.vy,
+                position.vz,
+                attitude.roll,
+                attitude.pitch,
+                attitude.yaw,
+                attitude.rollspeed,
+                attitude.pitchspeed,
+                attitude.yawspeed,
+            )
+
+        telemetry_data = self.pool[self.pool_index]
+        self.pool_index = (self.pool_index + 1) % len(self.pool)
+        # Same fields as a new object, without allocating one
+        # pylint: disable-next=unnecessary-dunder-call
+        telemetry_data.__init__(
+            max(position.time_boot_ms, attitude.time_boot_ms),
+            position.x,
+            position.y,
+            position.z,
+            position.vx,
+            position.vy,
+            position.vz,
+            attitude.roll,
+            attitude.pitch,
+            attitude.yaw,
+            attitude.rollspeed,
+            attitude.pitchspeed,
+            attitude.yawspeed,
+        )
         return telemetry_data
         # Read MAVLink message LOCAL_POSITION_NED (32)
         # Read MAVLink message ATTITUDE (30)
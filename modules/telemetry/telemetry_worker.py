@@ -54,14 +54,22 @@ def telemetry_worker(
     if not success:
         local_logger.error("Could not create telemetry object")
     assert telemetry_obj is not None
+    # Sent together once the queue's batch size is reached
+    batch = []
     while not controller.is_exit_requested():
         controller.check_pause()
         data = telemetry_obj.run()
         if data is not None and data != "Not Ready":
-            queue.queue.put(data)
+            batch.append(data)
+            if len(batch) >= queue.batch_size:
+                queue.put_many(batch)
+                batch = []
             local_logger.info("Recieved telemetry data")
         elif data is None:
             local_logger.info("timeout")
+    # Telemetry gathered before exit was requested is still sent,
+    # shutdown drains the queue if this blocks
+    queue.put_many(batch)
     # Main loop: do work.
 
 
@@ -241,6 +241,7 @@ def main() -> int:
     command_worker.command_worker(
         connection,
         TARGET,
+        None,
         output_queue,
         input_queue,
         controller,
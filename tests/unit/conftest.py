@@ -0,0 +1,63 @@
+"""
+Fixtures and fakes shared by the unit tests.
+"""
+
+import multiprocessing as mp
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+
+
+class FakeMav:
+    """
+    Records the commands sent.
+    """
+
+    def __init__(self) -> None:
+        self.sent: "list[tuple]" = []
+
+    def command_long_send(self, *args: object) -> None:
+        """
+        Records the arguments.
+        """
+        self.sent.append(args)
+
+
+class FakeConnection:
+    """
+    Only what sending commands uses of the connection.
+    """
+
+    def __init__(self) -> None:
+        self.mav = FakeMav()
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> "mp.managers.SyncManager":  # type: ignore
+    """
+    Manager shared by all tests in a file.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture()
+def local_logger(request: pytest.FixtureRequest) -> logger.Logger:  # type: ignore
+    """
+    Logger that only logs to the console, named after the test file.
+    """
+    result, test_logger = logger.Logger.create(request.module.__name__.rsplit(".", 1)[-1], False)
+    assert result
+    assert test_logger is not None
+    yield test_logger  # type: ignore
+
+
+@pytest.fixture()
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Fresh controller.
+    """
+    yield worker_controller.WorkerController()  # type: ignore
@@ -0,0 +1,146 @@
+"""
+Test sharing a connection between coroutines.
+"""
+
+import asyncio
+import socket
+
+from pymavlink import mavutil
+
+from utilities.workers import async_connection
+
+
+class FakeConnection:
+    """
+    Only what a stage view uses of the connection.
+    """
+
+    def __init__(self) -> None:
+        self.mav = None
+
+
+def heartbeat() -> "mavutil.mavlink.MAVLink_heartbeat_message":  # type: ignore
+    """
+    Any heartbeat.
+    """
+    return mavutil.mavlink.MAVLink_heartbeat_message(0, 0, 0, 0, 0, 3)
+
+
+def attitude(time_boot_ms: int) -> "mavutil.mavlink.MAVLink_attitude_message":  # type: ignore
+    """
+    Attitude at the time.
+    """
+    return mavutil.mavlink.MAVLink_attitude_message(time_boot_ms, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+class TestStageConnection:
+    """
+    Messages routed to a stage.
+    """
+
+    def test_recv_match_type(self) -> None:
+        """
+        Messages of other types are skipped.
+        """
+        # Setup
+        stage = async_connection.StageConnection(FakeConnection(), ["HEARTBEAT", "ATTITUDE"], 4)
+        stage.deliver(heartbeat())
+        stage.deliver(attitude(1))
+
+        # Run
+        message = stage.recv_match(type="ATTITUDE", blocking=True, timeout=1.0)
+        empty = stage.wait_heartbeat(timeout=1.0)
+
+        # Test
+        assert message.time_boot_ms == 1  # type: ignore
+        assert empty is None
+
+    def test_oldest_dropped(self) -> None:
+        """
+        A stage that falls behind keeps the newest messages.
+        """
+        # Setup
+        stage = async_connection.StageConnection(FakeConnection(), ["ATTITUDE"], 2)
+
+        # Run
+        for time_boot_ms in range(3):
+            stage.deliver(attitude(time_boot_ms))
+
+        first = stage.recv_match()
+        second = stage.recv_match()
+
+        # Test
+        assert first.time_boot_ms == 1  # type: ignore
+        assert second.time_boot_ms == 2  # type: ignore
+        assert stage.get_dropped_count() == 1
+
+    def test_wait_message(self) -> None:
+        """
+        Waiting wakes up on delivery, and times out without it.
+        """
+
+        async def wait() -> "tuple[bool, bool]":
+            stage = async_connection.StageConnection(FakeConnection(), ["HEARTBEAT"], 1)
+            timed_out = await stage.wait_message(0.01)
+            asyncio.get_running_loop().call_later(0.01, stage.deliver, heartbeat())
+            delivered = await stage.wait_message(1.0)
+            return timed_out, delivered
+
+        # Run
+        timed_out, delivered = asyncio.run(wait())
+
+        # Test
+        assert not timed_out
+        assert delivered
+
+
+class TestAsyncConnection:
+    """
+    Reading the shared connection from the event loop.
+    """
+
+    def test_peer_closed(self) -> None:
+        """
+        Reading stops once the peer closes the connection, after routing what it sent.
+        """
+        # Setup
+        with socket.create_server(("127.0.0.1", 0)) as server:
+            port = server.getsockname()[1]
+            connection = mavutil.mavlink_connection(f"tcp:127.0.0.1:{port}")
+            peer, _ = server.accept()
+
+        result, shared_connection = async_connection.AsyncConnection.create(connection)
+        assert result
+        assert shared_connection is not None
+        stage = shared_connection.subscribe(["HEARTBEAT"])
+        receive_count = 0
+        recv_msg = connection.recv_msg
+
+        def count_recv_msg() -> object:
+            nonlocal receive_count
+            receive_count += 1
+            return recv_msg()
+
+        connection.recv_msg = count_recv_msg
+
+        async def close_peer() -> "tuple[bool, bool]":
+            shared_connection.start()
+            peer.sendall(heartbeat().pack(mavutil.mavlink.MAVLink(None)))
+            received = await stage.wait_message(1.0)
+            peer.close()
+            # A descriptor at end of file is always readable, give the loop time to spin
+            await asyncio.sleep(0.1)
+            still_reading = asyncio.get_running_loop().remove_reader(connection.fd)
+            return received, still_reading
+
+        # Run
+        received, still_reading = asyncio.run(close_peer())
+        connection.close()
+
+        # Test
+        assert received
+        assert stage.recv_match(type="HEARTBEAT") is not None
+        assert not still_reading
+        assert not shared_connection.is_link_up()
+        # Nothing on start, the heartbeat then nothing, and end of file
+        assert receive_count <= 4
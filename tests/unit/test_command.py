@@ -0,0 +1,124 @@
+"""
+Test the commands decided from telemetry.
+"""
+
+import time
+
+import pytest
+
+from modules.command import command
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from tests.unit import conftest
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture()
+def connection() -> conftest.FakeConnection:  # type: ignore
+    """
+    Connection recording the commands sent.
+    """
+    yield conftest.FakeConnection()  # type: ignore
+
+
+@pytest.fixture()
+def command_instance(  # type: ignore
+    connection: conftest.FakeConnection, local_logger: logger.Logger
+) -> command.Command:
+    """
+    Command sending on the fake connection.
+    """
+    result, instance = command.Command.create(connection, local_logger)  # type: ignore
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+def at_altitude(z: float) -> telemetry.TelemetryData:
+    """
+    Telemetry of a drone hovering at the origin, facing the target.
+    """
+    return telemetry.TelemetryData(0, 0, 0, z, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+class TestCommand:
+    """
+    Command tests.
+    """
+
+    def test_reports_sent(
+        self, command_instance: command.Command, connection: conftest.FakeConnection
+    ) -> None:
+        """
+        A change that is sent is reported.
+        """
+        # Run
+        status = command_instance.run(at_altitude(20), command.Position(0, 0, 30))
+
+        # Test
+        assert status == "CHANGE ALTITUDE: 10"
+        assert len(connection.mav.sent) == 1
+
+    def test_suppressed_not_reported(
+        self, command_instance: command.Command, connection: conftest.FakeConnection
+    ) -> None:
+        """
+        A repeat of the change in flight is neither sent nor reported.
+        """
+        # Setup
+        target = command.Position(0, 0, 30)
+        command_instance.run(at_altitude(20), target)
+
+        # Run
+        status = command_instance.run(at_altitude(21), target)
+
+        # Test
+        assert status is None
+        assert len(connection.mav.sent) == 1
+        assert command_instance.scheduler.get_counts() == (1, 0, 1)
+
+    def test_deferred_not_reported(
+        self, command_instance: command.Command, connection: conftest.FakeConnection
+    ) -> None:
+        """
+        A change over the rate waits, and is not reported as sent.
+        """
+        # Setup
+        command_instance.run(at_altitude(20), command.Position(0, 0, 30))
+
+        # Run
+        status = command_instance.run(at_altitude(20), command.Position(0, 0, 40))
+
+        # Test
+        assert status is None
+        assert len(connection.mav.sent) == 1
+        assert command_instance.scheduler.get_flush_delay() is not None
+
+    def test_deferred_reported_when_sent(
+        self, command_instance: command.Command, connection: conftest.FakeConnection
+    ) -> None:
+        """
+        A change that waited is reported once a flush sends it, and only once.
+        """
+        # Setup
+        command_instance.run(at_altitude(20), command.Position(0, 0, 30))
+        command_instance.run(at_altitude(20), command.Position(0, 0, 40))
+        delay = command_instance.scheduler.get_flush_delay()
+        assert delay is not None
+
+        # Run
+        early = command_instance.flush()
+        time.sleep(delay + 0.01)
+        flushed = command_instance.flush()
+        again = command_instance.flush()
+
+        # Test
+        assert early == []
+        assert flushed == ["CHANGE ALTITUDE: 20"]
+        assert again == []
+        assert len(connection.mav.sent) == 2
@@ -0,0 +1,128 @@
+"""
+Test matching acknowledgements to commands and retrying.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from modules.command import command_ack_tracker
+from modules.command import command_scheduler
+from tests.unit import conftest
+
+
+CHANGE_ALT = 113
+YAW = 115
+ALT_PARAMS = (1, 0, 0, 0, 0, 0, 30)
+YAW_PARAMS = (10, 5, 1, 1, 0, 0, 0)
+
+
+def create_tracker(ack_timeout: float, max_retries: int) -> command_ack_tracker.CommandAckTracker:
+    """
+    Tracker doubling the timeout after every retry.
+    """
+    result, tracker = command_ack_tracker.CommandAckTracker.create(ack_timeout, max_retries, 2.0)
+    assert result
+    assert tracker is not None
+
+    return tracker
+
+
+class TestCommandAckTracker:
+    """
+    Tracker tests.
+    """
+
+    def test_outstanding_commands(self) -> None:
+        """
+        Different commands are in flight at once and acknowledged separately.
+        """
+        # Setup
+        tracker = create_tracker(10.0, 3)
+        tracker.track(CHANGE_ALT, ALT_PARAMS)
+        tracker.track(YAW, YAW_PARAMS)
+
+        # Run
+        yaw_matched = tracker.acknowledge(YAW, mavutil.mavlink.MAV_RESULT_ACCEPTED)
+        repeat_matched = tracker.acknowledge(YAW, mavutil.mavlink.MAV_RESULT_ACCEPTED)
+
+        # Test
+        assert yaw_matched
+        assert not repeat_matched
+        assert tracker.get_in_flight(CHANGE_ALT) == ALT_PARAMS
+        assert tracker.get_in_flight(YAW) is None
+
+    def test_retries_with_backoff(self) -> None:
+        """
+        Unacknowledged commands are retried with the next confirmation and a longer timeout,
+        then given up on.
+        """
+        # Setup
+        tracker = create_tracker(0.02, 1)
+        tracker.track(YAW, YAW_PARAMS)
+
+        # Run
+        early_retries = tracker.get_due_retries()
+        time.sleep(0.03)
+        first_retries = tracker.get_due_retries()
+        retry_delay = tracker.get_retry_delay()
+        time.sleep(0.05)
+        last_retries = tracker.get_due_retries()
+        report = tracker.get_report()
+
+        # Test
+        assert len(early_retries) == 0
+        assert first_retries == [(YAW, YAW_PARAMS, 1)]
+        assert retry_delay is not None and 0.02 < retry_delay <= 0.04
+        assert len(last_retries) == 0
+        assert tracker.get_in_flight(YAW) is None
+        assert report.retried_count == 1
+        assert report.failed_count == 1
+
+    def test_latency_percentiles(self) -> None:
+        """
+        Latency is measured from the first send to the receive time.
+        """
+        # Setup
+        tracker = create_tracker(10.0, 3)
+
+        # Run
+        for latency in [0.01, 0.02, 0.03, 0.04]:
+            tracker.track(YAW, YAW_PARAMS)
+            tracker.acknowledge(YAW, mavutil.mavlink.MAV_RESULT_DENIED, time.time() + latency)
+        report = tracker.get_report((50, 100))
+
+        # Test
+        assert report.rejected_count == 4
+        assert abs(report.latency_percentiles[50] - 0.02) < 0.005
+        assert abs(report.latency_percentiles[100] - 0.04) < 0.005
+
+    def test_scheduler_retries(self) -> None:
+        """
+        The scheduler resends retries and keeps repeats in flight until acknowledged.
+        """
+        # Setup
+        tracker = create_tracker(0.02, 3)
+        connection = conftest.FakeConnection()
+        result, scheduler = command_scheduler.CommandScheduler.create(
+            connection, 1000.0, ack_tracker=tracker  # type: ignore
+        )
+        assert result
+        assert scheduler is not None
+        ack = mavutil.mavlink.MAVLink_command_ack_message(
+            CHANGE_ALT, mavutil.mavlink.MAV_RESULT_ACCEPTED
+        )
+
+        # Run
+        scheduler.submit(CHANGE_ALT, ALT_PARAMS)
+        time.sleep(0.03)
+        repeat_sent = scheduler.submit(CHANGE_ALT, ALT_PARAMS)
+        scheduler.flush()
+        matched = scheduler.acknowledge(ack)
+        acknowledged_sent = scheduler.submit(CHANGE_ALT, ALT_PARAMS)
+
+        # Test
+        assert repeat_sent == command_scheduler.SubmitOutcome.SUPPRESSED
+        assert matched
+        assert acknowledged_sent == command_scheduler.SubmitOutcome.SENT
+        assert [args[3] for args in connection.mav.sent] == [0, 1, 0]
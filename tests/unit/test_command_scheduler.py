@@ -0,0 +1,127 @@
+"""
+Test rate limiting and coalescing of commands.
+"""
+
+import time
+
+from modules.command import command_scheduler
+from tests.unit import conftest
+
+
+CHANGE_ALT = 113
+YAW = 115
+
+
+def create_scheduler(
+    rate: float, in_flight_timeout: float
+) -> "tuple[command_scheduler.CommandScheduler, conftest.FakeMav]":
+    """
+    Scheduler sending to a fake connection.
+    """
+    connection = conftest.FakeConnection()
+    result, scheduler = command_scheduler.CommandScheduler.create(
+        connection, rate, 1, in_flight_timeout  # type: ignore
+    )
+    assert result
+    assert scheduler is not None
+
+    return scheduler, connection.mav
+
+
+class TestCommandScheduler:
+    """
+    Scheduler tests.
+    """
+
+    def test_invalid_rate(self) -> None:
+        """
+        The rate must be positive.
+        """
+        # Run
+        result, scheduler = command_scheduler.CommandScheduler.create(conftest.FakeConnection(), 0.0)  # type: ignore
+
+        # Test
+        assert not result
+        assert scheduler is None
+
+    def test_merges_to_latest(self) -> None:
+        """
+        Commands over the rate wait, and only the newest parameters are sent.
+        """
+        # Setup
+        scheduler, mav = create_scheduler(20.0, 0.0)
+
+        # Run
+        first_sent = scheduler.submit(YAW, (10, 5, 1, 1, 0, 0, 0))
+        second_sent = scheduler.submit(YAW, (20, 5, 1, 1, 0, 0, 0))
+        third_sent = scheduler.submit(YAW, (30, 5, 1, 1, 0, 0, 0))
+        delay = scheduler.get_flush_delay()
+        time.sleep(0.06)
+        flushed = scheduler.flush()
+
+        # Test
+        assert first_sent == command_scheduler.SubmitOutcome.SENT
+        assert second_sent == command_scheduler.SubmitOutcome.DEFERRED
+        assert third_sent == command_scheduler.SubmitOutcome.DEFERRED
+        assert delay is not None and 0.0 < delay <= 0.05
+        assert flushed == [(YAW, (30, 5, 1, 1, 0, 0, 0))]
+        assert [args[4] for args in mav.sent] == [10, 30]
+        assert mav.sent[0][:4] == (1, 0, YAW, 0)
+        assert scheduler.get_counts() == (2, 1, 0)
+        assert scheduler.get_flush_delay() is None
+
+    def test_rate_per_command(self) -> None:
+        """
+        Each command has its own rate.
+        """
+        # Setup
+        scheduler, mav = create_scheduler(0.01, 0.0)
+
+        # Run
+        scheduler.submit(YAW, (10, 5, 1, 1, 0, 0, 0))
+        scheduler.submit(CHANGE_ALT, (1, 0, 0, 0, 0, 0, 30))
+
+        # Test
+        assert [args[2] for args in mav.sent] == [YAW, CHANGE_ALT]
+
+    def test_suppresses_in_flight(self) -> None:
+        """
+        Repeats of the command in flight are dropped until it completes.
+        """
+        # Setup
+        scheduler, mav = create_scheduler(1000.0, 60.0)
+        params = (1, 0, 0, 0, 0, 0, 30)
+
+        # Run
+        scheduler.submit(CHANGE_ALT, params)
+        time.sleep(0.01)
+        repeat_sent = scheduler.submit(CHANGE_ALT, params)
+        scheduler.complete(CHANGE_ALT)
+        completed_sent = scheduler.submit(CHANGE_ALT, params)
+
+        # Test
+        assert repeat_sent == command_scheduler.SubmitOutcome.SUPPRESSED
+        assert completed_sent == command_scheduler.SubmitOutcome.SENT
+        assert len(mav.sent) == 2
+        assert scheduler.get_counts() == (2, 0, 1)
+
+    def test_suppresses_within_tolerance(self) -> None:
+        """
+        Parameters within the tolerance of the command in flight are repeats.
+        """
+        # Setup
+        scheduler, mav = create_scheduler(1000.0, 60.0)
+        params = (45.0, 5, 1, 1, 0, 0, 0)
+        rounded_params = (45.0 + command_scheduler.PARAMS_TOLERANCE / 10, 5, 1, 1, 0, 0, 0)
+        changed_params = (45.0 + command_scheduler.PARAMS_TOLERANCE * 10, 5, 1, 1, 0, 0, 0)
+
+        # Run
+        scheduler.submit(YAW, params)
+        time.sleep(0.01)
+        rounded_sent = scheduler.submit(YAW, rounded_params)
+        changed_sent = scheduler.submit(YAW, changed_params)
+
+        # Test
+        assert rounded_sent == command_scheduler.SubmitOutcome.SUPPRESSED
+        assert changed_sent == command_scheduler.SubmitOutcome.SENT
+        assert len(mav.sent) == 2
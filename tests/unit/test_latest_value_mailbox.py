@@ -0,0 +1,180 @@
+"""
+Test the latest value mailbox.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import struct_codec
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+WRITE_COUNT = 2000
+
+
+class Pair:
+    """
+    Record whose fields must always be equal.
+    """
+
+    def __init__(self, first: int, second: int) -> None:
+        self.first = first
+        self.second = second
+
+
+struct_codec.register(Pair, 255, [("first", "q"), ("second", "q")])
+
+
+@pytest.fixture()
+def mailbox() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Mailbox backed channel.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        1,
+        queue_proxy_wrapper.QueueBackend.MAILBOX,
+        record_type=Pair,
+    )
+    yield wrapper  # type: ignore
+    wrapper.close()
+
+
+def wait_for_value(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper, waiting: "mp.synchronize.Event"
+) -> None:
+    """
+    Blocks until a value is written.
+    """
+    waiting.set()
+    input_queue.queue.get()
+
+
+def writer(output_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Writes many consistent pairs as fast as possible.
+    """
+    for i in range(1, WRITE_COUNT + 1):
+        output_queue.queue.put(Pair(i, i))
+
+
+class TestLatestValueMailbox:
+    """
+    Mailbox only holds the newest value.
+    """
+
+    def test_empty(self, mailbox: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Nothing written yet.
+        """
+        # Run
+        version, value = mailbox.queue.read_latest()
+
+        # Test
+        assert version == 0
+        assert value is None
+        with pytest.raises(queue.Empty):
+            mailbox.queue.get(timeout=0.01)
+
+    def test_overwrite(self, mailbox: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Producer never blocks and the reader gets the newest value once.
+        """
+        # Run
+        for i in range(5):
+            mailbox.queue.put_nowait(Pair(i, i))
+
+        value = mailbox.queue.get_nowait()
+
+        # Test
+        assert value.first == 4
+        assert mailbox.queue.read_latest()[0] == 5
+        with pytest.raises(queue.Empty):
+            mailbox.queue.get_nowait()
+
+    def test_sentinel(self, mailbox: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        None is passed through as a sentinel.
+        """
+        # Run
+        mailbox.fill_queue_with_sentinel()
+
+        # Test
+        assert mailbox.queue.get_nowait() is None
+
+    def test_writer_died(self, mailbox: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        A write left in progress by a writer that died makes reads give up instead of spinning.
+        """
+        # Setup
+        mailbox.queue.put(Pair(1, 1))
+        # Sequence of the second write in progress
+        mailbox.queue._LatestValueMailbox__write_sequence(3)
+
+        # Run
+        start_time = time.monotonic()
+        version, value = mailbox.queue.read_latest()
+        with pytest.raises(queue.Empty):
+            mailbox.queue.get_nowait()
+        with pytest.raises(queue.Empty):
+            mailbox.queue.get(timeout=0.01)
+        duration = time.monotonic() - start_time
+
+        # Test
+        assert version == 0
+        assert value is None
+        assert duration < 1.0
+
+    def test_killed_reader(self, mailbox: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        A reader killed while waiting for a value does not stall the writer.
+        """
+        # Setup
+        waiting = mp.Event()
+        reader = mp.Process(target=wait_for_value, args=(mailbox, waiting))
+        reader.start()
+        assert waiting.wait(5.0)
+        # Let the reader block in get()
+        time.sleep(0.1)
+        reader.kill()
+        reader.join()
+        writer_thread = threading.Thread(target=mailbox.queue.put, args=(Pair(1, 1),))
+
+        # Run
+        writer_thread.start()
+        writer_thread.join(1.0)
+
+        # Test
+        assert not writer_thread.is_alive()
+        assert mailbox.queue.get_nowait().first == 1
+
+    def test_no_torn_reads(self, mailbox: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Reads concurrent with writes from another process are always consistent.
+        """
+        # Setup
+        worker = mp.Process(target=writer, args=(mailbox,))
+        last_version = 0
+
+        # Run
+        worker.start()
+        while last_version < WRITE_COUNT:
+            version, value = mailbox.queue.read_latest()
+            if value is None:
+                continue
+
+            # Test
+            assert value.first == value.second
+            assert version >= last_version
+            last_version = version
+
+        worker.join()
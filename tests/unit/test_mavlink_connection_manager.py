@@ -0,0 +1,164 @@
+"""
+Test reconnecting the router connection.
+"""
+
+import socket
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_connection_manager
+from modules.mavlink_router import mavlink_router
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture()
+def listener() -> socket.socket:  # type: ignore
+    """
+    Drone side listening on a free port.
+    """
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.bind(("localhost", 0))
+    listen_socket.listen(1)
+    listen_socket.settimeout(1.0)
+    yield listen_socket  # type: ignore
+    listen_socket.close()
+
+
+def create_manager(
+    port: int, connect_timeout: float = mavlink_connection_manager.CONNECT_TIMEOUT
+) -> "tuple[mavlink_connection_manager.MavlinkConnectionManager, mavlink_router.LinkState]":
+    """
+    Manager of a TCP connection to the port.
+    """
+    link_state = mavlink_router.LinkState()
+    result, manager = mavlink_connection_manager.MavlinkConnectionManager.create(
+        f"tcp:localhost:{port}",
+        link_state,
+        0.05,
+        1.0,
+        0.5,
+        connect_timeout=connect_timeout,
+    )
+    assert result
+    assert manager is not None
+
+    return manager, link_state
+
+
+def free_port() -> int:
+    """
+    Port nothing listens on.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as unused_socket:
+        unused_socket.bind(("localhost", 0))
+        return unused_socket.getsockname()[1]
+
+
+class TestMavlinkConnectionManager:
+    """
+    Connection manager tests.
+    """
+
+    def test_backoff(self) -> None:
+        """
+        Failed attempts wait a jittered, growing delay.
+        """
+        # Setup
+        manager, link_state = create_manager(free_port())
+
+        # Run
+        first_connected = manager.connect()
+        first_delay = manager.get_retry_delay()
+        early_connected = manager.connect()
+
+        # Test
+        assert not first_connected
+        assert 0.025 <= first_delay <= 0.05
+        assert not early_connected
+        assert not link_state.is_up()
+        assert link_state.get_generation() == 0
+
+    def test_reconnect(self, listener: socket.socket) -> None:
+        """
+        A lost link is reopened right away, with a new generation.
+        """
+        # Setup
+        manager, link_state = create_manager(listener.getsockname()[1])
+
+        # Run
+        first_connected = manager.connect()
+        manager.disconnect()
+        is_up_after_loss = link_state.is_up()
+        second_connected = manager.connect()
+
+        # Test
+        assert first_connected
+        assert not is_up_after_loss
+        assert second_connected
+        assert link_state.is_up()
+        assert link_state.get_generation() == 2
+
+        manager.close()
+
+    def test_heartbeat_on_reconnect(self, listener: socket.socket) -> None:
+        """
+        The last heartbeat sent while the link was down is sent as soon as it is back.
+        """
+        # Setup
+        manager, _ = create_manager(listener.getsockname()[1])
+        heartbeat = mavutil.mavlink.MAVLink_heartbeat_message(6, 8, 0, 0, 0, 3)
+        command = mavutil.mavlink.MAVLink_command_long_message(1, 0, 115, 0, 0, 0, 0, 0, 0, 0, 0)
+
+        # Run
+        heartbeat_sent = manager.send(heartbeat)
+        command_sent = manager.send(command)
+        manager.connect()
+        drone_connection, _ = listener.accept()
+        drone_connection.settimeout(1.0)
+        data = drone_connection.recv(1024)
+        drone_connection.close()
+
+        # Test
+        assert not heartbeat_sent
+        assert not command_sent
+        assert manager.get_dropped_count() == 2
+        mav = mavutil.mavlink.MAVLink(None)
+        messages = mav.parse_buffer(data)
+        assert messages is not None
+        assert [message.get_type() for message in messages] == ["HEARTBEAT"]
+
+        manager.close()
+
+    def test_connect_timeout(self) -> None:
+        """
+        An attempt to a drone that does not accept the connection gives up after the timeout.
+        """
+        # Setup
+        # The OS drops connections past the one waiting to be accepted,
+        # so connecting hangs as with a drone that does not answer
+        listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listen_socket.bind(("localhost", 0))
+        listen_socket.listen(0)
+        waiting_socket = socket.create_connection(listen_socket.getsockname(), 1.0)
+        manager, link_state = create_manager(listen_socket.getsockname()[1], 0.2)
+
+        # Run
+        start_time = time.monotonic()
+        connected = manager.connect()
+        duration = time.monotonic() - start_time
+        waiting_socket.close()
+        listen_socket.close()
+
+        # Test
+        assert not connected
+        assert 0.2 <= duration < 1.0
+        assert manager.get_retry_delay() > 0.0
+        assert not link_state.is_up()
+        # Only the attempt used the timeout
+        assert socket.getdefaulttimeout() is None
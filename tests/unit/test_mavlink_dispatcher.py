@@ -0,0 +1,144 @@
+"""
+Test dispatching messages by message id.
+"""
+
+from pymavlink import mavutil
+from pymavlink.dialects.v20 import all as mavlink_v2
+
+from modules.mavlink_router import mavlink_dispatcher
+
+
+class FakeConnection:
+    """
+    Returns the given reads in order, then nothing.
+    """
+
+    def __init__(self, reads: "list[bytes]") -> None:
+        self.reads = reads
+        self.mav = mavutil.mavlink.MAVLink(None)
+        self.logfile_raw = None
+        # Decoding does not depend on the version, do not switch the dialect of other tests
+        self.first_byte = False
+
+    def recv(self, n: int) -> bytes:  # pylint: disable=unused-argument
+        """
+        Next read, ignoring n.
+        """
+        if len(self.reads) == 0:
+            return b""
+
+        return self.reads.pop(0)
+
+
+def encode_stream() -> "tuple[bytes, bytes]":
+    """
+    Returns a heartbeat frame and an attitude frame.
+    """
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    heartbeat = mav.heartbeat_encode(2, 3, 0, 0, 4).pack(mav)
+    attitude = mav.attitude_encode(100, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0).pack(mav)
+    return heartbeat, attitude
+
+
+def create_dispatcher(
+    reads: "list[bytes]",
+) -> "tuple[mavlink_dispatcher.MavlinkDispatcher, list[object]]":
+    """
+    Dispatcher over the reads that collects heartbeats.
+    """
+    result, dispatcher = mavlink_dispatcher.MavlinkDispatcher.create(FakeConnection(reads))  # type: ignore
+    assert result
+    assert dispatcher is not None
+
+    heartbeats: "list[object]" = []
+    assert dispatcher.register("HEARTBEAT", heartbeats.append)
+    return dispatcher, heartbeats
+
+
+class TestMavlinkDispatcher:
+    """
+    Dispatcher tests.
+    """
+
+    def test_unknown_type(self) -> None:
+        """
+        Types not in the dialect cannot be registered.
+        """
+        # Setup
+        dispatcher, _ = create_dispatcher([])
+
+        # Run
+        result = dispatcher.register("NOT_A_MESSAGE", lambda message: None)
+
+        # Test
+        assert not result
+
+    def test_skips_unregistered(self) -> None:
+        """
+        Only registered types are decoded, everything available is read at once.
+        """
+        # Setup
+        heartbeat, attitude = encode_stream()
+        dispatcher, heartbeats = create_dispatcher([attitude + heartbeat + attitude + heartbeat])
+
+        # Run
+        read_length = dispatcher.dispatch()
+
+        # Test
+        assert read_length == 2 * (len(heartbeat) + len(attitude))
+        assert [message.get_type() for message in heartbeats] == ["HEARTBEAT", "HEARTBEAT"]  # type: ignore
+        assert dispatcher.get_counts() == (2, 2, 0)
+
+    def test_split_frame(self) -> None:
+        """
+        A frame split across reads is dispatched once complete.
+        """
+        # Setup
+        heartbeat, _ = encode_stream()
+        dispatcher, heartbeats = create_dispatcher([heartbeat[:3], heartbeat[3:8], heartbeat[8:]])
+
+        # Run
+        dispatcher.dispatch()
+        dispatcher.dispatch()
+        count_before = len(heartbeats)
+        dispatcher.dispatch()
+
+        # Test
+        assert count_before == 0
+        assert len(heartbeats) == 1
+        assert heartbeats[0].type == 2  # type: ignore
+
+    def test_resynchronizes(self) -> None:
+        """
+        Noise and frames failing their checksum are dropped, the following frames are not.
+        """
+        # Setup
+        heartbeat, _ = encode_stream()
+        corrupted = bytearray(heartbeat)
+        corrupted[-1] ^= 0xFF
+        dispatcher, heartbeats = create_dispatcher([b"\x00\x42" + bytes(corrupted) + heartbeat])
+
+        # Run
+        dispatcher.dispatch()
+
+        # Test
+        assert len(heartbeats) == 1
+        assert dispatcher.get_counts() == (1, 0, 1)
+
+    def test_mavlink_2(self) -> None:
+        """
+        MAVLink 2 frames are split and decoded too.
+        """
+        # Setup
+        mav = mavlink_v2.MAVLink(None, srcSystem=1, srcComponent=1)
+        heartbeat = mav.heartbeat_encode(2, 3, 0, 0, 4).pack(mav)
+        attitude = mav.attitude_encode(100, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0).pack(mav)
+        dispatcher, heartbeats = create_dispatcher([attitude + heartbeat])
+
+        # Run
+        dispatcher.dispatch()
+
+        # Test
+        assert len(heartbeats) == 1
+        assert heartbeats[0].system_status == 4  # type: ignore
+        assert dispatcher.get_counts() == (1, 1, 0)
@@ -0,0 +1,192 @@
+"""
+Test recording and replaying MAVLink streams.
+"""
+
+import pathlib
+import time
+
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_dispatcher
+from modules.mavlink_router import mavlink_recorder
+from modules.mavlink_router import mavlink_replay
+
+
+# Recorded time of the first message
+START_TIME = 1_700_000_000.0
+
+
+def record(path: pathlib.Path, period: float, count: int) -> None:
+    """
+    Records a heartbeat then attitudes, one every period.
+    """
+    result, recorder = mavlink_recorder.TlogRecorder.create(path)
+    assert result
+    assert recorder is not None
+
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    recorder.record(mav.heartbeat_encode(2, 3, 0, 0, 4).pack(mav), START_TIME)
+    for i in range(count):
+        frame = mav.attitude_encode(i, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0).pack(mav)
+        recorder.record(frame, START_TIME + (i + 1) * period)
+
+    recorder.close()
+
+
+def create_replay(path: pathlib.Path, speed: "float | None") -> mavlink_replay.MavlinkReplay:
+    """
+    Replay of the file.
+    """
+    result, replay = mavlink_replay.MavlinkReplay.create(path, speed)
+    assert result
+    assert replay is not None
+
+    return replay
+
+
+class TestMavlinkReplay:
+    """
+    Recorder and replay tests.
+    """
+
+    def test_max_speed(self, tmp_path: pathlib.Path) -> None:
+        """
+        Every message is replayed in order with its recorded time, filtered like a connection.
+        """
+        # Setup
+        path = tmp_path / "flight.tlog"
+        record(path, 1.0, 5)
+        replay = create_replay(path, None)
+
+        # Run
+        heartbeat = replay.wait_heartbeat(timeout=1.0)
+        attitudes = []
+        while True:
+            message = replay.recv_match(type="ATTITUDE", blocking=False)
+            if message is None:
+                break
+            attitudes.append(message)
+        replay.mav.heartbeat_send(6, 8, 0, 0, 0)
+
+        # Test
+        assert heartbeat is not None
+        assert [message.time_boot_ms for message in attitudes] == [0, 1, 2, 3, 4]  # type: ignore
+        # pymavlink stamps messages with _timestamp
+        # pylint: disable-next=protected-access
+        assert abs(attitudes[-1]._timestamp - (START_TIME + 5.0)) < 1e-5  # type: ignore
+        assert replay.is_finished()
+        assert replay.get_counts() == (6, 1)
+
+        replay.close()
+
+    def test_paced(self, tmp_path: pathlib.Path) -> None:
+        """
+        Messages are replayed at a multiple of the recorded pace.
+        """
+        # Setup
+        path = tmp_path / "flight.tlog"
+        record(path, 0.5, 4)
+        replay = create_replay(path, 20.0)
+
+        # Run
+        start_time = time.monotonic()
+        count = 0
+        while replay.recv_match(blocking=True, timeout=1.0) is not None:
+            count += 1
+            if replay.is_finished():
+                break
+        duration = time.monotonic() - start_time
+
+        # Test
+        assert count == 5
+        # 2 seconds recorded
+        assert 0.09 <= duration < 0.5
+
+        replay.close()
+
+    def test_readable_by_pymavlink(self, tmp_path: pathlib.Path) -> None:
+        """
+        Recordings are tlogs.
+        """
+        # Setup
+        path = tmp_path / "flight.tlog"
+        record(path, 1.0, 2)
+
+        # Run
+        connection = mavutil.mavlink_connection(str(path))
+        types = []
+        while True:
+            message = connection.recv_msg()
+            if message is None:
+                break
+            types.append(message.get_type())
+        connection.close()
+
+        # Test
+        assert types == ["HEARTBEAT", "ATTITUDE", "ATTITUDE"]
+
+    def test_dispatcher_records_everything(self, tmp_path: pathlib.Path) -> None:
+        """
+        The dispatcher records the frames it skips as well as those it decodes.
+        """
+
+        # Setup
+        class FakeConnection:
+            """
+            Returns a heartbeat and an attitude in one read.
+            """
+
+            def __init__(self) -> None:
+                mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+                self.data = mav.heartbeat_encode(2, 3, 0, 0, 4).pack(mav) + mav.attitude_encode(
+                    7, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0
+                ).pack(mav)
+                self.mav = mav
+                self.logfile_raw = None
+                self.first_byte = False
+
+            def recv(self, n: int) -> bytes:  # pylint: disable=unused-argument
+                """
+                Everything, then nothing.
+                """
+                data, self.data = self.data, b""
+                return data
+
+        path = tmp_path / "flight.tlog"
+        result, recorder = mavlink_recorder.TlogRecorder.create(path)
+        assert result
+        assert recorder is not None
+        result, dispatcher = mavlink_dispatcher.MavlinkDispatcher.create(
+            FakeConnection(), recorder=recorder  # type: ignore
+        )
+        assert result
+        assert dispatcher is not None
+        dispatcher.register("HEARTBEAT", lambda message: None)
+
+        # Run
+        dispatcher.dispatch()
+        recorder.close()
+        replay = create_replay(path, None)
+        types = []
+        while not replay.is_finished():
+            types.append(replay.recv_msg().get_type())  # type: ignore
+        replay.close()
+
+        # Test
+        assert dispatcher.get_counts() == (1, 1, 0)
+        assert types == ["HEARTBEAT", "ATTITUDE"]
+
+    def test_empty_file(self, tmp_path: pathlib.Path) -> None:
+        """
+        Empty files cannot be replayed.
+        """
+        # Setup
+        path = tmp_path / "empty.tlog"
+        path.touch()
+
+        # Run
+        result, replay = mavlink_replay.MavlinkReplay.create(path)
+
+        # Test
+        assert not result
+        assert replay is None
@@ -0,0 +1,121 @@
+"""
+Test routing messages between the connection and workers.
+"""
+
+import copy
+import multiprocessing as mp
+
+import pytest
+from pymavlink import mavutil
+
+from modules.mavlink_router import mavlink_router
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture()
+def router(mp_manager: "mp.managers.SyncManager") -> mavlink_router.MavlinkRouter:  # type: ignore
+    """
+    Router that is not running, tests route by hand.
+    """
+    result, router = mavlink_router.MavlinkRouter.create("tcp:localhost:0", mp_manager)
+    assert result
+    assert router is not None
+
+    yield router  # type: ignore
+
+
+def route(router: mavlink_router.MavlinkRouter, message: object) -> None:
+    """
+    Routes the message like the router worker does.
+    """
+    for inbound_queue in router.routes.get(message.get_type(), []):  # type: ignore
+        inbound_queue.queue.put(message)
+
+
+def attitude(time_boot_ms: int) -> "mavutil.mavlink.MAVLink_attitude_message":  # type: ignore
+    """
+    Attitude at the time.
+    """
+    return mavutil.mavlink.MAVLink_attitude_message(time_boot_ms, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+class TestRouting:
+    """
+    Incoming messages reach only their subscribers.
+    """
+
+    def test_fan_out(self, router: mavlink_router.MavlinkRouter) -> None:
+        """
+        Every subscriber of a type gets the message, others do not.
+        """
+        # Setup
+        heartbeat_connection = router.subscribe(["HEARTBEAT"])
+        telemetry_connection = router.subscribe(["ATTITUDE", "LOCAL_POSITION_NED"])
+        logger_connection = router.subscribe(["ATTITUDE"])
+
+        # Run
+        route(router, attitude(1))
+        telemetry_message = telemetry_connection.recv_match(
+            type=["ATTITUDE", "LOCAL_POSITION_NED"], blocking=True, timeout=0.1
+        )
+        logger_message = logger_connection.recv_match(blocking=True, timeout=0.1)
+        heartbeat_message = heartbeat_connection.wait_heartbeat(timeout=0.01)
+
+        # Test
+        assert telemetry_message.time_boot_ms == 1  # type: ignore
+        assert logger_message.time_boot_ms == 1  # type: ignore
+        assert heartbeat_message is None
+
+    def test_not_blocking(self, router: mavlink_router.MavlinkRouter) -> None:
+        """
+        Without blocking, returns immediately when nothing was routed.
+        """
+        # Setup
+        connection = router.subscribe(["ATTITUDE"])
+
+        # Run
+        message = connection.recv_match(type="ATTITUDE")
+
+        # Test
+        assert message is None
+
+
+class TestSending:
+    """
+    Outgoing messages go through the router.
+    """
+
+    def test_send_posts_message(self, router: mavlink_router.MavlinkRouter) -> None:
+        """
+        The *_send() methods post the message instead of writing it.
+        """
+        # Setup
+        connection = router.create_sender()
+
+        # Run
+        connection.mav.command_long_send(1, 0, 115, 0, 10.0, 5.0, 1, 1, 0, 0, 0)
+        messages = router.outbound_queue.get_many(1, 0.1)
+
+        # Test
+        assert len(messages) == 1
+        assert messages[0].get_type() == "COMMAND_LONG"
+        assert messages[0].param1 == 10.0
+
+    def test_copied_without_encoder(self, router: mavlink_router.MavlinkRouter) -> None:
+        """
+        Workers create their own encoder, state is copied the way it is pickled.
+        """
+        # Setup
+        connection = router.create_sender()
+        connection.mav.heartbeat_send(6, 8, 0, 0, 0)
+
+        # Run
+        copied = copy.copy(connection)
+
+        # Test
+        assert copied.mav is not connection.mav
+        assert copied.mav.total_packets_sent == 0
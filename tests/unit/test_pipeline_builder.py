@@ -0,0 +1,345 @@
+"""
+Test building a pipeline from its topology.
+"""
+
+import multiprocessing.managers
+
+import pytest
+import yaml
+
+from modules.common.modules.logger import logger
+from utilities.workers import pipeline_builder
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name,unused-argument
+
+
+THIS_MODULE = "tests.unit.test_pipeline_builder"
+
+
+def produce(
+    value: int,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Stage with an argument and an output.
+    """
+
+
+def consume(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Stage with an input.
+    """
+
+
+def relay(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Stage with an input and an output.
+    """
+
+
+def controller_first(
+    controller: worker_controller.WorkerController,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    Stage with its parameters out of order.
+    """
+
+
+def build(
+    topology: str,
+    mp_manager: multiprocessing.managers.SyncManager,
+    local_logger: logger.Logger,
+    resources: "dict[str, object] | None" = None,
+    single_worker_targets: "list[str] | None" = None,
+) -> "pipeline_builder.Pipeline | None":
+    """
+    Returns the pipeline of the YAML topology, None if it is invalid.
+    """
+    if resources is None:
+        resources = {"value": 1}
+
+    result, pipeline = pipeline_builder.Pipeline.create(
+        yaml.safe_load(topology),
+        worker_controller.WorkerController(),
+        mp_manager,
+        resources,
+        local_logger,
+        single_worker_targets,
+    )
+    assert result == (pipeline is not None)
+
+    return pipeline
+
+
+def chain(max_size: int = 0, producer_count: int = 1) -> str:
+    """
+    Topology of a producer and a consumer connected by a queue.
+    """
+    return f"""
+pipeline:
+  queues:
+    - name: data
+      max_size: {max_size}
+  stages:
+    - name: producer
+      target: {THIS_MODULE}.produce
+      count: {producer_count}
+      arguments: [$value]
+      outputs: [data]
+    - name: consumer
+      target: {THIS_MODULE}.consume
+      inputs: [data]
+"""
+
+
+class TestPipelineBuilder:
+    """
+    Topology validation and start order.
+    """
+
+    def test_valid(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        A valid topology is built with producers before their consumers.
+        """
+        # Run
+        pipeline = build(chain(), mp_manager, local_logger)
+
+        # Test
+        assert pipeline is not None
+        assert [manager.get_group_name() for manager in pipeline.get_worker_managers()] == [
+            "producer",
+            "consumer",
+        ]
+        pipeline.close()
+
+    def test_missing_producer(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        Every queue needs a producer.
+        """
+        # Setup
+        topology = f"""
+pipeline:
+  queues:
+    - name: data
+  stages:
+    - name: consumer
+      target: {THIS_MODULE}.consume
+      inputs: [data]
+"""
+
+        # Run
+        pipeline = build(topology, mp_manager, local_logger)
+
+        # Test
+        assert pipeline is None
+
+    def test_missing_consumer(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        Every queue needs a consumer, a stage or main.
+        """
+        # Setup
+        topology = f"""
+pipeline:
+  queues:
+    - name: data
+  stages:
+    - name: producer
+      target: {THIS_MODULE}.produce
+      arguments: [1]
+      outputs: [data]
+"""
+
+        # Run
+        pipeline = build(topology, mp_manager, local_logger)
+        main_pipeline = build(topology + "  main_inputs: [data]\n", mp_manager, local_logger)
+
+        # Test
+        assert pipeline is None
+        assert main_pipeline is not None
+        main_pipeline.close()
+
+    def test_max_size_below_producers(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        A queue holds at least an item per producing worker.
+        """
+        # Run
+        pipeline = build(chain(1, 2), mp_manager, local_logger)
+        roomy_pipeline = build(chain(2, 2), mp_manager, local_logger)
+
+        # Test
+        assert pipeline is None
+        assert roomy_pipeline is not None
+        roomy_pipeline.close()
+
+    def test_cycle(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        Stages cannot feed each other.
+        """
+        # Setup
+        topology = f"""
+pipeline:
+  queues:
+    - name: forward
+    - name: backward
+  stages:
+    - name: first
+      target: {THIS_MODULE}.relay
+      inputs: [backward]
+      outputs: [forward]
+    - name: second
+      target: {THIS_MODULE}.relay
+      inputs: [forward]
+      outputs: [backward]
+"""
+
+        # Run
+        pipeline = build(topology, mp_manager, local_logger)
+
+        # Test
+        assert pipeline is None
+
+    def test_unknown_resource(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        Arguments can only name objects main passes in.
+        """
+        # Run
+        pipeline = build(chain(), mp_manager, local_logger, {})
+
+        # Test
+        assert pipeline is None
+
+    def test_signature_order(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        Targets take their arguments, queues and controller in order.
+        """
+        # Setup
+        topology = chain().replace(f"{THIS_MODULE}.consume", f"{THIS_MODULE}.controller_first")
+        wrong_count_topology = chain().replace("arguments: [$value]", "arguments: [1, 2]")
+
+        # Run
+        pipeline = build(topology, mp_manager, local_logger)
+        wrong_count_pipeline = build(wrong_count_topology, mp_manager, local_logger)
+
+        # Test
+        assert pipeline is None
+        assert wrong_count_pipeline is None
+
+    def test_single_worker_targets(
+        self, mp_manager: multiprocessing.managers.SyncManager, local_logger: logger.Logger
+    ) -> None:
+        """
+        Targets main requires exactly one worker of are only checked when asked for.
+        """
+        # Setup
+        producer_target = [f"{THIS_MODULE}.produce"]
+        second_producer_stage = f"""
+    - name: second_producer
+      target: {THIS_MODULE}.produce
+      arguments: [1]
+      outputs: [data]
+"""
+
+        # Run
+        unchecked = build(chain(2, 2), mp_manager, local_logger)
+        single = build(chain(), mp_manager, local_logger, None, producer_target)
+        missing = build(chain(), mp_manager, local_logger, None, [f"{THIS_MODULE}.relay"])
+        two_workers = build(chain(2, 2), mp_manager, local_logger, None, producer_target)
+        two_stages = build(
+            chain(2).replace("  stages:\n", "  stages:\n" + second_producer_stage),
+            mp_manager,
+            local_logger,
+            None,
+            producer_target,
+        )
+
+        # Test
+        assert unchecked is not None
+        assert single is not None
+        assert missing is None
+        assert two_workers is None
+        assert two_stages is None
+        unchecked.close()
+        single.close()
+
+    def test_start_consumers_first(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        local_logger: logger.Logger,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Consumers start before the producers feeding them.
+        """
+        # Setup
+        pipeline = build(chain(), mp_manager, local_logger)
+        assert pipeline is not None
+        started = []
+        for manager in pipeline.get_worker_managers():
+            monkeypatch.setattr(
+                manager,
+                "start_workers",
+                lambda name=manager.get_group_name(): started.append(name),
+            )
+
+        # Run
+        pipeline.start()
+
+        # Test
+        assert started == ["consumer", "producer"]
+        pipeline.close()
+
+    def test_start_processes_first(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        local_logger: logger.Logger,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Process stages start before thread stages, even the producers of thread consumers.
+        """
+        # Setup
+        topology = chain().replace("inputs: [data]", "inputs: [data]\n      execution_mode: thread")
+        pipeline = build(topology, mp_manager, local_logger)
+        assert pipeline is not None
+        started = []
+        for manager in pipeline.get_worker_managers():
+            monkeypatch.setattr(
+                manager,
+                "start_workers",
+                lambda name=manager.get_group_name(): started.append(name),
+            )
+
+        # Run
+        pipeline.start()
+
+        # Test
+        assert started == ["producer", "consumer"]
+        pipeline.close()
@@ -0,0 +1,320 @@
+"""
+Test the queue wrapper.
+"""
+
+import multiprocessing as mp
+
+import pytest
+
+from documentation.multiprocess_example import intermediate_struct
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import struct_codec
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+
+
+@pytest.fixture()
+def manager_queue(
+    mp_manager: "mp.managers.SyncManager",
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Manager backed queue.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE)
+    yield wrapper  # type: ignore
+
+
+class TestBatch:
+    """
+    Batched put and get.
+    """
+
+    def test_batch_uses_one_slot(
+        self, manager_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        A batch larger than the queue fits in a single slot.
+        """
+        # Setup
+        expected = list(range(10))
+
+        # Run
+        manager_queue.put_many(expected)
+        size = manager_queue.queue.qsize()
+        actual = manager_queue.get_many(len(expected), 0.1)
+
+        # Test
+        assert size == 1
+        assert actual == expected
+
+    def test_get_many_keeps_remainder(
+        self, manager_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        Items past max_items are returned by the next call.
+        """
+        # Run
+        manager_queue.put_many([0, 1, 2])
+        manager_queue.queue.put(3)
+        first = manager_queue.get_many(2, 0.1)
+        second = manager_queue.get_many(5, 0.1)
+
+        # Test
+        assert first == [0, 1]
+        assert second == [2, 3]
+
+    def test_single_item_not_batched(
+        self, manager_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        Consumers that do not batch can read a batch of one.
+        """
+        # Run
+        manager_queue.put_many([None])
+        actual = manager_queue.queue.get(timeout=0.1)
+
+        # Test
+        assert actual is None
+
+    def test_timeout(self, manager_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Empty list on timeout.
+        """
+        # Run
+        actual = manager_queue.get_many(8, 0.01)
+
+        # Test
+        assert not actual
+
+    def test_consumed_count(self, manager_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Counts items, not batches, removed with get_many().
+        """
+        # Setup
+        manager_queue.put_many([0, 1, 2])
+        manager_queue.queue.put(3)
+
+        # Run
+        manager_queue.get_many(2, 0.1)
+        manager_queue.get_many(5, 0.1)
+        manager_queue.get_many(5, 0.01)
+
+        # Test
+        assert manager_queue.get_consumed_count() == 4
+
+    def test_consumed_count_single(
+        self, manager_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        Counts items removed with get() and get_nowait(), but not those drained.
+        """
+        # Setup
+        manager_queue.put_many([0, 1, 2])
+        manager_queue.queue.put(3)
+        manager_queue.queue.put(4)
+
+        # Run
+        manager_queue.queue.get(timeout=0.1)
+        manager_queue.queue.get(timeout=0.1)
+        manager_queue.drain_queue(0.01)
+
+        # Test
+        assert manager_queue.get_consumed_count() == 4
+
+
+class TestBackpressure:
+    """
+    Policies when the queue is full.
+    """
+
+    @staticmethod
+    def fill(
+        mp_manager: "mp.managers.SyncManager",
+        policy: queue_proxy_wrapper.BackpressurePolicy,
+        sample_every: int = 1,
+    ) -> queue_proxy_wrapper.QueueProxyWrapper:
+        """
+        Puts twice as many items as fit.
+        """
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            QUEUE_MAX_SIZE,
+            policy=policy,
+            sample_every=sample_every,
+        )
+        for i in range(QUEUE_MAX_SIZE * 2):
+            wrapper.queue.put(i)
+
+        return wrapper
+
+    def test_drop_oldest(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        Newest items are kept.
+        """
+        # Run
+        wrapper = self.fill(mp_manager, queue_proxy_wrapper.BackpressurePolicy.DROP_OLDEST)
+        actual = wrapper.get_many(QUEUE_MAX_SIZE, 0.1)
+
+        # Test
+        assert actual == list(range(QUEUE_MAX_SIZE, QUEUE_MAX_SIZE * 2))
+        assert wrapper.get_dropped_count() == QUEUE_MAX_SIZE
+
+    def test_drop_newest(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        Oldest items are kept.
+        """
+        # Run
+        wrapper = self.fill(mp_manager, queue_proxy_wrapper.BackpressurePolicy.DROP_NEWEST)
+        actual = wrapper.get_many(QUEUE_MAX_SIZE, 0.1)
+
+        # Test
+        assert actual == list(range(QUEUE_MAX_SIZE))
+        assert wrapper.get_dropped_count() == QUEUE_MAX_SIZE
+
+    def test_sample(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        Every other item is kept.
+        """
+        # Run
+        wrapper = self.fill(mp_manager, queue_proxy_wrapper.BackpressurePolicy.SAMPLE, 2)
+        actual = wrapper.get_many(QUEUE_MAX_SIZE, 0.1)
+
+        # Test
+        assert actual == [1, 3, 5, 7]
+        assert wrapper.get_dropped_count() == QUEUE_MAX_SIZE
+
+    def test_sentinel_not_dropped(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        Sentinels bypass sampling.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            QUEUE_MAX_SIZE,
+            policy=queue_proxy_wrapper.BackpressurePolicy.SAMPLE,
+            sample_every=QUEUE_MAX_SIZE * 2,
+        )
+
+        # Run
+        wrapper.fill_queue_with_sentinel()
+
+        # Test
+        assert wrapper.queue.qsize() == QUEUE_MAX_SIZE
+        assert wrapper.get_dropped_count() == 0
+
+    def test_drop_oldest_keeps_sentinel(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        An evicted sentinel is put back after the new item, and older items are dropped instead.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            QUEUE_MAX_SIZE,
+            policy=queue_proxy_wrapper.BackpressurePolicy.DROP_OLDEST,
+        )
+        wrapper.queue.put(None)
+
+        # Run
+        for i in range(QUEUE_MAX_SIZE):
+            wrapper.queue.put(i)
+
+        actual = []
+        while not wrapper.queue.empty():
+            actual.append(wrapper.queue.get_nowait())
+
+        # Test
+        assert actual == list(range(1, QUEUE_MAX_SIZE)) + [None]
+        assert wrapper.get_dropped_count() == 1
+
+
+class TestCodecHooks:
+    """
+    Encoder and decoder hooks.
+    """
+
+    def test_batch_round_trip(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        Items inside a batch are encoded on the way in and decoded on the way out.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            QUEUE_MAX_SIZE,
+            encoder=struct_codec.encode,
+            decoder=struct_codec.decode,
+        )
+        expected = [intermediate_struct.IntermediateStruct(i, "even") for i in range(3)]
+
+        # Run
+        wrapper.put_many(expected)
+        actual = wrapper.get_many(len(expected), 0.1)
+
+        # Test
+        assert [middle.number for middle in actual] == [0, 1, 2]
+        assert all(middle.sentence == "even" for middle in actual)
+
+
+class TestLocalize:
+    """
+    Switching queues between threads to the local backend.
+    """
+
+    def test_manager_queue(self, manager_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Manager queues become local and keep working.
+        """
+        # Run
+        switched = manager_queue.localize()
+        manager_queue.put_many([0, 1])
+        actual = manager_queue.get_many(2, 0.1)
+
+        # Test
+        assert switched
+        assert manager_queue.backend == queue_proxy_wrapper.QueueBackend.LOCAL
+        assert actual == [0, 1]
+
+    def test_codec_skipped(self, mp_manager: "mp.managers.SyncManager") -> None:
+        """
+        Items are not encoded once local.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            QUEUE_MAX_SIZE,
+            encoder=struct_codec.encode,
+            decoder=struct_codec.decode,
+        )
+        expected = intermediate_struct.IntermediateStruct(0, "even")
+
+        # Run
+        wrapper.localize()
+        wrapper.queue.put(expected)
+        actual = wrapper.queue.get(timeout=0.1)
+
+        # Test
+        assert actual is expected
+
+    def test_mailbox_kept(self) -> None:
+        """
+        Mailboxes already work between threads.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            backend=queue_proxy_wrapper.QueueBackend.MAILBOX,
+            record_type=intermediate_struct.IntermediateStruct,
+        )
+
+        # Run
+        switched = wrapper.localize()
+        wrapper.close()
+
+        # Test
+        assert not switched
+        assert wrapper.backend == queue_proxy_wrapper.QueueBackend.MAILBOX
@@ -0,0 +1,81 @@
+"""
+Test waiting on several queues.
+"""
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 8
+
+
+@pytest.fixture()
+def queues() -> "list[queue_proxy_wrapper.QueueProxyWrapper]":  # type: ignore
+    """
+    Two shared memory queues.
+    """
+    wrappers = [
+        queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        )
+        for _ in range(2)
+    ]
+    yield wrappers  # type: ignore
+    for wrapper in wrappers:
+        wrapper.close()
+
+
+class TestQueueSelector:
+    """
+    Selecting the ready queue.
+    """
+
+    def test_ready_queue(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Returns the queue that has data.
+        """
+        # Setup
+        queues[1].queue.put("command")
+
+        # Run
+        ready_queue, item = queue_selector.wait_any(queues, 0.1)
+
+        # Test
+        assert ready_queue is queues[1]
+        assert item == "command"
+
+    def test_timeout(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Returns None when nothing arrives.
+        """
+        # Run
+        ready_queue, item = queue_selector.wait_any(queues, 0.01)
+
+        # Test
+        assert ready_queue is None
+        assert item is None
+
+    def test_fair(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        A full queue does not starve the other one.
+        """
+        # Setup
+        selector = queue_selector.QueueSelector(queues)
+        for i in range(QUEUE_MAX_SIZE):
+            queues[0].queue.put(i)
+        queues[1].queue.put("heartbeat")
+
+        # Run
+        ready_queues = [selector.wait_any(0.1)[0] for _ in range(2)]
+
+        # Test
+        assert queues[1] in ready_queues
@@ -0,0 +1,110 @@
+"""
+Test the shared memory queue backend.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+ITEM_COUNT = 100
+
+
+@pytest.fixture()
+def shared_queue() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Shared memory backed queue.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+    )
+    yield wrapper  # type: ignore
+    wrapper.close()
+
+
+def producer(output_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Puts consecutive integers into the queue.
+    """
+    for i in range(ITEM_COUNT):
+        output_queue.queue.put(i)
+
+
+class TestSharedMemoryQueue:
+    """
+    Ring buffer behaves like a bounded FIFO.
+    """
+
+    def test_fifo_order(self, shared_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items come out in the order they went in, including the sentinel.
+        """
+        # Setup
+        expected = [1, "two", None]
+
+        # Run
+        for item in expected:
+            shared_queue.queue.put(item)
+
+        actual = [shared_queue.queue.get() for _ in range(len(expected))]
+
+        # Test
+        assert actual == expected
+
+    def test_full_and_empty(self, shared_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Non-blocking operations raise at capacity and when empty.
+        """
+        # Run
+        for i in range(QUEUE_MAX_SIZE):
+            shared_queue.queue.put_nowait(i)
+
+        # Test
+        assert shared_queue.queue.full()
+        with pytest.raises(queue.Full):
+            shared_queue.queue.put(QUEUE_MAX_SIZE, timeout=0.01)
+
+        shared_queue.drain_queue()
+
+        assert shared_queue.queue.empty()
+        with pytest.raises(queue.Empty):
+            shared_queue.queue.get_nowait()
+
+    def test_fill_and_drain(self, shared_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Filling with sentinels and draining leaves the queue empty.
+        """
+        # Run
+        shared_queue.fill_queue_with_sentinel()
+        size_filled = shared_queue.queue.qsize()
+        shared_queue.fill_and_drain_queue()
+
+        # Test
+        assert size_filled == QUEUE_MAX_SIZE
+        assert shared_queue.queue.qsize() == 0
+
+    def test_across_processes(self, shared_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items produced in another process wrap around the ring in order.
+        """
+        # Setup
+        worker = mp.Process(target=producer, args=(shared_queue,))
+
+        # Run
+        worker.start()
+        actual = [shared_queue.queue.get(timeout=5.0) for _ in range(ITEM_COUNT)]
+        worker.join()
+
+        # Test
+        assert actual == list(range(ITEM_COUNT))
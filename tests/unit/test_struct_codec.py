@@ -0,0 +1,143 @@
+"""
+Test the struct codec.
+"""
+
+import math
+import pickle
+
+import pytest
+
+from documentation.multiprocess_example import intermediate_struct
+from utilities.workers import struct_codec
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class Vector:
+    """
+    Struct with optional fields.
+    """
+
+    def __init__(self, x: "float | None", y: "float | None", label: str) -> None:
+        self.x = x
+        self.y = y
+        self.label = label
+
+
+struct_codec.register(Vector, 254, [("x", "d"), ("y", "d"), ("label", "8s")])
+
+
+class TestStructCodec:
+    """
+    Round trips and hooks.
+    """
+
+    def test_round_trip(self) -> None:
+        """
+        All fields present.
+        """
+        # Setup
+        vector = Vector(1.5, -2.0, "up")
+
+        # Run
+        record = struct_codec.encode(vector)
+        actual = struct_codec.decode(record)
+
+        # Test
+        assert isinstance(record, bytes)
+        assert math.isclose(actual.x, 1.5)
+        assert math.isclose(actual.y, -2.0)
+        assert actual.label == "up"
+
+    def test_none_fields(self) -> None:
+        """
+        Missing fields are restored as None.
+        """
+        # Run
+        actual = struct_codec.decode(struct_codec.encode(Vector(None, 3.0, "")))
+
+        # Test
+        assert actual.x is None
+        assert math.isclose(actual.y, 3.0)
+
+    def test_passthrough(self) -> None:
+        """
+        Unregistered objects and the sentinel are not encoded.
+        """
+        # Setup
+        expected = ["text", None, 7, b"raw"]
+
+        # Run
+        actual = [struct_codec.decode(struct_codec.encode(item)) for item in expected]
+
+        # Test
+        assert actual == expected
+
+    def test_smaller_than_pickle(self) -> None:
+        """
+        Records are smaller than pickles of the same struct.
+        """
+        # Setup
+        middle = intermediate_struct.IntermediateStruct(252, "even")
+
+        # Run
+        record = struct_codec.encode(middle)
+        actual = struct_codec.decode(record)
+
+        # Test
+        assert len(record) < len(pickle.dumps(middle, pickle.HIGHEST_PROTOCOL))
+        assert actual.number == 252
+        assert actual.sentence == "even"
+
+    def test_string_too_long(self) -> None:
+        """
+        Strings longer than their field once encoded are refused, not truncated.
+        """
+        # Setup
+        codec = struct_codec.get_codec(Vector)
+        assert codec is not None
+        # 9 bytes in UTF-8, cutting at 8 would split the last character
+        vector = Vector(1.0, 2.0, "abcdefgé")
+
+        # Run
+        with pytest.raises(ValueError):
+            codec.encode(vector)
+        fitting = struct_codec.decode(struct_codec.encode(Vector(1.0, 2.0, "abcdefé")))
+
+        # Test
+        assert fitting.label == "abcdefé"
+
+    def test_string_too_long_passthrough(self) -> None:
+        """
+        The queue hook sends items it cannot pack as they are.
+        """
+        # Setup
+        vector = Vector(1.0, 2.0, "much too long")
+
+        # Run
+        record = struct_codec.encode(vector)
+        actual = struct_codec.decode(pickle.loads(pickle.dumps(record)))
+
+        # Test
+        assert record is vector
+        assert actual.label == "much too long"
+
+    def test_bytes_not_mistaken(self) -> None:
+        """
+        Bytes that look like a record are not decoded, records still are after pickling.
+        """
+        # Setup
+        record = struct_codec.encode(Vector(1.5, -2.0, "up"))
+        raw = bytes(record)
+
+        # Run
+        raw_actual = struct_codec.decode(raw)
+        record_actual = struct_codec.decode(pickle.loads(pickle.dumps(record)))
+
+        # Test
+        assert raw.startswith(struct_codec.StructCodec.MAGIC)
+        assert raw_actual == raw
+        assert record_actual.label == "up"
@@ -0,0 +1,250 @@
+"""
+Test combining attitude and position into telemetry.
+"""
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name,unused-argument
+
+
+class FakeConnection:
+    """
+    Returns the given messages in turn, then None as if timed out.
+    """
+
+    def __init__(self) -> None:
+        self.messages: "list[object]" = []
+
+    def recv_match(self, **kwargs: object) -> object:
+        """
+        Returns the next message, or None after the last.
+        """
+        if len(self.messages) == 0:
+            return None
+
+        return self.messages.pop(0)
+
+
+class FakeClock:
+    """
+    Time that only moves when told to.
+    """
+
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def time(self) -> float:
+        """
+        Returns the current time in seconds.
+        """
+        return self.now
+
+
+@pytest.fixture()
+def connection() -> FakeConnection:  # type: ignore
+    """
+    Connection without messages.
+    """
+    yield FakeConnection()  # type: ignore
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:  # type: ignore
+    """
+    Clock read by telemetry as the receive time of each message.
+    """
+    fake_clock = FakeClock()
+    monkeypatch.setattr(telemetry.time, "time", fake_clock.time)
+    yield fake_clock  # type: ignore
+
+
+def create_telemetry(
+    connection: FakeConnection, local_logger: logger.Logger, pool_size: int = 0
+) -> telemetry.Telemetry:
+    """
+    Telemetry reading from the fake connection.
+    """
+    result, instance = telemetry.Telemetry.create(
+        connection, local_logger, pool_size  # type: ignore
+    )
+    assert result
+    assert instance is not None
+
+    return instance
+
+
+def attitude(time_boot_ms: int, yaw: float = 1.57) -> object:
+    """
+    Attitude message.
+    """
+    return mavutil.mavlink.MAVLink_attitude_message(
+        time_boot_ms, 0.01, 0.02, yaw, 0.001, 0.002, 0.003
+    )
+
+
+def position(time_boot_ms: int, x: float = 1.0) -> object:
+    """
+    Local position message.
+    """
+    return mavutil.mavlink.MAVLink_local_position_ned_message(
+        time_boot_ms, x, 2.0, -3.0, 0.1, 0.2, 0.3
+    )
+
+
+class TestTelemetry:
+    """
+    Telemetry tests.
+    """
+
+    def test_not_ready(
+        self, connection: FakeConnection, local_logger: logger.Logger, clock: FakeClock
+    ) -> None:
+        """
+        Not ready until both an attitude and a position have been received.
+        """
+        # Setup
+        instance = create_telemetry(connection, local_logger)
+        connection.messages = [attitude(100), attitude(120)]
+
+        # Run
+        first = instance.run()
+        second = instance.run()
+
+        # Test
+        assert first == "Not Ready"
+        assert second == "Not Ready"
+
+    def test_combined(
+        self, connection: FakeConnection, local_logger: logger.Logger, clock: FakeClock
+    ) -> None:
+        """
+        An attitude and a position are combined with the most recent timestamp.
+        """
+        # Setup
+        instance = create_telemetry(connection, local_logger)
+        connection.messages = [attitude(100), position(140), attitude(160)]
+
+        # Run
+        instance.run()
+        clock.now += 0.5
+        output = instance.run()
+        # Both were used, so a single message is not ready again
+        after = instance.run()
+
+        # Test
+        assert isinstance(output, telemetry.TelemetryData)
+        assert output.time_since_boot == 140
+        assert output.x == 1.0
+        assert output.z == -3.0
+        assert output.z_velocity == pytest.approx(0.3)
+        assert output.yaw == pytest.approx(1.57)
+        assert output.yaw_speed == pytest.approx(0.003)
+        assert after == "Not Ready"
+
+    def test_timed_out(
+        self, connection: FakeConnection, local_logger: logger.Logger, clock: FakeClock
+    ) -> None:
+        """
+        No message discards the one waiting to be combined.
+        """
+        # Setup
+        instance = create_telemetry(connection, local_logger)
+        connection.messages = [attitude(100)]
+
+        # Run
+        instance.run()
+        timed_out = instance.run()
+        connection.messages = [position(120)]
+        after = instance.run()
+
+        # Test
+        assert timed_out is None
+        assert after == "Not Ready"
+
+    def test_stale_time_since_boot(
+        self, connection: FakeConnection, local_logger: logger.Logger, clock: FakeClock
+    ) -> None:
+        """
+        Messages stamped a second or more apart by the drone are not combined.
+        """
+        # Setup
+        instance = create_telemetry(connection, local_logger)
+        connection.messages = [attitude(100), position(1_100), attitude(1_120)]
+
+        # Run
+        instance.run()
+        stale = instance.run()
+        fresh = instance.run()
+
+        # Test
+        assert stale is None
+        assert isinstance(fresh, telemetry.TelemetryData)
+        assert fresh.time_since_boot == 1_120
+
+    def test_stale_received(
+        self, connection: FakeConnection, local_logger: logger.Logger, clock: FakeClock
+    ) -> None:
+        """
+        A message received more than a second before the other is not combined.
+        """
+        # Setup
+        instance = create_telemetry(connection, local_logger)
+        connection.messages = [position(100), attitude(120), position(140)]
+
+        # Run
+        instance.run()
+        clock.now += 1.5
+        stale = instance.run()
+        fresh = instance.run()
+
+        # Test
+        assert stale is None
+        assert isinstance(fresh, telemetry.TelemetryData)
+        assert fresh.time_since_boot == 140
+
+    def test_pool_reused(
+        self, connection: FakeConnection, local_logger: logger.Logger, clock: FakeClock
+    ) -> None:
+        """
+        Outputs are taken from the pool in turn, each holding the latest values.
+        """
+        # Setup
+        instance = create_telemetry(connection, local_logger, 2)
+        connection.messages = []
+        for i in range(3):
+            connection.messages += [attitude(i * 100, yaw=i), position(i * 100 + 20, x=i)]
+
+        # Run
+        outputs = []
+        for _ in range(3):
+            instance.run()
+            outputs.append(instance.run())
+
+        # Test
+        assert all(isinstance(output, telemetry.TelemetryData) for output in outputs)
+        assert outputs[0] is outputs[2]
+        assert outputs[0] is not outputs[1]
+        assert outputs[1].x == 1
+        assert outputs[2].x == 2
+        assert outputs[2].yaw == 2
+        assert outputs[2].time_since_boot == 220
+
+    def test_invalid_pool_size(
+        self, connection: FakeConnection, local_logger: logger.Logger
+    ) -> None:
+        """
+        A negative pool size is rejected.
+        """
+        # Run
+        result, instance = telemetry.Telemetry.create(connection, local_logger, -1)  # type: ignore
+
+        # Test
+        assert not result
+        assert instance is None
@@ -0,0 +1,158 @@
+"""
+Test scaling worker counts with queue depth.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_autoscaler
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+SAMPLE_PERIOD = 0.1  # seconds
+# Longest wait for the stage to reach a worker count
+SCALE_TIMEOUT = 5.0  # seconds
+
+
+def consume_slowly(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker that gets single items, slower than they arrive.
+    Waits a bounded time for each, so that it can be retired while the queue is empty.
+    """
+    while not controller.is_exit_requested():
+        try:
+            input_queue.queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+        time.sleep(0.02)
+
+
+def create_manager(
+    count: int,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> worker_manager.WorkerManager:
+    """
+    Manager of slow consumers of the queue.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        count, consume_slowly, (), [input_queue], [], controller, local_logger
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+def create_autoscaler(
+    manager: worker_manager.WorkerManager, local_logger: logger.Logger
+) -> worker_autoscaler.WorkerAutoscaler:
+    """
+    Autoscaler of 1 to 2 workers, reacting after 2 samples.
+    """
+    result, autoscaler = worker_autoscaler.WorkerAutoscaler.create(local_logger, SAMPLE_PERIOD)
+    assert result
+    assert autoscaler is not None
+
+    assert autoscaler.add_stage(manager, 1, 2, 10, 0, 2, 2)
+
+    return autoscaler
+
+
+def sample_until(
+    autoscaler: worker_autoscaler.WorkerAutoscaler, worker_count: int
+) -> worker_autoscaler.StageStatus:
+    """
+    Returns the status of the stage once it has the number of active workers,
+    or when the wait times out.
+    """
+    deadline = time.monotonic() + SCALE_TIMEOUT
+    while True:
+        time.sleep(SAMPLE_PERIOD)
+        autoscaler.sample()
+        status = autoscaler.get_status()[0]
+        if status.worker_count == worker_count or time.monotonic() > deadline:
+            return status
+
+
+class TestWorkerAutoscaler:
+    """
+    Autoscaler tests.
+    """
+
+    def test_scale_up(
+        self,
+        mp_manager: "mp.managers.SyncManager",
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        A worker is added while the queue stays deep and is being consumed by single gets.
+        """
+        # Setup
+        input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+        for i in range(200):
+            input_queue.queue.put(i)
+        manager = create_manager(1, input_queue, controller, local_logger)
+        autoscaler = create_autoscaler(manager, local_logger)
+        manager.start_workers()
+
+        # Run
+        status = sample_until(autoscaler, 2)
+        controller.request_exit()
+        manager.join_workers(5.0)
+
+        # Test
+        assert status.worker_count == 2
+        assert status.queue_depth >= 10
+        assert status.throughput > 0.0
+        assert manager.get_worker_count() == 2
+        assert input_queue.get_consumed_count() > 0
+
+    def test_scale_down(
+        self,
+        mp_manager: "mp.managers.SyncManager",
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        A worker is retired while the queue stays empty, and removed once it has exited.
+        """
+        # Setup
+        input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+        manager = create_manager(2, input_queue, controller, local_logger)
+        autoscaler = create_autoscaler(manager, local_logger)
+        manager.start_workers()
+
+        # Run
+        status = sample_until(autoscaler, 1)
+        deadline = time.monotonic() + SCALE_TIMEOUT
+        while manager.get_worker_count() > 1 and time.monotonic() < deadline:
+            time.sleep(SAMPLE_PERIOD)
+            autoscaler.sample()
+        controller.request_exit()
+        manager.join_workers(5.0)
+
+        # Test
+        assert status.worker_count == 1
+        assert status.queue_depth == 0
+        assert manager.get_worker_count() == 1
+        assert manager.get_active_worker_count() == 1
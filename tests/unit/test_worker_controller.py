@@ -0,0 +1,274 @@
+"""
+Test the worker controller.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+
+import pytest
+
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+WORKER_COUNT = 3
+
+
+def loop_until_exit(controller: worker_controller.WorkerController) -> None:
+    """
+    Minimal worker loop that acknowledges exit.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+    controller.acknowledge_exit()
+
+
+def wait_while_paused(
+    controller: worker_controller.WorkerController, waiting: "mp.synchronize.Event"
+) -> None:
+    """
+    Worker that checks its pause once.
+    """
+    waiting.set()
+    controller.check_pause()
+
+
+class TestExitAcknowledgement:
+    """
+    Exit requests and acknowledgements.
+    """
+
+    def test_all_acknowledge(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Every worker acknowledges after exit is requested.
+        """
+        # Setup
+        workers = [
+            mp.Process(target=loop_until_exit, args=(controller,)) for _ in range(WORKER_COUNT)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Run
+        acknowledged_early = controller.wait_for_exit_acknowledgements(WORKER_COUNT, 0.0)
+        controller.request_exit()
+        acknowledged = controller.wait_for_exit_acknowledgements(WORKER_COUNT, 5.0)
+        for worker in workers:
+            worker.join()
+
+        # Test
+        assert not acknowledged_early
+        assert acknowledged
+        assert controller.get_exit_acknowledgement_count() == WORKER_COUNT
+
+    def test_clear(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Clearing resets the request and the acknowledgements.
+        """
+        # Setup
+        controller.request_exit()
+        controller.acknowledge_exit()
+
+        # Run
+        controller.clear_exit()
+
+        # Test
+        assert not controller.is_exit_requested()
+        assert controller.get_exit_acknowledgement_count() == 0
+
+
+class TestPause:
+    """
+    Pause and resume requests.
+    """
+
+    def test_exit_releases_paused_worker(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        A paused worker can still exit.
+        """
+        # Setup
+        controller.request_pause()
+        worker = mp.Process(target=loop_until_exit, args=(controller,))
+        worker.start()
+
+        # Run
+        controller.request_exit()
+        acknowledged_while_paused = controller.wait_for_exit_acknowledgements(1, 5.0)
+        worker.join()
+
+        # Test
+        assert acknowledged_while_paused
+
+    def test_killed_paused_worker(self, controller: worker_controller.WorkerController) -> None:
+        """
+        A worker killed while paused does not stall main changing requests.
+        """
+        # Setup
+        controller.request_pause()
+        waiting = mp.Event()
+        worker = mp.Process(target=wait_while_paused, args=(controller, waiting))
+        worker.start()
+        assert waiting.wait(5.0)
+        # Let the worker wait in check_pause()
+        time.sleep(0.1)
+        worker.kill()
+        worker.join()
+        main_thread = threading.Thread(
+            target=lambda: (controller.request_resume(), controller.clear_exit())
+        )
+
+        # Run
+        main_thread.start()
+        main_thread.join(1.0)
+
+        # Test
+        assert not main_thread.is_alive()
+
+    def test_pause_idempotent(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Repeated requests are harmless and resume clears the pause.
+        """
+        # Run
+        controller.request_pause()
+        controller.request_pause()
+        controller.request_resume()
+        controller.request_resume()
+        controller.check_pause()
+
+        # Test
+        assert not controller.is_exit_requested()
+
+
+class TestTargeting:
+    """
+    Requests for a group or a single worker of a group.
+    """
+
+    def test_exit_worker(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Only the targeted worker sees the exit request.
+        """
+        # Setup
+        view_a0 = controller.bind("a", 0)
+        view_a1 = controller.bind("a", 1)
+        view_b0 = controller.bind("b", 0)
+
+        # Run
+        controller.request_exit("a", 0)
+
+        # Test
+        assert view_a0.is_exit_requested()
+        assert not view_a1.is_exit_requested()
+        assert not view_b0.is_exit_requested()
+        assert not controller.is_exit_requested()
+
+    def test_pause_group(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Pausing a group does not pause other groups, and resuming the group releases it.
+        """
+        # Setup
+        view_a0 = controller.bind("a", 0)
+        view_b0 = controller.bind("b", 0)
+        controller.request_pause("a")
+        worker_a = mp.Process(target=loop_until_exit, args=(view_a0,))
+        worker_b = mp.Process(target=loop_until_exit, args=(view_b0,))
+        worker_a.start()
+        worker_b.start()
+
+        # Run
+        controller.request_exit("b")
+        b_exited = controller.wait_for_exit_acknowledgements(1, 5.0)
+        a_exited_early = controller.wait_for_exit_acknowledgements(2, 0.2)
+        controller.request_resume("a")
+        controller.request_exit("a")
+        a_exited = controller.wait_for_exit_acknowledgements(2, 5.0)
+        worker_a.join()
+        worker_b.join()
+
+        # Test
+        assert b_exited
+        assert not a_exited_early
+        assert a_exited
+
+    def test_global_reaches_bound(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Requests for all workers reach every bound view.
+        """
+        # Setup
+        views = [controller.bind("a", i) for i in range(WORKER_COUNT)]
+
+        # Run
+        controller.request_exit()
+
+        # Test
+        assert all(view.is_exit_requested() for view in views)
+
+    def test_slots_exhausted(self) -> None:
+        """
+        Binding more workers than there are slots fails.
+        """
+        # Setup
+        controller = worker_controller.WorkerController(2)
+        controller.bind("a", 0)
+
+        # Run and test
+        with pytest.raises(ValueError):
+            controller.bind("a", 1)
+
+
+class TestFirstIteration:
+    """
+    Recording the first loop iteration of each worker.
+    """
+
+    def test_recorded_once(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Only the worker's own first loop iteration is recorded.
+        """
+        # Setup
+        view = controller.bind("a", 0)
+        other_view = controller.bind("a", 1)
+        before = controller.get_first_iteration_time("a", 0)
+
+        # Run
+        view.check_pause()
+        first = controller.get_first_iteration_time("a", 0)
+        view.check_pause()
+        second = controller.get_first_iteration_time("a", 0)
+
+        # Test
+        assert before is None
+        assert first is not None
+        assert first == second
+        assert controller.get_first_iteration_time("a", 1) is None
+        assert other_view.get_first_iteration_time("a", 1) is None
+
+    def test_clear(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Clearing allows a restarted worker to record again.
+        """
+        # Setup
+        worker = mp.Process(target=loop_until_exit, args=(controller.bind("a", 0),))
+        worker.start()
+        deadline = time.monotonic() + 5.0
+        while controller.get_first_iteration_time("a", 0) is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        recorded = controller.get_first_iteration_time("a", 0)
+        controller.request_exit()
+        worker.join()
+
+        # Run
+        controller.clear_first_iteration_time("a", 0)
+
+        # Test
+        assert recorded is not None
+        assert controller.get_first_iteration_time("a", 0) is None
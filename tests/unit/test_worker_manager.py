@@ -0,0 +1,412 @@
+"""
+Test the worker manager.
+"""
+
+import errno
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access module privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+# Longest a worker that ignores exit runs, so that none outlives the tests
+IGNORE_DURATION = 10.0  # seconds
+JOIN_TIMEOUT = 0.2  # seconds
+ESCALATION_TIMEOUT = 1.0  # seconds
+
+
+def return_immediately(
+    controller: worker_controller.WorkerController,  # pylint: disable=unused-argument
+) -> None:
+    """
+    Worker that ends right away.
+    """
+
+
+def loop_until_exit(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker that leaves once exit is requested.
+    """
+    while not controller.is_exit_requested():
+        time.sleep(0.01)
+
+
+def set_on_start(
+    started: "mp.synchronize.Event",
+    controller: worker_controller.WorkerController,  # pylint: disable=unused-argument
+) -> None:
+    """
+    Worker that records that it ran.
+    """
+    started.set()
+
+
+def ignore_exit(
+    started: "mp.synchronize.Event | threading.Event",
+    stop: "mp.synchronize.Event | threading.Event",
+    controller: worker_controller.WorkerController,  # pylint: disable=unused-argument
+) -> None:
+    """
+    Worker that keeps running after exit is requested, until stopped.
+    """
+    started.set()
+    stop.wait(IGNORE_DURATION)
+
+
+def ignore_sigterm(
+    started: "mp.synchronize.Event",
+    stop: "mp.synchronize.Event",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker that also keeps running when terminated.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    ignore_exit(started, stop, controller)
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+    execution_mode: worker_manager.ExecutionMode,
+    start_method: "str | None" = None,
+    work_arguments: "tuple" = (),
+) -> worker_manager.WorkerManager:
+    """
+    Manager of a single worker of the target.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, work_arguments, [], [], controller, local_logger
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(
+        properties, local_logger, start_method, execution_mode=execution_mode
+    )
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+class TestThreadWorker:
+    """
+    Workers that run in a thread of main.
+    """
+
+    def test_sentinel_with_forked_process(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        The end of a thread worker is seen while a process forked after it still runs.
+        """
+        # Setup
+        thread_manager = create_manager(
+            return_immediately, controller, local_logger, worker_manager.ExecutionMode.THREAD
+        )
+        process_manager = create_manager(
+            loop_until_exit,
+            controller,
+            local_logger,
+            worker_manager.ExecutionMode.PROCESS,
+            "fork",
+        )
+        thread_worker = thread_manager.get_workers()[0]
+
+        # Run
+        # Forked while the thread worker's sentinel is open
+        process_manager.start_workers()
+        thread_manager.start_workers()
+        ready = multiprocessing.connection.wait([thread_worker.sentinel], 2.0)
+        process_alive = process_manager.get_workers()[0].is_alive()
+        reports = thread_manager.join_workers(1.0)
+        controller.request_exit()
+        process_manager.join_workers(5.0)
+
+        # Test
+        assert ready == [thread_worker.sentinel]
+        assert process_alive
+        assert reports[0].outcome == worker_manager.JoinOutcome.EXITED
+        assert reports[0].exit_code == 0
+
+
+class TestJoinWorkers:
+    """
+    Joining with escalation.
+    """
+
+    def test_exited(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A worker that leaves when asked is reported as exited.
+        """
+        # Setup
+        manager = create_manager(
+            loop_until_exit, controller, local_logger, worker_manager.ExecutionMode.PROCESS
+        )
+        manager.start_workers()
+
+        # Run
+        controller.request_exit()
+        reports = manager.join_workers(5.0, ESCALATION_TIMEOUT)
+
+        # Test
+        assert len(reports) == 1
+        assert reports[0].index == 0
+        assert reports[0].pid == manager.get_workers()[0].pid
+        assert reports[0].outcome == worker_manager.JoinOutcome.EXITED
+        assert reports[0].exit_code == 0
+
+    def test_terminated(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A worker that ignores exit is terminated after the timeout.
+        """
+        # Setup
+        started = mp.Event()
+        manager = create_manager(
+            ignore_exit,
+            controller,
+            local_logger,
+            worker_manager.ExecutionMode.PROCESS,
+            work_arguments=(started, mp.Event()),
+        )
+        manager.start_workers()
+        assert started.wait(5.0)
+
+        # Run
+        controller.request_exit()
+        reports = manager.join_workers(JOIN_TIMEOUT, ESCALATION_TIMEOUT)
+
+        # Test
+        assert reports[0].outcome == worker_manager.JoinOutcome.TERMINATED
+        assert reports[0].exit_code == -signal.SIGTERM
+        assert JOIN_TIMEOUT <= reports[0].duration < JOIN_TIMEOUT + ESCALATION_TIMEOUT
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="Terminating is killing")
+    def test_killed(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A worker that also ignores being terminated is killed after the escalation timeout.
+        """
+        # Setup
+        started = mp.Event()
+        manager = create_manager(
+            ignore_sigterm,
+            controller,
+            local_logger,
+            worker_manager.ExecutionMode.PROCESS,
+            work_arguments=(started, mp.Event()),
+        )
+        manager.start_workers()
+        # Set once SIGTERM is ignored
+        assert started.wait(5.0)
+
+        # Run
+        controller.request_exit()
+        reports = manager.join_workers(JOIN_TIMEOUT, ESCALATION_TIMEOUT)
+
+        # Test
+        assert reports[0].outcome == worker_manager.JoinOutcome.KILLED
+        assert reports[0].exit_code == -signal.SIGKILL
+        assert (
+            JOIN_TIMEOUT + ESCALATION_TIMEOUT
+            <= reports[0].duration
+            < JOIN_TIMEOUT + 2 * ESCALATION_TIMEOUT
+        )
+
+    def test_hung(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A thread worker that ignores exit cannot be ended and is reported as hung.
+        """
+        # Setup
+        started = threading.Event()
+        stop = threading.Event()
+        manager = create_manager(
+            ignore_exit,
+            controller,
+            local_logger,
+            worker_manager.ExecutionMode.THREAD,
+            work_arguments=(started, stop),
+        )
+        manager.start_workers()
+        assert started.wait(5.0)
+
+        # Run
+        controller.request_exit()
+        reports = manager.join_workers(JOIN_TIMEOUT, ESCALATION_TIMEOUT)
+        stop.set()
+        manager.join_workers(5.0)
+
+        # Test
+        assert reports[0].outcome == worker_manager.JoinOutcome.HUNG
+        assert reports[0].exit_code is None
+        # Threads are not escalated
+        assert JOIN_TIMEOUT <= reports[0].duration < JOIN_TIMEOUT + ESCALATION_TIMEOUT
+
+
+class TestScheduling:
+    """
+    Validating and applying CPU affinity, nice value and real time priority.
+    """
+
+    @pytest.mark.parametrize(
+        "cpu_affinity,nice,fifo_priority",
+        [
+            (set(), None, None),
+            ({0, -1}, None, None),
+            (None, -21, None),
+            (None, 20, None),
+            (None, None, 0),
+            (None, None, 100),
+        ],
+    )
+    def test_create_invalid(
+        self,
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+        cpu_affinity: "set[int] | None",
+        nice: "int | None",
+        fifo_priority: "int | None",
+    ) -> None:
+        """
+        Settings out of range are rejected.
+        """
+        # Run
+        result, properties = worker_manager.WorkerProperties.create(
+            1,
+            return_immediately,
+            (),
+            [],
+            [],
+            controller,
+            local_logger,
+            cpu_affinity=cpu_affinity,
+            nice=nice,
+            fifo_priority=fifo_priority,
+        )
+
+        # Test
+        assert not result
+        assert properties is None
+
+    def test_create_valid(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        Settings at the ends of their ranges are accepted.
+        """
+        # Run
+        result, properties = worker_manager.WorkerProperties.create(
+            1,
+            return_immediately,
+            (),
+            [],
+            [],
+            controller,
+            local_logger,
+            cpu_affinity={0},
+            nice=19,
+            fifo_priority=99,
+        )
+        default_result, default_properties = worker_manager.WorkerProperties.create(
+            1, return_immediately, (), [], [], controller, local_logger, nice=-20, fifo_priority=1
+        )
+
+        # Test
+        assert result
+        assert properties is not None
+        assert properties.get_scheduling() == ({0}, 19, 99)
+        assert default_result
+        assert default_properties is not None
+
+    def test_fifo_refused(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        A real time priority refused for lack of privileges is reported, not raised.
+        """
+
+        # Setup
+        def refuse(*args: object) -> None:  # pylint: disable=unused-argument
+            raise PermissionError(errno.EPERM, os.strerror(errno.EPERM))
+
+        monkeypatch.setattr(os, "sched_setscheduler", refuse, raising=False)
+
+        # Run
+        failures = worker_manager._apply_scheduling(None, None, 50)
+
+        # Test
+        assert len(failures) == 1
+        assert failures[0].startswith("SCHED_FIFO priority 50 not applied")
+        assert os.strerror(errno.EPERM) in failures[0]
+
+    @pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="No CPU affinity")
+    def test_affinity_refused(self) -> None:
+        """
+        An affinity to a CPU that does not exist is refused by the OS and reported.
+        """
+        # Setup
+        cpu = os.cpu_count() + 4096  # type: ignore
+        before = os.sched_getaffinity(0)
+
+        # Run
+        failures = worker_manager._apply_scheduling({cpu}, None, None)
+
+        # Test
+        assert len(failures) == 1
+        assert failures[0].startswith(f"CPU affinity [{cpu}] not applied")
+        assert os.sched_getaffinity(0) == before
+
+    @pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="No CPU affinity")
+    def test_refused_worker_still_runs(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A worker whose affinity the OS refuses, with a CPU that does not exist, runs anyway.
+        """
+        # Setup
+        started = mp.Event()
+        result, properties = worker_manager.WorkerProperties.create(
+            1,
+            set_on_start,
+            (started,),
+            [],
+            [],
+            controller,
+            local_logger,
+            cpu_affinity={os.cpu_count() + 4096},  # type: ignore
+        )
+        assert result
+        assert properties is not None
+        result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+        assert result
+        assert manager is not None
+
+        # Run
+        manager.start_workers()
+        ran = started.wait(5.0)
+        reports = manager.join_workers(5.0)
+
+        # Test
+        assert ran
+        assert reports[0].outcome == worker_manager.JoinOutcome.EXITED
+        assert reports[0].exit_code == 0
@@ -0,0 +1,213 @@
+"""
+Test resource accounting from /proc.
+"""
+
+import multiprocessing as mp
+import os
+import threading
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_resources
+
+
+# Test functions use test fixture signature names and access module privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isdir("/proc/self/task"), reason="Resource monitoring needs /proc"
+)
+
+
+SAMPLE_PERIOD = 0.05  # seconds
+BUSY_DURATION = 0.3  # seconds
+
+
+def spin(duration: float) -> None:
+    """
+    Uses the CPU for the duration in seconds.
+    """
+    end_time = time.monotonic() + duration
+    while time.monotonic() < end_time:
+        pass
+
+
+def spin_until_exit(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker that uses the CPU until exit is requested.
+    """
+    while not controller.is_exit_requested():
+        spin(0.01)
+
+
+def return_immediately(
+    controller: worker_controller.WorkerController,  # pylint: disable=unused-argument
+) -> None:
+    """
+    Worker that ends right away.
+    """
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+    execution_mode: worker_manager.ExecutionMode,
+) -> worker_manager.WorkerManager:
+    """
+    Manager of a single worker of the target.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, (), [], [], controller, local_logger
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(
+        properties, local_logger, execution_mode=execution_mode
+    )
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+def create_monitor(
+    managers: "list[worker_manager.WorkerManager]", local_logger: logger.Logger
+) -> worker_resources.ResourceMonitor:
+    """
+    Monitor sampling quickly, without summaries.
+    """
+    result, monitor = worker_resources.ResourceMonitor.create(
+        managers, local_logger, None, SAMPLE_PERIOD, 100, None
+    )
+    assert result
+    assert monitor is not None
+
+    return monitor
+
+
+class TestReadCounters:
+    """
+    Reading the counters of a process or thread.
+    """
+
+    def test_current_process(self) -> None:
+        """
+        The CPU time of this process grows while it is busy, and it has resident memory.
+        """
+        # Run
+        first = worker_resources._read_counters("/proc/self")
+        spin(BUSY_DURATION)
+        second = worker_resources._read_counters("/proc/self")
+
+        # Test
+        assert second[0] > first[0]
+        assert second[1] > 0
+        assert all(counter >= 0 for counter in second)
+
+    def test_thread(self) -> None:
+        """
+        A busy thread is read from its task directory, with its own CPU time.
+        """
+        # Setup
+        native_ids = []
+        stop = threading.Event()
+
+        def spin_until_stopped() -> None:
+            native_ids.append(threading.get_native_id())
+            while not stop.is_set():
+                spin(0.01)
+
+        thread = threading.Thread(target=spin_until_stopped)
+        thread.start()
+        # Main waits, so that the CPU time is the thread's
+        time.sleep(BUSY_DURATION)
+
+        # Run
+        counters = worker_resources._read_counters(f"/proc/self/task/{native_ids[0]}")
+        stop.set()
+        thread.join()
+
+        # Test
+        assert counters[0] > 0
+        # Memory is shared with the process
+        assert counters[1] > 0
+
+    def test_reaped_process(self) -> None:
+        """
+        A process that has been reaped has no counters.
+        """
+        # Setup
+        process = mp.Process(target=time.sleep, args=(0.0,))
+        process.start()
+        process.join()
+
+        # Run
+        with pytest.raises(FileNotFoundError):
+            worker_resources._read_counters(f"/proc/{process.pid}")
+
+
+class TestResourceMonitor:
+    """
+    Sampling workers in the background.
+    """
+
+    def test_thread_worker(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A busy thread worker is sampled with its CPU use.
+        """
+        # Setup
+        manager = create_manager(
+            spin_until_exit, controller, local_logger, worker_manager.ExecutionMode.THREAD
+        )
+        manager.start_workers()
+        monitor = create_monitor([manager], local_logger)
+
+        # Run
+        monitor.start()
+        time.sleep(BUSY_DURATION)
+        monitor.stop()
+        controller.request_exit()
+        manager.join_workers(5.0)
+        reports = monitor.get_resource_report()
+
+        # Test
+        assert len(reports) == 1
+        assert reports[0].pid == os.getpid()
+        assert len(reports[0].samples) > 0
+        assert sum(sample.cpu_percent for sample in reports[0].samples) > 0.0
+        assert reports[0].samples[-1].rss > 0
+
+    def test_reaped_worker(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A process worker that has ended and been reaped is skipped without samples.
+        """
+        # Setup
+        manager = create_manager(
+            return_immediately, controller, local_logger, worker_manager.ExecutionMode.PROCESS
+        )
+        manager.start_workers()
+        manager.join_workers(5.0)
+        monitor = create_monitor([manager], local_logger)
+
+        # Run
+        monitor.start()
+        time.sleep(SAMPLE_PERIOD * 4)
+        monitor.stop()
+        reports = monitor.get_resource_report()
+
+        # Test
+        assert len(reports) == 1
+        assert reports[0].pid == manager.get_workers()[0].pid
+        assert len(reports[0].samples) == 0
@@ -0,0 +1,150 @@
+"""
+Test acknowledged shutdown of workers.
+"""
+
+import multiprocessing as mp
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_shutdown
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+SHUTDOWN_TIMEOUT = 0.5  # seconds
+# Longest a worker that ignores exit runs, so that none outlives the tests
+IGNORE_DURATION = 10.0  # seconds
+
+
+def produce_forever(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker that blocks putting into its full queue.
+    """
+    while not controller.is_exit_requested():
+        output_queue.queue.put(1)
+
+
+def consume_forever(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker that blocks getting from its empty queue.
+    """
+    while not controller.is_exit_requested():
+        input_queue.queue.get()
+
+
+def ignore_exit(
+    started: "mp.synchronize.Event",
+    controller: worker_controller.WorkerController,  # pylint: disable=unused-argument
+) -> None:
+    """
+    Worker that keeps running after exit is requested, never acknowledging.
+    """
+    started.set()
+    time.sleep(IGNORE_DURATION)
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    work_arguments: "tuple",
+    input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> worker_manager.WorkerManager:
+    """
+    Manager of a single worker of the target.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, work_arguments, input_queues, output_queues, controller, local_logger
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+class TestShutdownWorkers:
+    """
+    Shutdown tests.
+    """
+
+    def test_acknowledged(
+        self,
+        mp_manager: "mp.managers.SyncManager",
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Workers blocked on their queues are unblocked, acknowledge and exit.
+        """
+        # Setup
+        full_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 1)
+        empty_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 1)
+        producer = create_manager(produce_forever, (), [], [full_queue], controller, local_logger)
+        consumer = create_manager(consume_forever, (), [empty_queue], [], controller, local_logger)
+        consumer.start_workers()
+        producer.start_workers()
+        # Let the producer fill its queue and block
+        time.sleep(0.5)
+
+        # Run
+        start_time = time.monotonic()
+        result = worker_shutdown.shutdown_workers(
+            controller,
+            [producer, consumer],
+            [full_queue, empty_queue],
+            SHUTDOWN_TIMEOUT,
+            local_logger,
+        )
+        duration = time.monotonic() - start_time
+
+        # Test
+        assert result
+        assert controller.get_exit_acknowledgement_count() == 2
+        assert duration < SHUTDOWN_TIMEOUT
+        assert full_queue.queue.empty()
+        assert empty_queue.queue.empty()
+
+    def test_not_acknowledged(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A worker that never acknowledges fails the shutdown within the timeout,
+        and is then ended by escalation.
+        """
+        # Setup
+        started = mp.Event()
+        manager = create_manager(ignore_exit, (started,), [], [], controller, local_logger)
+        manager.start_workers()
+        assert started.wait(5.0)
+
+        # Run
+        start_time = time.monotonic()
+        result = worker_shutdown.shutdown_workers(
+            controller, [manager], [], SHUTDOWN_TIMEOUT, local_logger
+        )
+        duration = time.monotonic() - start_time
+
+        # Test
+        assert not result
+        assert controller.get_exit_acknowledgement_count() == 0
+        assert manager.get_alive_worker_count() == 0
+        # Waiting for acknowledgements stops at the timeout, escalation is bounded after it
+        assert SHUTDOWN_TIMEOUT <= duration
+        assert duration < SHUTDOWN_TIMEOUT + 2 * worker_manager.JOIN_ESCALATION_TIMEOUT
@@ -0,0 +1,248 @@
+"""
+Test restarting dead workers.
+"""
+
+import multiprocessing as mp
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_supervisor
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+# Longest wait for the supervisor to reach a state
+STATE_TIMEOUT = 5.0  # seconds
+
+
+def crash_until(
+    crash_count: int,
+    start_count: "mp.sharedctypes.Synchronized[int]",
+    start_times: "mp.Queue[float]",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Crashes on each of the first crash_count starts, then runs until exit is requested.
+    Counts and records the time of each start.
+    """
+    start_times.put(time.monotonic())
+    with start_count.get_lock():
+        start_count.value += 1
+        crash = start_count.value <= crash_count
+
+    if crash:
+        raise RuntimeError("Crashing on purpose")
+
+    while not controller.is_exit_requested():
+        time.sleep(0.01)
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    work_arguments: "tuple",
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+    execution_mode: worker_manager.ExecutionMode = worker_manager.ExecutionMode.PROCESS,
+) -> worker_manager.WorkerManager:
+    """
+    Manager of a single worker of the target.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, work_arguments, [], [], controller, local_logger
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(
+        properties, local_logger, execution_mode=execution_mode
+    )
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+def create_supervisor(
+    managers: "list[worker_manager.WorkerManager]",
+    local_logger: logger.Logger,
+    max_restarts: int,
+) -> worker_supervisor.WorkerSupervisor:
+    """
+    Supervisor with a short backoff.
+    """
+    result, supervisor = worker_supervisor.WorkerSupervisor.create(
+        managers, local_logger, 0.05, 1.0, max_restarts, 60.0
+    )
+    assert result
+    assert supervisor is not None
+
+    return supervisor
+
+
+def wait_for_state(
+    supervisor: worker_supervisor.WorkerSupervisor, state: worker_supervisor.WorkerState
+) -> "worker_supervisor.WorkerStatus":
+    """
+    Returns the status of the first worker once it is in the state, or when the wait times out.
+    """
+    deadline = time.monotonic() + STATE_TIMEOUT
+    while True:
+        status = supervisor.get_status()[0]
+        if status.state == state or time.monotonic() > deadline:
+            return status
+
+        time.sleep(0.01)
+
+
+def get_start_times(start_times: "mp.Queue[float]") -> "list[float]":
+    """
+    Returns every recorded start time.
+    """
+    times = []
+    while not start_times.empty():
+        times.append(start_times.get())
+
+    return times
+
+
+def stop(
+    supervisor: worker_supervisor.WorkerSupervisor,
+    manager: worker_manager.WorkerManager,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Stops supervising, then the workers.
+    """
+    supervisor.stop()
+    controller.request_exit()
+    manager.join_workers(5.0)
+
+
+class TestWorkerSupervisor:
+    """
+    Supervisor tests.
+    """
+
+    def test_restart(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A worker that crashes is restarted and keeps running.
+        """
+        # Setup
+        start_times: "mp.Queue[float]" = mp.Queue()
+        manager = create_manager(
+            crash_until, (1, mp.Value("i", 0), start_times), controller, local_logger
+        )
+        supervisor = create_supervisor([manager], local_logger, 5)
+        manager.start_workers()
+        first_pid = manager.get_workers()[0].pid
+
+        # Run
+        supervisor.start()
+        time.sleep(0.5)
+        status = wait_for_state(supervisor, worker_supervisor.WorkerState.RUNNING)
+        stop(supervisor, manager, controller)
+
+        # Test
+        assert status.state == worker_supervisor.WorkerState.RUNNING
+        assert status.restart_count == 1
+        assert status.last_exit_code == 1
+        assert status.pid != first_pid
+        assert len(get_start_times(start_times)) == 2
+
+    def test_backoff_and_budget(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        Each restart waits twice as long as the last, and a worker over budget is given up on.
+        """
+        # Setup
+        start_times: "mp.Queue[float]" = mp.Queue()
+        manager = create_manager(
+            crash_until, (100, mp.Value("i", 0), start_times), controller, local_logger
+        )
+        supervisor = create_supervisor([manager], local_logger, 3)
+        manager.start_workers()
+
+        # Run
+        supervisor.start()
+        status = wait_for_state(supervisor, worker_supervisor.WorkerState.FAILED)
+        stop(supervisor, manager, controller)
+        times = get_start_times(start_times)
+
+        # Test
+        assert status.state == worker_supervisor.WorkerState.FAILED
+        assert status.restart_count == 3
+        assert status.last_exit_code == 1
+        # First start and 3 restarts
+        assert len(times) == 4
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        for gap, backoff in zip(gaps, [0.05, 0.1, 0.2]):
+            assert gap >= backoff
+        assert gaps[0] < gaps[1] < gaps[2]
+
+    def test_exit_not_restarted(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A worker that leaves after exit is requested is not restarted.
+        """
+        # Setup
+        start_times: "mp.Queue[float]" = mp.Queue()
+        manager = create_manager(
+            crash_until, (0, mp.Value("i", 0), start_times), controller, local_logger
+        )
+        supervisor = create_supervisor([manager], local_logger, 5)
+        manager.start_workers()
+        supervisor.start()
+
+        # Run
+        controller.request_exit()
+        status = wait_for_state(supervisor, worker_supervisor.WorkerState.EXITED)
+        stop(supervisor, manager, controller)
+
+        # Test
+        assert status.state == worker_supervisor.WorkerState.EXITED
+        assert status.restart_count == 0
+        assert status.last_exit_code == 0
+        assert len(get_start_times(start_times)) == 1
+
+    def test_thread_death_with_forked_process(
+        self, controller: worker_controller.WorkerController, local_logger: logger.Logger
+    ) -> None:
+        """
+        A dead thread worker is seen while a process forked after it still runs.
+        """
+        # Setup
+        thread_start_times: "mp.Queue[float]" = mp.Queue()
+        process_start_times: "mp.Queue[float]" = mp.Queue()
+        thread_manager = create_manager(
+            crash_until,
+            (100, mp.Value("i", 0), thread_start_times),
+            controller,
+            local_logger,
+            worker_manager.ExecutionMode.THREAD,
+        )
+        process_manager = create_manager(
+            crash_until, (0, mp.Value("i", 0), process_start_times), controller, local_logger
+        )
+        supervisor = create_supervisor([thread_manager, process_manager], local_logger, 0)
+
+        # Run
+        process_manager.start_workers()
+        thread_manager.start_workers()
+        supervisor.start()
+        status = wait_for_state(supervisor, worker_supervisor.WorkerState.FAILED)
+        process_alive = process_manager.get_workers()[0].is_alive()
+        stop(supervisor, process_manager, controller)
+
+        # Test
+        assert status.state == worker_supervisor.WorkerState.FAILED
+        assert status.last_exit_code == 1
+        assert process_alive
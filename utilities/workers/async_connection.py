@@ -0,0 +1,221 @@
+"""
+Sharing one MAVLink connection between coroutines of one event loop.
+"""
+
+import asyncio
+import collections
+import socket
+
+from pymavlink import mavutil
+
+
+class StageConnection:
+    """
+    View of an AsyncConnection for one stage, passed to the stage in place of the connection.
+
+    recv_match() and wait_heartbeat() never block: they return a message the reader already
+    routed to this stage, or None. Await wait_message() first so they have one to return.
+    Sending through mav goes straight to the shared connection.
+    """
+
+    def __init__(
+        self, connection: mavutil.mavfile, message_types: "list[str]", max_size: int
+    ) -> None:
+        """
+        connection: Shared connection, used for sending.
+        message_types: Types of the messages routed to this stage.
+        max_size: Most messages kept, the oldest are dropped past it.
+        """
+        self.mav = connection.mav
+        self.message_types = message_types
+        self.__messages: "collections.deque[object]" = collections.deque(maxlen=max_size)
+        self.__message_arrived = asyncio.Event()
+        self.__dropped_count = 0
+
+    def deliver(self, message: object) -> None:
+        """
+        Called by the reader with a message of one of the types of this stage.
+        """
+        if len(self.__messages) == self.__messages.maxlen:
+            self.__dropped_count += 1
+
+        self.__messages.append(message)
+        self.__message_arrived.set()
+
+    async def wait_message(self, timeout: "float | None" = None) -> bool:
+        """
+        Waits until a message has been routed to this stage.
+
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Returns whether a message is waiting.
+        """
+        if len(self.__messages) == 0:
+            self.__message_arrived.clear()
+            try:
+                await asyncio.wait_for(self.__message_arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+
+        return True
+
+    def recv_match(
+        self,
+        condition: "str | None" = None,
+        type: "str | list[str] | None" = None,  # pylint: disable=redefined-builtin
+        blocking: bool = False,  # pylint: disable=unused-argument
+        timeout: "float | None" = None,  # pylint: disable=unused-argument
+    ) -> "object | None":
+        """
+        Same arguments as mavfile.recv_match(), blocking and timeout are ignored.
+
+        Returns the oldest waiting message of the type, dropping older messages of other types,
+        or None if there is none.
+        """
+        if type is not None and not isinstance(type, list):
+            type = [type]
+
+        while len(self.__messages) > 0:
+            message = self.__messages.popleft()
+            message_type = message.get_type()  # type: ignore
+            if type is not None and message_type not in type:
+                continue
+
+            if not mavutil.evaluate_condition(condition, {message_type: message}):
+                continue
+
+            return message
+
+        return None
+
+    def wait_heartbeat(
+        self, blocking: bool = True, timeout: "float | None" = None
+    ) -> "object | None":
+        """
+        Same arguments as mavfile.wait_heartbeat(), blocking and timeout are ignored.
+
+        Returns the oldest waiting heartbeat, or None if there is none.
+        """
+        return self.recv_match(type="HEARTBEAT", blocking=blocking, timeout=timeout)
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of messages dropped because the stage fell behind.
+        """
+        return self.__dropped_count
+
+
+class AsyncConnection:
+    """
+    Reads a non-blocking MAVLink connection from the event loop whenever its file descriptor
+    is readable, and routes each message by type to the stages that asked for it.
+
+    Only for connections with a pollable descriptor that mavutil reads without blocking,
+    which includes tcp and udp. Reading stops and the link is down once the peer closes
+    or resets a tcp connection, as mavutil does not reconnect from the event loop.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(cls, connection: mavutil.mavfile) -> "tuple[bool, AsyncConnection | None]":
+        """
+        connection: Connection to share, with no other readers.
+
+        Returns whether the connection can be read from the event loop and the wrapper.
+        """
+        if connection is None or getattr(connection, "fd", None) is None:
+            return False, None
+
+        return True, AsyncConnection(cls.__create_key, connection)
+
+    def __init__(self, class_private_create_key: object, connection: mavutil.mavfile) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is AsyncConnection.__create_key, "Use create() method"
+
+        self.__connection = connection
+        self.__stages: "dict[str, list[StageConnection]]" = {}
+        self.__loop: "asyncio.AbstractEventLoop | None" = None
+        self.__link_up = True
+
+    def subscribe(self, message_types: "list[str]", max_size: int = 16) -> StageConnection:
+        """
+        Creates a view of the connection for a stage.
+
+        message_types: Types of the messages routed to the stage.
+        max_size: Most messages the stage can fall behind by before the oldest are dropped.
+
+        Returns the view.
+        """
+        stage = StageConnection(self.__connection, message_types, max(max_size, 1))
+        for message_type in message_types:
+            self.__stages.setdefault(message_type, []).append(stage)
+
+        return stage
+
+    def start(self) -> None:
+        """
+        Starts reading. Call from a coroutine running in the event loop.
+        """
+        self.__loop = asyncio.get_running_loop()
+        self.__loop.add_reader(self.__connection.fd, self.__read)
+        # Messages parsed before starting are still buffered in mavutil
+        self.__read()
+
+    def stop(self) -> None:
+        """
+        Stops reading.
+        """
+        if self.__loop is None:
+            return
+
+        self.__loop.remove_reader(self.__connection.fd)
+        self.__loop = None
+
+    def is_link_up(self) -> bool:
+        """
+        Returns whether the peer has not closed the connection.
+        """
+        return self.__link_up
+
+    def __is_closed_by_peer(self) -> bool:
+        """
+        Returns whether a stream connection is at end of file, which mavutil
+        does not report. A closed descriptor stays readable, so it must stop being read.
+        """
+        port = getattr(self.__connection, "port", None)
+        if not isinstance(port, socket.socket) or port.type != socket.SOCK_STREAM:
+            return False
+
+        try:
+            return len(port.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)) == 0
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+
+    def __read(self) -> None:
+        """
+        Routes every message that can be parsed without blocking.
+        Stops reading once the peer has closed the connection.
+        """
+        while True:
+            try:
+                message = self.__connection.recv_msg()
+            except OSError:
+                # Reset by the peer
+                self.__link_up = False
+                self.stop()
+                return
+
+            if message is None:
+                if self.__is_closed_by_peer():
+                    self.__link_up = False
+                    self.stop()
+
+                return
+
+            for stage in self.__stages.get(message.get_type(), []):
+                stage.deliver(message)
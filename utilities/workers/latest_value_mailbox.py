@@ -0,0 +1,225 @@
+"""
+Single slot channel that only keeps the latest value.
+"""
+
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import queue
+import struct
+import time
+
+from . import struct_codec
+
+
+class LatestValueMailbox:
+    """
+    Conflating channel: a put overwrites the previous value instead of queueing behind it.
+
+    The value is stored as a fixed-size record in shared memory and protected by a
+    sequence lock, so writers never wait for readers and readers never block writers.
+    Readers waiting for a new value poll the sequence rather than being signalled,
+    so a reader that is killed while waiting cannot stall writers.
+    The record type must have a codec registered with `struct_codec`.
+
+    Implements the subset of the `queue.Queue` interface used by workers.
+    `get()` returns a value only if it is newer than the last one this handle returned,
+    so every process holding a copy of the mailbox sees every version at most once.
+    """
+
+    # Header: sequence number, flags
+    __HEADER_FORMAT = struct.Struct("<QB")
+    __HEADER_SIZE = 16  # bytes, header padded for alignment
+    __SEQUENCE_FORMAT = struct.Struct("<Q")
+
+    __FLAG_SENTINEL = 0x1
+
+    # Attempts before yielding while a write is in progress
+    __SPIN_COUNT = 100
+    # Longest wait for a write in progress, a writer that died mid write never finishes it
+    __READ_TIMEOUT = 0.1  # seconds
+    # Time between checks for a new value while waiting for one
+    __POLL_PERIOD = 0.001  # seconds
+
+    def __init__(self, record_type: type) -> None:
+        """
+        Constructor allocates the shared memory block.
+
+        record_type: Class of the values, its registered codec provides the byte layout.
+        """
+        codec = struct_codec.get_codec(record_type)
+        if codec is None:
+            raise ValueError(f"No codec registered for {record_type}")
+
+        self.__record_type = record_type
+        self.__record_size = codec.record_size
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + self.__record_size,
+        )
+        self.__HEADER_FORMAT.pack_into(self.__shared_memory.buf, 0, 0, 0)
+
+        # Serializes writers only, readers never take it
+        self.__write_lock = mp.Lock()
+
+        self.__last_seen_version = 0
+
+    def __read_sequence(self) -> int:
+        """
+        Current sequence number, odd while a write is in progress.
+        """
+        return self.__SEQUENCE_FORMAT.unpack_from(self.__shared_memory.buf, 0)[0]
+
+    def __write_sequence(self, sequence: int) -> None:
+        """
+        Publishes the sequence number.
+        """
+        self.__SEQUENCE_FORMAT.pack_into(self.__shared_memory.buf, 0, sequence)
+
+    def __read_snapshot(self) -> "tuple[int, int, bytes] | None":
+        """
+        Consistent copy of the record.
+
+        Returns version, flags, and record bytes,
+        or None if a write stayed in progress for the read timeout.
+        """
+        attempts = 0
+        deadline = None
+        while True:
+            sequence_start, flags = self.__HEADER_FORMAT.unpack_from(self.__shared_memory.buf, 0)
+            if sequence_start % 2 == 0:
+                record = bytes(
+                    self.__shared_memory.buf[
+                        self.__HEADER_SIZE : self.__HEADER_SIZE + self.__record_size
+                    ]
+                )
+                if self.__read_sequence() == sequence_start:
+                    return sequence_start // 2, flags, record
+
+            attempts += 1
+            if attempts % self.__SPIN_COUNT == 0:
+                # Only once spinning was not enough, reading the clock costs more than an attempt
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + self.__READ_TIMEOUT
+                elif now > deadline:
+                    return None
+
+                time.sleep(0)
+
+    def read_latest(self) -> "tuple[int, object]":
+        """
+        Reads the latest value without blocking and without marking it as seen.
+
+        Returns the version and the value. Version 0 means there is no value:
+        nothing has been written yet, or a writer died mid write and the value cannot be read.
+        """
+        snapshot = self.__read_snapshot()
+        if snapshot is None:
+            return 0, None
+
+        version, flags, record = snapshot
+        if version == 0 or flags & self.__FLAG_SENTINEL:
+            return version, None
+
+        # Looked up on use, the registry is populated separately in each process
+        return version, struct_codec.get_codec(self.__record_type).decode(record)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Replaces the value. Never waits for readers.
+
+        item: Value of the record type, or None as sentinel.
+        block: Unused, the mailbox is never full.
+        timeout: Unused, the mailbox is never full.
+        """
+        # Same signature as queue.Queue.put()
+        _ = block, timeout
+
+        flags = 0
+        record = bytes(self.__record_size)
+        if item is None:
+            flags |= self.__FLAG_SENTINEL
+        else:
+            record = struct_codec.get_codec(self.__record_type).encode(item)
+
+        with self.__write_lock:
+            sequence = self.__read_sequence()
+            self.__write_sequence(sequence + 1)
+            self.__shared_memory.buf[self.__SEQUENCE_FORMAT.size] = flags
+            self.__shared_memory.buf[
+                self.__HEADER_SIZE : self.__HEADER_SIZE + self.__record_size
+            ] = record
+            self.__write_sequence(sequence + 2)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Returns the latest value if this handle has not returned it yet.
+
+        block: Whether to wait for a new value.
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Raises queue.Empty if no new value was written, or if it cannot be read.
+        """
+        if self.__read_sequence() // 2 <= self.__last_seen_version:
+            if not block:
+                raise queue.Empty
+
+            # Notifying an mp.Condition waits for every woken reader to acknowledge,
+            # forever if one was killed while waiting, so readers poll instead
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.__read_sequence() // 2 <= self.__last_seen_version:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise queue.Empty
+
+                time.sleep(self.__POLL_PERIOD)
+
+        version, value = self.read_latest()
+        # Only possible if a writer died mid write, as a version was written
+        if version == 0:
+            raise queue.Empty
+
+        self.__last_seen_version = version
+        return value
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns 1 if there is a value this handle has not returned yet, otherwise 0 .
+        """
+        return int(self.__read_sequence() // 2 > self.__last_seen_version)
+
+    def empty(self) -> bool:
+        """
+        Returns whether there is no new value.
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        The mailbox is never full.
+        """
+        return False
+
+    def close(self) -> None:
+        """
+        Detaches this process from the shared memory block.
+        """
+        self.__shared_memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory block. Only the creating process should call this,
+        after all other processes are done with the mailbox.
+        """
+        self.__shared_memory.unlink()
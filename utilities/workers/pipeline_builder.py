@@ -0,0 +1,553 @@
+"""
+Building the queues and workers of a pipeline from its topology in the YAML config.
+
+Topology format, under a `pipeline` key:
+```
+pipeline:
+  queues:
+    - name: telemetry_data_queue
+      max_size: 1  # <= 0 for infinity
+      backend: manager  # manager, shared_memory or mailbox
+      policy: block  # block, drop_oldest, drop_newest or sample
+      sample_every: 1
+      batch_size: 1
+      slot_size: 4096  # shared_memory only
+      record_type: modules.telemetry.telemetry.TelemetryData  # mailbox only
+      codec: struct  # optional, struct_codec encoding
+  stages:
+    - name: telemetry
+      target: modules.telemetry.telemetry_worker.telemetry_worker
+      count: 1
+      arguments: [$connection]  # $name is an object main passes in
+      inputs: []
+      outputs: [telemetry_data_queue]
+      execution_mode: process  # process or thread
+      start_method: fork  # optional
+      cpu_affinity: [0]  # optional
+      nice: 0  # optional
+      fifo_priority: 1  # optional
+  main_inputs: [telemetry_data_queue]  # queues main reads
+```
+Only `name` is required for queues, and `name` and `target` for stages.
+"""
+
+import importlib
+import inspect
+import multiprocessing.managers
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import struct_codec
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Prefix of arguments that name an object main passes in
+RESOURCE_PREFIX = "$"
+
+
+class _TopologyError(Exception):
+    """
+    Invalid topology, with the message to log.
+    """
+
+
+def _get(entry: dict, key: str, kind: "type | tuple[type, ...]", default: object) -> object:
+    """
+    Returns the value of the key, or the default if it is missing.
+
+    Raises _TopologyError if the value is not of the kind.
+    """
+    value = entry.get(key, default)
+    if value is default:
+        return value
+
+    # bool is an int, but never a valid count or size
+    if not isinstance(value, kind) or (isinstance(value, bool) and kind is int):
+        raise _TopologyError(f"{entry.get('name', entry)}: {key} has invalid value {value!r}")
+
+    return value
+
+
+def _get_names(entry: dict, key: str) -> "list[str]":
+    """
+    Returns the list of names of the key, empty if it is missing.
+    """
+    names = _get(entry, key, list, [])
+    if not all(isinstance(name, str) for name in names):  # type: ignore
+        raise _TopologyError(f"{entry.get('name', entry)}: {key} must be a list of names")
+
+    return names  # type: ignore
+
+
+def _get_enum(entry: dict, key: str, enum_type: type, default: object) -> object:
+    """
+    Returns the member of the enum named by the key in lower case, or the default.
+    """
+    value = _get(entry, key, str, None)
+    if value is None:
+        return default
+
+    try:
+        return enum_type[value.upper()]  # type: ignore
+    except KeyError as e:
+        choices = ", ".join(member.name.lower() for member in enum_type)  # type: ignore
+        raise _TopologyError(
+            f"{entry.get('name', entry)}: {key} must be one of {choices}, not {value}"
+        ) from e
+
+
+def _import_object(path: str) -> object:
+    """
+    Returns the object at the dotted path, for example `package.module.function`.
+    """
+    module_name, _, attribute = path.rpartition(".")
+    try:
+        return getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise _TopologyError(f"Cannot import {path}: {e}") from e
+
+
+def _is_annotated(parameter: inspect.Parameter, kind: type) -> bool:
+    """
+    Returns whether the parameter is annotated with the type, either directly or as a string.
+    """
+    annotation = parameter.annotation
+    if isinstance(annotation, str):
+        return annotation.rsplit(".", 1)[-1] == kind.__name__
+
+    return annotation is kind
+
+
+class Pipeline:
+    """
+    Queues and workers of a pipeline, created from its topology.
+
+    The topology is validated before any worker is created: every queue must have a producer
+    and a consumer, no queue can be smaller than its number of producing workers, stages
+    cannot form a cycle, and each target must take its arguments, input queues,
+    output queues and controller in that order. Main can also require that exactly
+    one stage of a single worker runs a target, such as the owner of a connection.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        config: dict,
+        controller: worker_controller.WorkerController,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        resources: "dict[str, object]",
+        local_logger: logger.Logger,
+        single_worker_targets: "list[str] | None" = None,
+    ) -> "tuple[bool, Pipeline | None]":
+        """
+        Validates the topology, then creates its queues and worker managers.
+
+        config: Configuration loaded with read_yaml.open_config(), with a `pipeline` key.
+        controller: Worker controller shared by all the workers.
+        mp_manager: Manager for queues with the manager backend.
+        resources: Objects that stage arguments can name with a $ prefix, by name.
+        local_logger: Existing logger from process.
+        single_worker_targets: Targets that exactly one stage of a single worker must run,
+            None for no such targets.
+
+        Returns whether the pipeline was created and the pipeline.
+        """
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]" = {}
+        try:
+            topology = config["pipeline"]
+            if not isinstance(topology, dict):
+                raise _TopologyError("pipeline must be a mapping")
+
+            cls.__create_queues(topology, mp_manager, queues)
+            stages = cls.__order_stages(topology, queues)
+            main_inputs = _get_names(topology, "main_inputs")
+            cls.__check_edges(stages, queues, main_inputs)
+            cls.__check_single_workers(
+                stages, single_worker_targets if single_worker_targets is not None else []
+            )
+
+            worker_managers = {}
+            for stage in stages:
+                worker_managers[stage["name"]] = cls.__create_manager(
+                    stage, queues, controller, resources, local_logger
+                )
+        except (KeyError, _TopologyError) as e:
+            if isinstance(e, KeyError):
+                local_logger.error(f"Invalid pipeline topology, missing {e}", True)
+            else:
+                local_logger.error(f"Invalid pipeline topology: {e}", True)
+
+            for data_queue in queues.values():
+                data_queue.close()
+
+            return False, None
+
+        # Queues in the order data flows through them
+        ordered_queues = []
+        for stage in stages:
+            for name in stage.get("outputs", []):
+                if queues[name] not in ordered_queues:
+                    ordered_queues.append(queues[name])
+
+        return True, Pipeline(cls.__create_key, queues, ordered_queues, worker_managers)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        ordered_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        worker_managers: "dict[str, worker_manager.WorkerManager]",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is Pipeline.__create_key, "Use create() method"
+
+        self.__queues = queues
+        self.__ordered_queues = ordered_queues
+        self.__worker_managers = worker_managers
+
+    def start(self) -> None:
+        """
+        Starts the process stages, then the thread stages, each from the last consumer
+        to the first producer, so no producer fills a queue before its consumers run.
+        """
+        worker_managers = self.get_worker_managers()
+        # Queues between threads and main do not need interprocess communication
+        worker_manager.localize_thread_queues(worker_managers)
+
+        # A forked process only copies the forking thread, so it could inherit a lock
+        # held by a running thread worker, never to be released
+        for execution_mode in [
+            worker_manager.ExecutionMode.PROCESS,
+            worker_manager.ExecutionMode.THREAD,
+        ]:
+            for manager in reversed(worker_managers):
+                if manager.get_execution_mode() == execution_mode:
+                    manager.start_workers()
+
+    def get_queue(self, name: str) -> queue_proxy_wrapper.QueueProxyWrapper:
+        """
+        Returns the queue with the name.
+        """
+        return self.__queues[name]
+
+    def get_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the queues between stages, from the first producer to the last consumer,
+        as shutdown_workers() takes them.
+        """
+        return list(self.__ordered_queues)
+
+    def get_worker_manager(self, name: str) -> worker_manager.WorkerManager:
+        """
+        Returns the worker manager of the stage with the name.
+        """
+        return self.__worker_managers[name]
+
+    def get_worker_managers(self) -> "list[worker_manager.WorkerManager]":
+        """
+        Returns the worker managers of every stage, producers before their consumers.
+        """
+        return list(self.__worker_managers.values())
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the queues, after all workers have been joined.
+        """
+        for data_queue in self.__queues.values():
+            data_queue.close()
+
+    @staticmethod
+    def __create_queues(
+        topology: dict,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+    ) -> None:
+        """
+        Creates every queue of the topology, adding them to the queues as they are created
+        so they can be closed if a later one fails.
+        """
+        for entry in _get(topology, "queues", list, []):  # type: ignore
+            if not isinstance(entry, dict):
+                raise _TopologyError(f"Queue must be a mapping: {entry!r}")
+
+            name = _get(entry, "name", str, None)
+            if name is None or name in queues:
+                raise _TopologyError(f"Queue name missing or repeated: {name}")
+
+            backend = _get_enum(
+                entry,
+                "backend",
+                queue_proxy_wrapper.QueueBackend,
+                queue_proxy_wrapper.QueueBackend.MANAGER,
+            )
+            if backend == queue_proxy_wrapper.QueueBackend.LOCAL:
+                raise _TopologyError(f"{name}: local queues are chosen by the builder")
+
+            if backend == queue_proxy_wrapper.QueueBackend.MANAGER and mp_manager is None:
+                raise _TopologyError(f"{name}: manager backend requires a SyncManager")
+
+            record_type = None
+            record_type_path = _get(entry, "record_type", str, None)
+            if record_type_path is not None:
+                record_type = _import_object(record_type_path)  # type: ignore
+
+            if backend == queue_proxy_wrapper.QueueBackend.MAILBOX and record_type is None:
+                raise _TopologyError(f"{name}: mailbox backend requires a record type")
+
+            encoder = None
+            decoder = None
+            codec = _get(entry, "codec", str, None)
+            if codec == "struct":
+                encoder = struct_codec.encode
+                decoder = struct_codec.decode
+            elif codec is not None:
+                raise _TopologyError(f"{name}: unknown codec {codec}")
+
+            try:
+                queues[name] = queue_proxy_wrapper.QueueProxyWrapper(
+                    mp_manager,
+                    _get(entry, "max_size", int, 0),  # type: ignore
+                    backend,  # type: ignore
+                    _get(  # type: ignore
+                        entry,
+                        "slot_size",
+                        int,
+                        queue_proxy_wrapper.QueueProxyWrapper.DEFAULT_SLOT_SIZE,
+                    ),
+                    _get(entry, "batch_size", int, 1),  # type: ignore
+                    record_type,  # type: ignore
+                    _get_enum(  # type: ignore
+                        entry,
+                        "policy",
+                        queue_proxy_wrapper.BackpressurePolicy,
+                        queue_proxy_wrapper.BackpressurePolicy.BLOCK,
+                    ),
+                    _get(entry, "sample_every", int, 1),  # type: ignore
+                    encoder,
+                    decoder,
+                )
+            except ValueError as e:
+                raise _TopologyError(f"{name}: {e}") from e
+
+    @staticmethod
+    def __order_stages(
+        topology: dict, queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]"
+    ) -> "list[dict]":
+        """
+        Returns the stages with every producer before its consumers.
+        """
+        stages = _get(topology, "stages", list, [])
+        names = set()
+        for stage in stages:  # type: ignore
+            if not isinstance(stage, dict):
+                raise _TopologyError(f"Stage must be a mapping: {stage!r}")
+
+            name = _get(stage, "name", str, None)
+            if name is None or name in names:
+                raise _TopologyError(f"Stage name missing or repeated: {name}")
+
+            names.add(name)
+            for key in ["inputs", "outputs"]:
+                for queue_name in _get_names(stage, key):
+                    if queue_name not in queues:
+                        raise _TopologyError(f"{name}: {key} has unknown queue {queue_name}")
+
+        # Repeatedly take the stages whose input queues have no remaining producers
+        ordered: "list[dict]" = []
+        remaining = list(stages)  # type: ignore
+        while len(remaining) > 0:
+            produced = {
+                queue_name for stage in remaining for queue_name in stage.get("outputs", [])
+            }
+            ready = [
+                stage
+                for stage in remaining
+                if not any(queue_name in produced for queue_name in stage.get("inputs", []))
+            ]
+            if len(ready) == 0:
+                cycle = ", ".join(stage["name"] for stage in remaining)
+                raise _TopologyError(f"Stages form a cycle: {cycle}")
+
+            ordered.extend(ready)
+            remaining = [stage for stage in remaining if stage not in ready]
+
+        return ordered
+
+    @staticmethod
+    def __check_edges(
+        stages: "list[dict]",
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        main_inputs: "list[str]",
+    ) -> None:
+        """
+        Checks that every queue has producers and consumers, and room for every producer.
+        """
+        for name in main_inputs:
+            if name not in queues:
+                raise _TopologyError(f"main_inputs has unknown queue {name}")
+
+        for name, data_queue in queues.items():
+            producer_count = sum(
+                _get(stage, "count", int, 1)  # type: ignore
+                for stage in stages
+                if name in stage.get("outputs", [])
+            )
+            if producer_count == 0:
+                raise _TopologyError(f"{name} has no producers")
+
+            has_consumer = name in main_inputs or any(
+                name in stage.get("inputs", []) for stage in stages
+            )
+            if not has_consumer:
+                raise _TopologyError(f"{name} has no consumers")
+
+            # Mailboxes overwrite instead of holding an item per producer
+            if (
+                data_queue.backend != queue_proxy_wrapper.QueueBackend.MAILBOX
+                and 0 < data_queue.maxsize < producer_count
+            ):
+                raise _TopologyError(
+                    f"{name} holds {data_queue.maxsize} items, "
+                    f"fewer than its {producer_count} producing workers"
+                )
+
+    @staticmethod
+    def __check_single_workers(stages: "list[dict]", targets: "list[str]") -> None:
+        """
+        Checks that exactly one worker runs each of the targets.
+        """
+        for target in targets:
+            matches = [stage for stage in stages if stage.get("target") == target]
+            if len(matches) != 1:
+                raise _TopologyError(f"Pipeline has {len(matches)} stages of {target}, must have 1")
+
+            count = _get(matches[0], "count", int, 1)
+            if count != 1:
+                raise _TopologyError(f"{matches[0]['name']}: has {count} workers, must have 1")
+
+    @staticmethod
+    def __create_manager(
+        stage: dict,
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        controller: worker_controller.WorkerController,
+        resources: "dict[str, object]",
+        local_logger: logger.Logger,
+    ) -> worker_manager.WorkerManager:
+        """
+        Checks the target of the stage takes its arguments, then creates its workers.
+        """
+        name = stage["name"]
+        target = _import_object(_get(stage, "target", str, None) or "")  # type: ignore
+        if not callable(target):
+            raise _TopologyError(f"{name}: target is not callable")
+
+        arguments = []
+        for argument in _get(stage, "arguments", list, []):  # type: ignore
+            if isinstance(argument, str) and argument.startswith(RESOURCE_PREFIX):
+                resource = argument[len(RESOURCE_PREFIX) :]
+                if resource not in resources:
+                    raise _TopologyError(f"{name}: no object named {resource} was passed in")
+
+                argument = resources[resource]
+
+            arguments.append(argument)
+
+        input_queues = [queues[queue_name] for queue_name in _get_names(stage, "inputs")]
+        output_queues = [queues[queue_name] for queue_name in _get_names(stage, "outputs")]
+        Pipeline.__check_signature(
+            name, target, len(arguments), len(input_queues), len(output_queues)
+        )
+
+        cpu_affinity = _get(stage, "cpu_affinity", list, None)
+        result, properties = worker_manager.WorkerProperties.create(
+            _get(stage, "count", int, 1),  # type: ignore
+            target,  # type: ignore
+            tuple(arguments),
+            input_queues,
+            output_queues,
+            controller,
+            local_logger,
+            name,
+            None if cpu_affinity is None else set(cpu_affinity),  # type: ignore
+            _get(stage, "nice", int, None),  # type: ignore
+            _get(stage, "fifo_priority", int, None),  # type: ignore
+        )
+        if not result:
+            raise _TopologyError(f"{name}: invalid worker properties")
+
+        # Get Pylance to stop complaining
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(
+            properties,
+            local_logger,
+            _get(stage, "start_method", str, None),  # type: ignore
+            execution_mode=_get_enum(  # type: ignore
+                stage,
+                "execution_mode",
+                worker_manager.ExecutionMode,
+                worker_manager.ExecutionMode.PROCESS,
+            ),
+        )
+        if not result:
+            raise _TopologyError(f"{name}: invalid worker manager settings")
+
+        # Get Pylance to stop complaining
+        assert manager is not None
+
+        return manager
+
+    @staticmethod
+    def __check_signature(
+        name: str,
+        target: "(...) -> object",  # type: ignore
+        argument_count: int,
+        input_count: int,
+        output_count: int,
+    ) -> None:
+        """
+        Checks the target takes its arguments, input queues, output queues and controller,
+        in that order, as far as its signature and annotations tell.
+        """
+        try:
+            parameters = list(inspect.signature(target).parameters.values())
+        except (TypeError, ValueError):
+            return
+
+        if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+            return
+
+        expected_count = argument_count + input_count + output_count + 1
+        if len(parameters) != expected_count:
+            raise _TopologyError(
+                f"{name}: target takes {len(parameters)} parameters, but is given "
+                f"{argument_count} arguments, {input_count} inputs, {output_count} outputs "
+                "and the controller"
+            )
+
+        queue_type = queue_proxy_wrapper.QueueProxyWrapper
+        controller_type = worker_controller.WorkerController
+        for i, parameter in enumerate(parameters):
+            if i < argument_count:
+                misplaced = _is_annotated(parameter, queue_type) or _is_annotated(
+                    parameter, controller_type
+                )
+            elif i < expected_count - 1:
+                misplaced = parameter.annotation is not parameter.empty and not _is_annotated(
+                    parameter, queue_type
+                )
+            else:
+                misplaced = parameter.annotation is not parameter.empty and not _is_annotated(
+                    parameter, controller_type
+                )
+
+            if misplaced:
+                raise _TopologyError(
+                    f"{name}: parameter {parameter.name} of the target is out of order, "
+                    "expected arguments, then input queues, output queues and the controller"
+                )
@@ -2,24 +2,529 @@
 Queue.
 """
 
+import collections
+import ctypes
+import enum
+import multiprocessing as mp
 import multiprocessing.managers
 import queue
 import time
 
+from . import latest_value_mailbox
+from . import shared_memory_queue
 
-class QueueProxyWrapper:
+
+class QueueBackend(enum.Enum):
+    """
+    Underlying queue implementation.
+    """
+
+    # Queue proxy to a SyncManager server process
+    MANAGER = 0
+    # Ring buffer in shared memory, no server process
+    SHARED_MEMORY = 1
+    # Single slot in shared memory holding only the latest value
+    MAILBOX = 2
+    # Queue of the process, only for workers that are threads of the same process
+    LOCAL = 3
+
+
+class BackpressurePolicy(enum.Enum):
+    """
+    What a producer does when the queue is full.
+    """
+
+    # Wait for space
+    BLOCK = 0
+    # Discard the oldest queued item to make space
+    DROP_OLDEST = 1
+    # Discard the item being put
+    DROP_NEWEST = 2
+    # Only put every Nth item, waiting for space
+    SAMPLE = 3
+
+
+class _ItemBatch(list):
+    """
+    Several items sent through the queue as a single item.
+    """
+
+
+def _item_count(queue_item: object) -> int:
+    """
+    Number of items represented by a queue item.
+    """
+    if isinstance(queue_item, _ItemBatch):
+        return len(queue_item)
+
+    return 1
+
+
+class _BackpressureQueue:
+    """
+    Applies a backpressure policy to puts and forwards everything else.
+    The sentinel (None) is never dropped.
+    """
+
+    def __init__(
+        self,
+        inner: object,
+        policy: BackpressurePolicy,
+        sample_every: int,
+        dropped_count: "mp.sharedctypes.Synchronized",
+    ) -> None:
+        """
+        inner: Queue to forward to.
+        policy: Backpressure policy.
+        sample_every: Keep 1 in this many items, only used for the sample policy.
+        dropped_count: Counter shared with all processes holding the queue.
+        """
+        self.__inner = inner
+        self.__policy = policy
+        self.__sample_every = sample_every
+        self.__dropped_count = dropped_count
+
+        # Local to each producer process
+        self.__sample_index = 0
+
+    def __drop(self, queue_item: object) -> None:
+        """
+        Counts the items as dropped.
+        """
+        with self.__dropped_count.get_lock():
+            self.__dropped_count.value += _item_count(queue_item)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item according to the policy.
+        Only the block and sample policies wait, and may raise queue.Full on timeout.
+        """
+        if item is None or self.__policy == BackpressurePolicy.BLOCK:
+            self.__inner.put(item, block, timeout)
+            return
+
+        if self.__policy == BackpressurePolicy.SAMPLE:
+            self.__sample_index += 1
+            if self.__sample_index < self.__sample_every:
+                self.__drop(item)
+                return
+
+            self.__sample_index = 0
+            self.__inner.put(item, block, timeout)
+            return
+
+        if self.__policy == BackpressurePolicy.DROP_NEWEST:
+            try:
+                self.__inner.put_nowait(item)
+            except queue.Full:
+                self.__drop(item)
+
+            return
+
+        if self.__policy == BackpressurePolicy.DROP_OLDEST:
+            evicted_sentinel_count = 0
+            while True:
+                try:
+                    self.__inner.put_nowait(item)
+                except queue.Full:
+                    # Another consumer may have made space in the meantime
+                    try:
+                        oldest = self.__inner.get_nowait()
+                    except queue.Empty:
+                        continue
+
+                    if oldest is None:
+                        evicted_sentinel_count += 1
+                    else:
+                        self.__drop(oldest)
+
+                    continue
+
+                if evicted_sentinel_count == 0:
+                    return
+
+                # Evicted sentinels go back after the new item, consumers must still see them
+                item = None
+                evicted_sentinel_count -= 1
+
+        raise NotImplementedError
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Forwarded.
+        """
+        return self.__inner.get(block, timeout)
+
+    def get_nowait(self) -> object:
+        """
+        Forwarded.
+        """
+        return self.__inner.get_nowait()
+
+    def qsize(self) -> int:
+        """
+        Forwarded.
+        """
+        return self.__inner.qsize()
+
+    def empty(self) -> bool:
+        """
+        Forwarded.
+        """
+        return self.__inner.empty()
+
+    def full(self) -> bool:
+        """
+        Forwarded.
+        """
+        return self.__inner.full()
+
+
+class _CodecQueue:
+    """
+    Encodes items on put and decodes them on get, including the items inside batches.
+    """
+
+    def __init__(
+        self,
+        inner: object,
+        encoder: "(...) -> object",  # type: ignore
+        decoder: "(...) -> object",  # type: ignore
+    ) -> None:
+        """
+        inner: Queue to forward to.
+        encoder: Converts an item into what is sent.
+        decoder: Converts what is received back into an item.
+        """
+        self.__inner = inner
+        self.__encoder = encoder
+        self.__decoder = decoder
+
+    def __encode(self, queue_item: object) -> object:
+        """
+        Encodes the item, or every item in a batch.
+        """
+        if isinstance(queue_item, _ItemBatch):
+            return _ItemBatch(map(self.__encoder, queue_item))
+
+        return self.__encoder(queue_item)
+
+    def __decode(self, queue_item: object) -> object:
+        """
+        Decodes the item, or every item in a batch.
+        """
+        if isinstance(queue_item, _ItemBatch):
+            return _ItemBatch(map(self.__decoder, queue_item))
+
+        return self.__decoder(queue_item)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Encodes and forwards.
+        """
+        self.__inner.put(self.__encode(item), block, timeout)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Forwards and decodes.
+        """
+        return self.__decode(self.__inner.get(block, timeout))
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Forwarded.
+        """
+        return self.__inner.qsize()
+
+    def empty(self) -> bool:
+        """
+        Forwarded.
+        """
+        return self.__inner.empty()
+
+    def full(self) -> bool:
+        """
+        Forwarded.
+        """
+        return self.__inner.full()
+
+
+class _CountingQueue:
+    """
+    Counts the items removed by get, so that consumers getting single items are measured
+    like those using get_many().
+    """
+
+    def __init__(self, inner: object, consumed_count: "mp.sharedctypes.Synchronized") -> None:
+        """
+        inner: Queue to forward to.
+        consumed_count: Counter shared with all processes holding the queue.
+        """
+        self.__inner = inner
+        self.__consumed_count = consumed_count
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Forwarded.
+        """
+        self.__inner.put(item, block, timeout)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Forwarded.
+        """
+        self.__inner.put_nowait(item)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Forwards and counts.
+        """
+        queue_item = self.__inner.get(block, timeout)
+        with self.__consumed_count.get_lock():
+            self.__consumed_count.value += _item_count(queue_item)
+
+        return queue_item
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Forwarded.
+        """
+        return self.__inner.qsize()
+
+    def empty(self) -> bool:
+        """
+        Forwarded.
+        """
+        return self.__inner.empty()
+
+    def full(self) -> bool:
+        """
+        Forwarded.
+        """
+        return self.__inner.full()
+
+
+class QueueProxyWrapper:  # pylint: disable=too-many-instance-attributes
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
-    `maxsize <= 0` means infinite size.
+    `maxsize <= 0` means infinite size. The shared memory backend is always bounded.
+    The mailbox backend holds exactly 1 value and never blocks producers.
     """
 
     __QUEUE_TIMEOUT = 0.1  # seconds
     __QUEUE_DELAY = 0.1  # seconds
+    DEFAULT_SLOT_SIZE = 4096  # bytes
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        maxsize: int = 0,
+        backend: QueueBackend = QueueBackend.MANAGER,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        batch_size: int = 1,
+        record_type: "type | None" = None,
+        policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+        sample_every: int = 1,
+        encoder: "((...) -> object) | None" = None,  # type: ignore
+        decoder: "((...) -> object) | None" = None,  # type: ignore
+    ) -> None:
+        """
+        mp_manager: Manager to create the queue proxy with, only used for the manager backend.
+        maxsize: Maximum number of items in the queue.
+        backend: Underlying queue implementation.
+        slot_size: Maximum size in bytes of a pickled item, only used for the shared memory backend.
+        batch_size: Preferred number of items per put_many and get_many call for workers that batch.
+        record_type: Fixed-size record class, only used for the mailbox backend.
+        policy: What producers do when the queue is full.
+        sample_every: Keep 1 in this many items, only used for the sample policy.
+        encoder: Applied to every item put, for example `struct_codec.encode`.
+        decoder: Applied to every item got, for example `struct_codec.decode`.
+        """
+        if batch_size <= 0:
+            raise ValueError(f"Batch size must be greater than 0, got {batch_size}")
+
+        if sample_every <= 0:
+            raise ValueError(f"Sample rate must be greater than 0, got {sample_every}")
+
+        if backend == QueueBackend.MANAGER:
+            assert mp_manager is not None, "Manager backend requires a SyncManager"
+            self.queue = mp_manager.Queue(maxsize)
+        elif backend == QueueBackend.SHARED_MEMORY:
+            self.queue = shared_memory_queue.SharedMemoryQueue(maxsize, slot_size)
+        elif backend == QueueBackend.MAILBOX:
+            assert record_type is not None, "Mailbox backend requires a record type"
+            self.queue = latest_value_mailbox.LatestValueMailbox(record_type)
+            maxsize = 1
+        elif backend == QueueBackend.LOCAL:
+            self.queue = queue.Queue(maxsize)
+        else:
+            raise NotImplementedError
+
+        if encoder is not None or decoder is not None:
+            assert encoder is not None and decoder is not None, "Encoder and decoder are a pair"
+
+        self.__backend_queue = self.queue
+        self.__sample_every = sample_every
+        self.__encoder = encoder
+        self.__decoder = decoder
+        self.__dropped_count = mp.Value(ctypes.c_uint64, 0)
+        self.__consumed_count = mp.Value(ctypes.c_uint64, 0)
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
         self.maxsize = maxsize
+        self.backend = backend
+        self.batch_size = batch_size
+        self.policy = policy
+
+        self.__wrap_backend_queue()
+
+        # Items received in a batch but not yet returned by get_many(), local to each process
+        self.__pending_items = collections.deque()
+
+    def __wrap_backend_queue(self) -> None:
+        """
+        Layers the backpressure policy, codec and consumption count over the backend queue.
+        """
+        uncounted_queue = self.__backend_queue
+        if self.policy != BackpressurePolicy.BLOCK:
+            uncounted_queue = _BackpressureQueue(
+                self.__backend_queue,
+                self.policy,
+                self.__sample_every,
+                self.__dropped_count,
+            )
+
+        # Items never leave the process with the local backend, so there is nothing to encode
+        if self.__encoder is not None and self.backend != QueueBackend.LOCAL:
+            uncounted_queue = _CodecQueue(uncounted_queue, self.__encoder, self.__decoder)
+
+        # get_many() counts the items it returns, and draining is not consumption
+        self.__uncounted_queue = uncounted_queue
+        self.queue = uncounted_queue
+        # Every reader of a mailbox sees every value, so reading it consumes nothing
+        if self.backend != QueueBackend.MAILBOX:
+            self.queue = _CountingQueue(uncounted_queue, self.__consumed_count)
+
+    def localize(self) -> bool:
+        """
+        Switches to the local backend, for a queue only used by threads of the creating process.
+        Only call before anything is put into the queue.
+        The mailbox backend is kept, as it already works between threads.
+
+        Returns whether the queue was switched.
+        """
+        if self.backend not in (QueueBackend.MANAGER, QueueBackend.SHARED_MEMORY):
+            return False
+
+        self.close()
+        self.backend = QueueBackend.LOCAL
+        self.__backend_queue = queue.Queue(self.maxsize)
+        self.__wrap_backend_queue()
+
+        return True
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of items dropped by the backpressure policy, across all producers.
+        """
+        return self.__dropped_count.value
+
+    def get_consumed_count(self) -> int:
+        """
+        Returns the number of items removed with get(), get_nowait() and get_many(),
+        across all consumers. Items removed by drain_queue() and mailbox reads are not counted.
+        """
+        return self.__consumed_count.value
+
+    def put_many(self, items: "list", timeout: "float | None" = None) -> None:
+        """
+        Puts all items into the queue as a single queue item, so the batch costs one round trip.
+        A batch uses one slot of `maxsize`, regardless of how many items it contains.
+        A single item is put as is, so consumers that do not batch can still read it.
+
+        items: Items to put.
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Raises queue.Full if the queue stayed full.
+        """
+        if len(items) == 0:
+            return
+
+        # Earlier items would be overwritten immediately
+        if len(items) == 1 or self.backend == QueueBackend.MAILBOX:
+            self.__uncounted_queue.put(items[-1], timeout=timeout)
+            return
+
+        self.__uncounted_queue.put(_ItemBatch(items), timeout=timeout)
+
+    def get_many(self, max_items: int, timeout: "float | None" = None) -> "list":
+        """
+        Removes and returns up to `max_items` items, unpacking batches from put_many().
+        Waits only for the first item, then takes whatever else is ready.
+
+        max_items: Maximum number of items to return, must be greater than 0 .
+        timeout: Time waiting in seconds for the first item, None waits forever.
+
+        Returns the items, empty if timed out.
+        """
+        items = []
+        while len(self.__pending_items) > 0 and len(items) < max_items:
+            items.append(self.__pending_items.popleft())
+
+        if len(items) == 0:
+            try:
+                self.__unpack_into(items, self.__uncounted_queue.get(timeout=timeout), max_items)
+            except queue.Empty:
+                return items
+
+        while len(items) < max_items:
+            try:
+                self.__unpack_into(items, self.__uncounted_queue.get_nowait(), max_items)
+            except queue.Empty:
+                break
+
+        if self.backend != QueueBackend.MAILBOX:
+            with self.__consumed_count.get_lock():
+                self.__consumed_count.value += len(items)
+
+        return items
+
+    def __unpack_into(self, items: "list", queue_item: object, max_items: int) -> None:
+        """
+        Appends the queue item, or the contents of a batch, to items.
+        Anything past `max_items` is kept for the next get_many() call.
+        """
+        if not isinstance(queue_item, _ItemBatch):
+            items.append(queue_item)
+            return
+
+        space = max_items - len(items)
+        items.extend(queue_item[:space])
+        self.__pending_items.extend(queue_item[space:])
 
     def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
         """
@@ -32,7 +537,7 @@ class QueueProxyWrapper:
 
         try:
             for _ in range(self.maxsize):
-                self.queue.put(None, timeout=timeout)
+                self.__uncounted_queue.put(None, timeout=timeout)
         except queue.Full:
             return
 
@@ -45,9 +550,11 @@ class QueueProxyWrapper:
         if timeout <= 0.0:
             timeout = self.__QUEUE_TIMEOUT
 
+        self.__pending_items.clear()
+
         try:
             for _ in range(self.maxsize):
-                self.queue.get(timeout=timeout)
+                self.__uncounted_queue.get(timeout=timeout)
         except queue.Empty:
             return
 
@@ -58,3 +565,12 @@ class QueueProxyWrapper:
         self.fill_queue_with_sentinel()
         time.sleep(self.__QUEUE_DELAY)
         self.drain_queue()
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the backend.
+        Only the creating process should call this, after all workers have been joined.
+        """
+        if self.backend in (QueueBackend.SHARED_MEMORY, QueueBackend.MAILBOX):
+            self.__backend_queue.close()
+            self.__backend_queue.unlink()
@@ -0,0 +1,81 @@
+"""
+Waiting on several queues at once.
+"""
+
+import time
+
+from . import queue_proxy_wrapper
+
+
+class QueueSelector:
+    """
+    Waits until any of several queues has an item.
+
+    Queues are checked in round robin order starting after the queue that was ready last time,
+    so a busy queue cannot starve the others.
+    """
+
+    __MIN_POLL_INTERVAL = 0.001  # seconds
+    __MAX_POLL_INTERVAL = 0.01  # seconds
+
+    def __init__(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        queues: Queues to wait on, any backend.
+        """
+        self.__queues = queues
+        self.__next_index = 0
+
+    def __poll(self) -> "tuple[queue_proxy_wrapper.QueueProxyWrapper | None, object]":
+        """
+        Checks every queue once without blocking.
+
+        Returns the queue and its item, or None if every queue is empty.
+        """
+        for offset in range(len(self.__queues)):
+            index = (self.__next_index + offset) % len(self.__queues)
+            items = self.__queues[index].get_many(1, 0.0)
+            if len(items) > 0:
+                self.__next_index = (index + 1) % len(self.__queues)
+                return self.__queues[index], items[0]
+
+        return None, None
+
+    def wait_any(
+        self, timeout: "float | None" = None
+    ) -> "tuple[queue_proxy_wrapper.QueueProxyWrapper | None, object]":
+        """
+        Removes an item from whichever queue has one first.
+
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Returns the queue the item came from and the item, or None and None if timed out.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        poll_interval = self.__MIN_POLL_INTERVAL
+        while True:
+            ready_queue, item = self.__poll()
+            if ready_queue is not None:
+                return ready_queue, item
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0.0:
+                return None, None
+
+            # Back off while idle so polling costs little, but stays responsive under load
+            time.sleep(poll_interval if remaining is None else min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, self.__MAX_POLL_INTERVAL)
+
+
+def wait_any(
+    queues: "list[queue_proxy_wrapper.QueueProxyWrapper]", timeout: "float | None" = None
+) -> "tuple[queue_proxy_wrapper.QueueProxyWrapper | None, object]":
+    """
+    One-off wait on several queues, checked in list order.
+    Use a QueueSelector when waiting repeatedly, for fair ordering.
+
+    queues: Queues to wait on.
+    timeout: Time waiting in seconds before giving up, None waits forever.
+
+    Returns the queue the item came from and the item, or None and None if timed out.
+    """
+    return QueueSelector(queues).wait_any(timeout)
@@ -0,0 +1,203 @@
+"""
+Bounded queue backed by a shared memory ring buffer.
+"""
+
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import pickle
+import queue
+import struct
+
+
+class SharedMemoryQueue:
+    """
+    Bounded multi-producer multi-consumer FIFO stored in a ring buffer of
+    fixed-size slots in shared memory.
+
+    Implements the subset of the `queue.Queue` interface used by workers
+    (`put`, `get`, `put_nowait`, `get_nowait`, `qsize`, `empty`, `full`),
+    so it can be used in place of a SyncManager queue proxy. Items are
+    pickled directly into the slots, no server process is involved.
+    """
+
+    # Header: head index, tail index, item count
+    __HEADER_FORMAT = struct.Struct("<III")
+    __HEADER_SIZE = 16  # bytes, header padded for alignment
+    # Slot: payload length
+    __SLOT_HEADER_FORMAT = struct.Struct("<I")
+
+    def __init__(self, maxsize: int, slot_size: int) -> None:
+        """
+        Constructor allocates the shared memory block and synchronization primitives.
+
+        maxsize: Number of slots, must be greater than 0 .
+        slot_size: Size of each slot in bytes, must be large enough to hold any pickled item.
+        """
+        if maxsize <= 0:
+            raise ValueError(f"Shared memory queue must be bounded, got maxsize {maxsize}")
+
+        if slot_size <= self.__SLOT_HEADER_FORMAT.size:
+            raise ValueError(f"Slot size too small: {slot_size}")
+
+        self.__maxsize = maxsize
+        self.__slot_size = slot_size
+        self.__payload_size = slot_size - self.__SLOT_HEADER_FORMAT.size
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + maxsize * slot_size,
+        )
+        self.__HEADER_FORMAT.pack_into(self.__shared_memory.buf, 0, 0, 0, 0)
+
+        # Both conditions share the lock protecting the header
+        lock = mp.Lock()
+        self.__not_empty = mp.Condition(lock)
+        self.__not_full = mp.Condition(lock)
+
+    def __read_header(self) -> "tuple[int, int, int]":
+        """
+        Returns head, tail, and count. Lock must be held.
+        """
+        return self.__HEADER_FORMAT.unpack_from(self.__shared_memory.buf, 0)
+
+    def __write_header(self, head: int, tail: int, count: int) -> None:
+        """
+        Writes head, tail, and count. Lock must be held.
+        """
+        self.__HEADER_FORMAT.pack_into(self.__shared_memory.buf, 0, head, tail, count)
+
+    def __slot_offset(self, index: int) -> int:
+        """
+        Byte offset of the slot at index.
+        """
+        return self.__HEADER_SIZE + index * self.__slot_size
+
+    def __count(self) -> int:
+        """
+        Number of items currently stored. Lock must be held.
+        """
+        return self.__read_header()[2]
+
+    @staticmethod
+    def __wait(
+        condition: "mp.synchronize.Condition",
+        predicate: "(...) -> bool",  # type: ignore
+        block: bool,
+        timeout: "float | None",
+    ) -> bool:
+        """
+        Waits until the predicate holds. Lock must be held.
+
+        Returns whether the predicate holds.
+        """
+        if not block:
+            return predicate()
+
+        return condition.wait_for(predicate, timeout)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the queue.
+
+        item: Any picklable object that fits in a slot.
+        block: Whether to wait for a free slot.
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Raises queue.Full if no slot became free.
+        """
+        payload = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.__payload_size:
+            raise ValueError(
+                f"Item of {len(payload)} bytes does not fit in slot of {self.__payload_size} bytes"
+            )
+
+        with self.__not_full:
+            if not self.__wait(
+                self.__not_full,
+                lambda: self.__count() < self.__maxsize,
+                block,
+                timeout,
+            ):
+                raise queue.Full
+
+            head, tail, count = self.__read_header()
+            offset = self.__slot_offset(tail)
+            self.__SLOT_HEADER_FORMAT.pack_into(self.__shared_memory.buf, offset, len(payload))
+            offset += self.__SLOT_HEADER_FORMAT.size
+            self.__shared_memory.buf[offset : offset + len(payload)] = payload
+            self.__write_header(head, (tail + 1) % self.__maxsize, count + 1)
+
+            self.__not_empty.notify()
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the queue.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Raises queue.Empty if no item became available.
+        """
+        with self.__not_empty:
+            if not self.__wait(
+                self.__not_empty,
+                lambda: self.__count() > 0,
+                block,
+                timeout,
+            ):
+                raise queue.Empty
+
+            head, tail, count = self.__read_header()
+            offset = self.__slot_offset(head)
+            (length,) = self.__SLOT_HEADER_FORMAT.unpack_from(self.__shared_memory.buf, offset)
+            offset += self.__SLOT_HEADER_FORMAT.size
+            payload = bytes(self.__shared_memory.buf[offset : offset + length])
+            self.__write_header((head + 1) % self.__maxsize, tail, count - 1)
+
+            self.__not_full.notify()
+
+        return pickle.loads(payload)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the number of items in the queue.
+        """
+        with self.__not_empty:
+            return self.__count()
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is empty.
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is full.
+        """
+        return self.qsize() >= self.__maxsize
+
+    def close(self) -> None:
+        """
+        Detaches this process from the shared memory block.
+        """
+        self.__shared_memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory block. Only the creating process should call this,
+        after all other processes are done with the queue.
+        """
+        self.__shared_memory.unlink()
@@ -0,0 +1,171 @@
+"""
+Compact fixed-size binary encoding for simple struct classes sent between workers.
+"""
+
+import operator
+import struct
+
+
+class StructCodec:  # pylint: disable=too-many-instance-attributes
+    """
+    Packs the fields of a struct class into a fixed-size `struct` layout.
+
+    Layout: magic, type id, presence bitmask (bit i set if field i is not None), fields.
+    Missing (None) fields are packed as zero and restored as None.
+    """
+
+    MAGIC = b"SC"
+    # Magic, type id, presence bitmask
+    __HEADER_FORMAT = "<2sBI"
+    __MAX_FIELDS = 32
+
+    def __init__(self, record_type: type, type_id: int, fields: "list[tuple[str, str]]") -> None:
+        """
+        record_type: Class to encode, its constructor takes the fields positionally in this order.
+        type_id: Identifier in the range [0, 255], unique across all registered classes.
+        fields: Name and `struct` format of each field. String fields use the `Ns` format
+            and are UTF-8 encoded, zero padded to N bytes. Longer strings cannot be encoded.
+        """
+        if not 0 <= type_id <= 255:
+            raise ValueError(f"Type id out of range: {type_id}")
+
+        if len(fields) > self.__MAX_FIELDS:
+            raise ValueError(f"Too many fields: {len(fields)}, maximum is {self.__MAX_FIELDS}")
+
+        self.record_type = record_type
+        self.type_id = type_id
+        self.__struct = struct.Struct(
+            self.__HEADER_FORMAT + "".join(field_format for _, field_format in fields)
+        )
+        self.record_size = self.__struct.size
+
+        names = [name for name, _ in fields]
+        self.__get_fields = operator.attrgetter(*names)
+        self.__string_indices = [
+            i for i, (_, field_format) in enumerate(fields) if field_format.endswith("s")
+        ]
+        self.__string_sizes = [struct.calcsize(fields[i][1]) for i in self.__string_indices]
+        self.__defaults = [b"" if i in self.__string_indices else 0 for i in range(len(fields))]
+        self.__all_present = (1 << len(fields)) - 1
+        self.__field_count = len(fields)
+
+    def encode(self, item: object) -> bytes:
+        """
+        Packs the item.
+
+        Raises ValueError if a string field does not fit, `struct` would silently truncate it.
+        """
+        values = self.__get_fields(item)
+        if self.__field_count == 1:
+            values = (values,)
+
+        if None in values:
+            presence = 0
+            values = list(values)
+            for i, value in enumerate(values):
+                if value is None:
+                    values[i] = self.__defaults[i]
+                else:
+                    presence |= 1 << i
+        else:
+            presence = self.__all_present
+
+        if self.__string_indices:
+            values = list(values)
+            for i, size in zip(self.__string_indices, self.__string_sizes):
+                if isinstance(values[i], str):
+                    values[i] = values[i].encode()
+                if len(values[i]) > size:
+                    raise ValueError(
+                        f"String field {i} of {self.record_type.__name__} is "
+                        f"{len(values[i])} bytes, longer than {size}"
+                    )
+
+        return self.__struct.pack(self.MAGIC, self.type_id, presence, *values)
+
+    def decode(self, record: bytes) -> object:
+        """
+        Unpacks the item.
+        """
+        _, _, presence, *values = self.__struct.unpack(record)
+
+        for i in self.__string_indices:
+            values[i] = values[i].rstrip(b"\0").decode()
+
+        if presence != self.__all_present:
+            for i in range(self.__field_count):
+                if not presence & (1 << i):
+                    values[i] = None
+
+        return self.record_type(*values)
+
+
+class _Record(bytes):
+    """
+    Record made by encode(), so that decode() never mistakes other bytes for one.
+    """
+
+    __slots__ = ()
+
+
+# Registered codecs, by class and by type id
+_CODECS_BY_TYPE: "dict[type, StructCodec]" = {}
+_CODECS_BY_ID: "dict[int, StructCodec]" = {}
+
+
+def register(record_type: type, type_id: int, fields: "list[tuple[str, str]]") -> StructCodec:
+    """
+    Registers a codec for the class. Call at import time of the module defining the class,
+    so that every process that can decode the class has the codec.
+
+    record_type: Class to encode.
+    type_id: Identifier in the range [0, 255], unique across all registered classes.
+    fields: Name and `struct` format of each field, in constructor order.
+
+    Returns the codec.
+    """
+    existing = _CODECS_BY_ID.get(type_id)
+    if existing is not None and existing.record_type.__qualname__ != record_type.__qualname__:
+        raise ValueError(f"Type id {type_id} already registered to {existing.record_type}")
+
+    codec = StructCodec(record_type, type_id, fields)
+    _CODECS_BY_TYPE[record_type] = codec
+    _CODECS_BY_ID[type_id] = codec
+    return codec
+
+
+def get_codec(record_type: type) -> "StructCodec | None":
+    """
+    Returns the codec registered for the class, if any.
+    """
+    return _CODECS_BY_TYPE.get(record_type)
+
+
+def encode(item: object) -> object:
+    """
+    Encoder hook for queues: packs registered classes, passes everything else through.
+    Items that cannot be packed, such as those with a string longer than its field,
+    are also passed through, so they are pickled instead.
+    """
+    codec = _CODECS_BY_TYPE.get(type(item))
+    if codec is None:
+        return item
+
+    try:
+        return _Record(codec.encode(item))
+    except ValueError:
+        return item
+
+
+def decode(item: object) -> object:
+    """
+    Decoder hook for queues: unpacks records made by encode(), passes everything else through.
+    """
+    if not isinstance(item, _Record):
+        return item
+
+    codec = _CODECS_BY_ID.get(item[len(StructCodec.MAGIC)])
+    if codec is None or len(item) != codec.record_size:
+        return item
+
+    return codec.decode(item)
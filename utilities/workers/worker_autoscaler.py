@@ -0,0 +1,287 @@
+"""
+Scaling worker counts with the depth of their input queues.
+"""
+
+import threading
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class StageStatus:
+    """
+    Snapshot of an autoscaled stage at its last sample.
+    """
+
+    def __init__(self, group: str, worker_count: int, queue_depth: int, throughput: float) -> None:
+        """
+        group: Name of the group of the workers of the stage.
+        worker_count: Number of active workers.
+        queue_depth: Number of queue items waiting in the input queues.
+        throughput: Items per second removed from the input queues.
+        """
+        self.group = group
+        self.worker_count = worker_count
+        self.queue_depth = queue_depth
+        self.throughput = throughput
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return (
+            f"{self.__class__}, group: {self.group}, workers: {self.worker_count}, "
+            f"queue depth: {self.queue_depth}, throughput: {self.throughput:.1f} items/s"
+        )
+
+
+class _Stage:  # pylint: disable=too-many-instance-attributes
+    """
+    Scaling settings and sampling state of a stage.
+    """
+
+    def __init__(
+        self,
+        manager: worker_manager.WorkerManager,
+        min_workers: int,
+        max_workers: int,
+        high_watermark: int,
+        low_watermark: int,
+        scale_up_samples: int,
+        scale_down_samples: int,
+    ) -> None:
+        self.manager = manager
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.scale_up_samples = scale_up_samples
+        self.scale_down_samples = scale_down_samples
+
+        # Consecutive samples above the high watermark and below the low watermark
+        self.high_samples = 0
+        self.low_samples = 0
+        # Highest throughput per worker seen while the stage was saturated
+        self.capacity_per_worker: "float | None" = None
+
+        self.last_consumed_count = self.get_consumed_count()
+        self.last_sample_time = time.monotonic()
+        self.status = StageStatus(manager.get_group_name(), manager.get_worker_count(), 0, 0.0)
+
+    def get_queue_depth(self) -> int:
+        """
+        Returns the number of queue items in the input queues.
+        """
+        return sum(data_queue.queue.qsize() for data_queue in self.manager.get_input_queues())
+
+    def get_consumed_count(self) -> int:
+        """
+        Returns the number of items removed from the input queues.
+        """
+        return sum(
+            data_queue.get_consumed_count() for data_queue in self.manager.get_input_queues()
+        )
+
+
+class WorkerAutoscaler:
+    """
+    Adds workers to a stage while its input queues stay full and are being consumed,
+    and retires them while they stay empty, within bounds. Requiring several consecutive samples gives hysteresis.
+
+    A worker is only retired if the measured throughput of the remaining workers,
+    taken while the stage was saturated, can carry the current throughput.
+    Retired workers are asked to exit and finish their current iteration,
+    so they must not block forever on an empty input queue.
+
+    Samples are taken by the WorkerSupervisor, which is the only thread that changes workers.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        local_logger: logger.Logger,
+        sample_period: float = 0.5,
+    ) -> "tuple[bool, WorkerAutoscaler | None]":
+        """
+        Creates the autoscaler, then add stages and pass it to the supervisor.
+
+        local_logger: Existing logger from process.
+        sample_period: Time in seconds between samples.
+
+        Returns whether the autoscaler was created and the autoscaler.
+        """
+        if sample_period <= 0.0:
+            local_logger.error(f"Sample period must be positive: {sample_period}", True)
+            return False, None
+
+        return True, WorkerAutoscaler(cls.__create_key, local_logger, sample_period)
+
+    def __init__(
+        self, class_private_create_key: object, local_logger: logger.Logger, sample_period: float
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerAutoscaler.__create_key, "Use create() method"
+
+        self.__local_logger = local_logger
+        self.__sample_period = sample_period
+        self.__stages: "list[_Stage]" = []
+        # Guards the stage statuses, which main reads while the supervisor updates them
+        self.__lock = threading.Lock()
+
+    def add_stage(
+        self,
+        manager: worker_manager.WorkerManager,
+        min_workers: int,
+        max_workers: int,
+        high_watermark: int,
+        low_watermark: int = 0,
+        scale_up_samples: int = 2,
+        scale_down_samples: int = 6,
+    ) -> bool:
+        """
+        Scales the workers of the manager. Call before the supervisor is started.
+
+        manager: Manager of the workers of the stage, with at least one input queue.
+        min_workers: Fewest workers, at least 1.
+        max_workers: Most workers.
+        high_watermark: Queue depth at or above which the stage is saturated, if consuming.
+        low_watermark: Queue depth at or below which the stage is idle.
+        scale_up_samples: Consecutive saturated samples before adding a worker.
+        scale_down_samples: Consecutive idle samples before retiring a worker.
+
+        Returns whether the stage was added.
+        """
+        if len(manager.get_input_queues()) == 0:
+            self.__local_logger.error(
+                f"Cannot autoscale {manager.get_group_name()}, it has no input queues", True
+            )
+            return False
+
+        if not 1 <= min_workers <= max_workers:
+            self.__local_logger.error(
+                f"Invalid worker bounds for {manager.get_group_name()}: "
+                f"{min_workers} to {max_workers}",
+                True,
+            )
+            return False
+
+        if low_watermark >= high_watermark:
+            self.__local_logger.error(
+                f"Low watermark {low_watermark} must be below high watermark {high_watermark}",
+                True,
+            )
+            return False
+
+        self.__stages.append(
+            _Stage(
+                manager,
+                min_workers,
+                max_workers,
+                high_watermark,
+                low_watermark,
+                max(scale_up_samples, 1),
+                max(scale_down_samples, 1),
+            )
+        )
+
+        return True
+
+    def get_sample_period(self) -> float:
+        """
+        Returns the time in seconds between samples.
+        """
+        return self.__sample_period
+
+    def get_status(self) -> "list[StageStatus]":
+        """
+        Returns a snapshot of every stage at its last sample.
+        """
+        with self.__lock:
+            return [
+                StageStatus(
+                    stage.status.group,
+                    stage.status.worker_count,
+                    stage.status.queue_depth,
+                    stage.status.throughput,
+                )
+                for stage in self.__stages
+            ]
+
+    def sample(self) -> None:
+        """
+        Samples every stage, and adds or retires at most one worker per stage.
+        """
+        for stage in self.__stages:
+            self.__sample_stage(stage)
+
+    def __sample_stage(self, stage: _Stage) -> None:
+        """
+        Samples the stage and scales it.
+        """
+        manager = stage.manager
+        manager.remove_retired_workers()
+
+        now = time.monotonic()
+        consumed_count = stage.get_consumed_count()
+        throughput = (consumed_count - stage.last_consumed_count) / max(
+            now - stage.last_sample_time, 1e-9
+        )
+        stage.last_consumed_count = consumed_count
+        stage.last_sample_time = now
+
+        depth = stage.get_queue_depth()
+        worker_count = manager.get_active_worker_count()
+
+        # A full queue that is not being consumed, such as while paused, is not saturation
+        if depth >= stage.high_watermark and throughput > 0.0:
+            stage.high_samples += 1
+            stage.low_samples = 0
+            if worker_count > 0:
+                stage.capacity_per_worker = max(
+                    stage.capacity_per_worker or 0.0, throughput / worker_count
+                )
+        elif depth <= stage.low_watermark:
+            stage.high_samples = 0
+            stage.low_samples += 1
+        else:
+            stage.high_samples = 0
+            stage.low_samples = 0
+
+        # Wait for retiring workers to be removed before adding, so indices stay contiguous
+        if (
+            stage.high_samples >= stage.scale_up_samples
+            and worker_count < stage.max_workers
+            and manager.get_worker_count() == worker_count
+        ):
+            if manager.add_worker():
+                worker_count += 1
+                self.__local_logger.info(
+                    f"Added worker to {manager.get_group_name()}, now {worker_count}, "
+                    f"queue depth: {depth}",
+                    True,
+                )
+            stage.high_samples = 0
+        elif (
+            stage.low_samples >= stage.scale_down_samples
+            and worker_count > stage.min_workers
+            and (
+                stage.capacity_per_worker is None
+                or throughput <= stage.capacity_per_worker * (worker_count - 1)
+            )
+        ):
+            manager.retire_worker()
+            worker_count -= 1
+            self.__local_logger.info(
+                f"Retiring worker of {manager.get_group_name()}, now {worker_count}, "
+                f"throughput: {throughput:.1f} items/s",
+                True,
+            )
+            stage.low_samples = 0
+
+        with self.__lock:
+            stage.status = StageStatus(manager.get_group_name(), worker_count, depth, throughput)
@@ -2,66 +2,220 @@
 For controlling workers.
 """
 
+import copy
+import ctypes
 import multiprocessing as mp
 import time
 
 
-class WorkerController:
+class WorkerController:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
-    Contains exit and pause requests.
+    Contains exit and pause requests, and acknowledgements of exit from workers.
+
+    Requests are bits of state words in shared memory, so checking them in the worker loop
+    is a few memory reads. Paused workers and main waiting for acknowledgements poll
+    the shared memory rather than being signalled, so a worker killed while paused
+    never stalls main.
+
+    Requests can target all workers, a named group of workers, or a single worker of a group.
+    Workers receive a view bound to their group and index with `bind()`,
+    which sees the requests for all workers, its group, and itself.
     """
 
-    __QUEUE_DELAY = 0.1  # seconds
+    __EXIT = 0x1
+    __PAUSE = 0x2
+
+    # State word for all workers
+    __GLOBAL_SLOT = 0
+    DEFAULT_MAX_SLOTS = 64
+
+    # Time between checks of the state while paused
+    __PAUSE_POLL_PERIOD = 0.01  # seconds
+    # Time between checks of the count while waiting for exit acknowledgements
+    __ACKNOWLEDGEMENT_POLL_PERIOD = 0.001  # seconds
+
+    def __init__(self, max_slots: int = DEFAULT_MAX_SLOTS) -> None:
+        """
+        Constructor creates the shared state words, lock, and acknowledgement counter.
+
+        max_slots: Maximum number of groups plus workers that can be addressed individually.
+        """
+        self.__states = mp.RawArray(ctypes.c_uint32, 1 + max_slots)
+        # Held only while changing a shared word, never while waiting
+        self.__lock = mp.Lock()
+        self.__exit_acknowledgements = mp.RawValue(ctypes.c_uint32, 0)
+        # Time of the first loop iteration of each worker, 0 if it has not happened yet
+        self.__first_iteration_times = mp.RawArray(ctypes.c_double, 1 + max_slots)
+        # Local to each worker process
+        self.__first_iteration_recorded = False
+
+        # Slot allocation only happens in main, before workers are started
+        self.__group_slots: "dict[str, int]" = {}
+        self.__worker_slots: "dict[tuple[str, int], int]" = {}
+        self.__next_slot = self.__GLOBAL_SLOT + 1
+
+        # State words this view checks
+        self.__view_slots = (self.__GLOBAL_SLOT, self.__GLOBAL_SLOT, self.__GLOBAL_SLOT)
 
-    def __init__(self) -> None:
+    def __allocate_slot(self) -> int:
         """
-        Constructor creates internal queue and semaphore.
+        Returns an unused state word.
         """
-        self.__pause = mp.BoundedSemaphore(1)
-        self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        if self.__next_slot >= len(self.__states):
+            raise ValueError(f"All {len(self.__states) - 1} controller slots are in use")
 
-    def request_pause(self) -> None:
+        slot = self.__next_slot
+        self.__next_slot += 1
+        return slot
+
+    def __get_slot(self, group: "str | None", index: "int | None") -> int:
+        """
+        Returns the state word for all workers, a group, or a worker of a group.
+        """
+        if group is None:
+            assert index is None, "Worker index requires a group"
+            return self.__GLOBAL_SLOT
+
+        if group not in self.__group_slots:
+            self.__group_slots[group] = self.__allocate_slot()
+
+        if index is None:
+            return self.__group_slots[group]
+
+        if (group, index) not in self.__worker_slots:
+            self.__worker_slots[(group, index)] = self.__allocate_slot()
+
+        return self.__worker_slots[(group, index)]
+
+    def bind(self, group: str, index: int) -> "WorkerController":
+        """
+        Creates the view of the controller to pass to a worker.
+
+        group: Name of the group of the worker.
+        index: Index of the worker within its group.
+
+        Returns a controller that sees requests for all workers, the group, and the worker.
+        """
+        view = copy.copy(self)
+        # Same class, the view shares all state except the slots it checks
+        # pylint: disable-next=protected-access,unused-private-member
+        view.__view_slots = (
+            self.__GLOBAL_SLOT,
+            self.__get_slot(group, None),
+            self.__get_slot(group, index),
+        )
+        return view
+
+    def __get_state(self) -> int:
+        """
+        Combined state seen by this view.
+        """
+        states = self.__states
+        global_slot, group_slot, worker_slot = self.__view_slots
+        return states[global_slot] | states[group_slot] | states[worker_slot]
+
+    def __set_flag(self, flag: int, group: "str | None", index: "int | None") -> None:
+        """
+        Sets the flag, waiting workers see it on their next poll.
+        """
+        slot = self.__get_slot(group, index)
+        with self.__lock:
+            self.__states[slot] |= flag
+
+    def __clear_flag(self, flag: int, group: "str | None", index: "int | None") -> None:
+        """
+        Clears the flag, waiting workers see it on their next poll.
+        """
+        slot = self.__get_slot(group, index)
+        with self.__lock:
+            self.__states[slot] &= ~flag
+
+    def request_pause(self, group: "str | None" = None, index: "int | None" = None) -> None:
         """
         Requests worker processes to pause.
+
+        group: Only pause this group, None for all workers.
+        index: Only pause this worker of the group, None for the whole group.
         """
-        if not self.__is_paused:
-            self.__pause.acquire()
-            self.__is_paused = True
+        self.__set_flag(self.__PAUSE, group, index)
 
-    def request_resume(self) -> None:
+    def request_resume(self, group: "str | None" = None, index: "int | None" = None) -> None:
         """
         Requests worker processes to resume.
+        Only clears the pause request made with the same group and index.
+
+        group: Only resume this group, None for all workers.
+        index: Only resume this worker of the group, None for the whole group.
         """
-        if self.__is_paused:
-            self.__pause.release()
-            self.__is_paused = False
+        self.__clear_flag(self.__PAUSE, group, index)
 
     def check_pause(self) -> None:
         """
         Blocks worker if main has requested it to pause, otherwise continues.
+        Also continues once exit is requested, so paused workers can exit.
+        The first call of each worker records its first loop iteration.
+        """
+        if not self.__first_iteration_recorded:
+            self.__first_iteration_recorded = True
+            self.__first_iteration_times[self.__view_slots[2]] = time.monotonic()
+
+        if not self.__get_state() & self.__PAUSE:
+            return
+
+        # Notifying an mp.Condition waits for every woken worker to acknowledge,
+        # forever if one was killed while paused, so paused workers poll instead
+        while self.__get_state() & (self.__PAUSE | self.__EXIT) == self.__PAUSE:
+            time.sleep(self.__PAUSE_POLL_PERIOD)
+
+    def get_first_iteration_time(self, group: str, index: int) -> "float | None":
         """
-        self.__pause.acquire()
-        self.__pause.release()
+        Returns the `time.monotonic()` of the first loop iteration of the worker,
+        None if it has not happened since it was last cleared.
 
-    def request_exit(self) -> None:
+        group: Name of the group of the worker.
+        index: Index of the worker within its group.
+        """
+        first_iteration_time = self.__first_iteration_times[self.__get_slot(group, index)]
+        if first_iteration_time == 0.0:
+            return None
+
+        return first_iteration_time
+
+    def clear_first_iteration_time(self, group: str, index: int) -> None:
+        """
+        Clears the first loop iteration of the worker, call before starting a process for it.
+
+        group: Name of the group of the worker.
+        index: Index of the worker within its group.
+        """
+        self.__first_iteration_times[self.__get_slot(group, index)] = 0.0
+
+    def request_exit(self, group: "str | None" = None, index: "int | None" = None) -> None:
         """
         Requests worker processes to exit.
         Does nothing if already requested.
+
+        group: Only this group, None for all workers.
+        index: Only this worker of the group, None for the whole group.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        self.__set_flag(self.__EXIT, group, index)
 
-    def clear_exit(self) -> None:
+    def clear_exit(self, group: "str | None" = None, index: "int | None" = None) -> None:
         """
         Clears the exit request condition.
+        Clearing for all workers also clears the exit acknowledgements.
         Does nothing if already cleared.
+
+        group: Only this group, None for all workers.
+        index: Only this worker of the group, None for the whole group.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        self.__clear_flag(self.__EXIT, group, index)
+        if group is not None:
+            return
+
+        with self.__lock:
+            self.__exit_acknowledgements.value = 0
 
     def is_exit_requested(self) -> bool:
         """
@@ -69,4 +223,35 @@ class WorkerController:
         There is a race condition, but it's fine because the worker process
         will do at most 1 additional loop.
         """
-        return not self.__exit_queue.empty()
+        return self.__get_state() & self.__EXIT != 0
+
+    def acknowledge_exit(self) -> None:
+        """
+        Called once by each worker after it has left its loop.
+        """
+        with self.__lock:
+            self.__exit_acknowledgements.value += 1
+
+    def get_exit_acknowledgement_count(self) -> int:
+        """
+        Returns the number of workers that have acknowledged exit since the last clear.
+        """
+        return self.__exit_acknowledgements.value
+
+    def wait_for_exit_acknowledgements(self, count: int, timeout: float) -> bool:
+        """
+        Waits until at least count workers have acknowledged exit.
+
+        count: Number of acknowledgements expected.
+        timeout: Time waiting in seconds before giving up.
+
+        Returns whether all acknowledgements arrived.
+        """
+        deadline = time.monotonic() + timeout
+        while self.__exit_acknowledgements.value < count:
+            if time.monotonic() >= deadline:
+                return False
+
+            time.sleep(self.__ACKNOWLEDGEMENT_POLL_PERIOD)
+
+        return True
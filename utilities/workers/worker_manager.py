@@ -2,14 +2,235 @@
 For managing workers.
 """
 
+import enum
 import multiprocessing as mp
+import multiprocessing.connection
+import os
+import threading
+import time
+import traceback
+import weakref
 
 from modules.common.modules.logger import logger
 from utilities.workers import worker_controller
 from utilities.workers import queue_proxy_wrapper
 
 
-class WorkerProperties:
+# Longest wait for a started worker to report whether its scheduling was applied
+SCHEDULING_REPORT_TIMEOUT = 5  # seconds
+# Longest wait for a worker to die after each escalation when joining
+JOIN_ESCALATION_TIMEOUT = 1  # seconds
+
+
+class ExecutionMode(enum.Enum):
+    """
+    What the workers of a manager run in.
+    """
+
+    # Own process each
+    PROCESS = 0
+    # Thread of main each, for workers that mostly wait
+    THREAD = 1
+
+
+class JoinOutcome(enum.Enum):
+    """
+    How a worker ended when joined.
+    """
+
+    # Left by itself before the deadline
+    EXITED = 0
+    # Ended by terminate() after the deadline
+    TERMINATED = 1
+    # Ended by kill() after terminate() did not end it
+    KILLED = 2
+    # Still running, either a thread or a process that survived kill()
+    HUNG = 3
+
+
+class WorkerJoinReport:
+    """
+    How a worker was joined.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        pid: "int | None",
+        outcome: JoinOutcome,
+        exit_code: "int | None",
+        duration: float,
+    ) -> None:
+        """
+        index: Index of the worker in its group.
+        pid: Process id of the worker.
+        outcome: How the worker ended.
+        exit_code: Exit code of the worker, None if it is still running.
+        duration: Time in seconds from the start of the join until the worker ended,
+            or until the join gave up on it.
+        """
+        self.index = index
+        self.pid = pid
+        self.outcome = outcome
+        self.exit_code = exit_code
+        self.duration = duration
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return (
+            f"{self.__class__}, index: {self.index}, pid: {self.pid}, "
+            f"outcome: {self.outcome.name}, exit code: {self.exit_code}, "
+            f"duration: {self.duration:.3f} s"
+        )
+
+
+# Sending ends of the sentinels of thread workers. A forked process inherits them,
+# which would keep each sentinel from becoming ready until that process also exits
+_thread_sentinel_senders: "weakref.WeakSet[multiprocessing.connection.Connection]" = (
+    weakref.WeakSet()
+)
+
+
+def _close_thread_sentinel_senders() -> None:
+    """
+    Closes the inherited sending ends in a forked process, which runs none of the threads.
+    """
+    for sender in list(_thread_sentinel_senders):
+        sender.close()
+
+    _thread_sentinel_senders.clear()
+
+
+# Processes are never forked on Windows
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_close_thread_sentinel_senders)
+
+
+class _ThreadWorker:  # pylint: disable=too-many-instance-attributes
+    """
+    Runs a worker in a thread of main, with the parts of the `mp.Process` interface
+    that the manager and supervisor use. Threads cannot be killed, so a thread worker
+    must leave its loop by itself once exit is requested.
+    """
+
+    def __init__(self, target: "(...) -> object", args: "tuple") -> None:  # type: ignore
+        """
+        target: Function.
+        args: Target function arguments.
+        """
+        self.__target = target
+        self.__args = args
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.name = self.__thread.name
+        self.pid: "int | None" = None
+        self.exitcode: "int | None" = None
+        # Becomes readable when the thread ends, like the sentinel of a process
+        self.sentinel, self.__sentinel_sender = multiprocessing.connection.Pipe(False)
+        _thread_sentinel_senders.add(self.__sentinel_sender)
+
+    def __run(self) -> None:
+        """
+        Runs the target, recording the exit code like a process would.
+        """
+        exitcode = 1
+        try:
+            self.__target(*self.__args)
+            exitcode = 0
+        # Reported like an uncaught exception in a process
+        # pylint: disable-next=broad-exception-caught
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self.exitcode = exitcode
+            _thread_sentinel_senders.discard(self.__sentinel_sender)
+            self.__sentinel_sender.close()
+
+    def start(self) -> None:
+        """
+        Starts the thread.
+        """
+        self.pid = os.getpid()
+        self.__thread.start()
+
+    @property
+    def native_id(self) -> "int | None":
+        """
+        Thread id given by the OS, None before the thread starts.
+        """
+        return self.__thread.native_id
+
+    def is_alive(self) -> bool:
+        """
+        Returns whether the thread is running.
+        """
+        return self.__thread.is_alive()
+
+    def join(self, timeout: "float | None" = None) -> None:
+        """
+        Waits for the thread to end.
+        """
+        self.__thread.join(timeout)
+
+
+def _apply_scheduling(
+    cpu_affinity: "set[int] | None", nice: "int | None", fifo_priority: "int | None"
+) -> "list[str]":
+    """
+    Applies the scheduling settings to the calling process.
+
+    Returns a description of each setting the OS refused.
+    """
+    failures = []
+
+    if cpu_affinity is not None:
+        try:
+            os.sched_setaffinity(0, cpu_affinity)
+        except (AttributeError, OSError) as e:
+            failures.append(f"CPU affinity {sorted(cpu_affinity)} not applied: {e}")
+
+    if nice is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+        except (AttributeError, OSError) as e:
+            failures.append(f"Nice value {nice} not applied: {e}")
+
+    if fifo_priority is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo_priority))
+        except (AttributeError, OSError) as e:
+            failures.append(f"SCHED_FIFO priority {fifo_priority} not applied: {e}")
+
+    return failures
+
+
+def _run_worker(
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+    controller: worker_controller.WorkerController,
+    scheduling: "tuple[set[int] | None, int | None, int | None] | None",
+    report_sender: "multiprocessing.connection.Connection | None",
+) -> None:
+    """
+    Entry point of every worker process: applies the scheduling settings and reports
+    the ones that failed to main, runs the target, then acknowledges exit to main.
+    Acknowledges even if the target raised during shutdown, so that shutdown does not wait
+    on a crashed worker.
+    """
+    if scheduling is not None and report_sender is not None:
+        report_sender.send(_apply_scheduling(*scheduling))
+
+    try:
+        target(*args)
+    finally:
+        # A worker that crashed before exit was requested may be restarted, and its replacement
+        # acknowledges instead
+        if controller.is_exit_requested():
+            controller.acknowledge_exit()
+
+
+class WorkerProperties:  # pylint: disable=too-many-instance-attributes
     """
     Worker Properties.
     """
@@ -26,6 +247,10 @@ class WorkerProperties:
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
         local_logger: logger.Logger,
+        group: "str | None" = None,
+        cpu_affinity: "set[int] | None" = None,
+        nice: "int | None" = None,
+        fifo_priority: "int | None" = None,
     ) -> "tuple[bool, WorkerProperties | None]":
         """
         Creates worker properties.
@@ -37,6 +262,12 @@ class WorkerProperties:
         output_queues: Output queues.
         controller: Worker controller.
         local_logger: Existing logger from process.
+        group: Name to address these workers with the controller, defaults to the target name.
+        cpu_affinity: CPUs the workers may run on, None for any.
+        nice: Nice value of the workers in [-20, 19], None to inherit it.
+            Values below that of main usually need elevated privileges.
+        fifo_priority: Real time SCHED_FIFO priority in [1, 99], None for the normal scheduler.
+            Usually needs elevated privileges.
 
         Returns the WorkerProperties object.
         """
@@ -47,6 +278,20 @@ class WorkerProperties:
             )
             return False, None
 
+        if cpu_affinity is not None and (
+            len(cpu_affinity) == 0 or any(cpu < 0 for cpu in cpu_affinity)
+        ):
+            local_logger.error(f"Invalid CPU affinity: {cpu_affinity}", True)
+            return False, None
+
+        if nice is not None and not -20 <= nice <= 19:
+            local_logger.error(f"Nice value out of range: {nice}", True)
+            return False, None
+
+        if fifo_priority is not None and not 1 <= fifo_priority <= 99:
+            local_logger.error(f"SCHED_FIFO priority out of range: {fifo_priority}", True)
+            return False, None
+
         return True, WorkerProperties(
             cls.__create_key,
             count,
@@ -55,6 +300,10 @@ class WorkerProperties:
             input_queues,
             output_queues,
             controller,
+            group if group is not None else target.__name__,
+            cpu_affinity,
+            nice,
+            fifo_priority,
         )
 
     def __init__(
@@ -66,6 +315,10 @@ class WorkerProperties:
         input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
+        group: str,
+        cpu_affinity: "set[int] | None",
+        nice: "int | None",
+        fifo_priority: "int | None",
     ) -> None:
         """
         Private constructor, use create() method.
@@ -78,18 +331,24 @@ class WorkerProperties:
         self.__input_queues = input_queues
         self.__output_queues = output_queues
         self.__controller = controller
+        self.__group = group
+        self.__cpu_affinity = cpu_affinity
+        self.__nice = nice
+        self.__fifo_priority = fifo_priority
 
-    def get_worker_arguments(self) -> "tuple":
+    def get_worker_arguments(self, worker_index: "int | None" = None) -> "tuple":
         """
         Concatenates the worker properties into a tuple.
 
+        worker_index: Index of the worker in its group, to bind the controller to.
+
         Returns the worker properties as a tuple.
         """
         return (
             self.__work_arguments
             + tuple(self.__input_queues)
             + tuple(self.__output_queues)
-            + (self.__controller,)
+            + (self.get_controller(worker_index),)
         )
 
     def get_worker_count(self) -> int:
@@ -104,12 +363,47 @@ class WorkerProperties:
         """
         return self.__target
 
+    def get_controller(
+        self, worker_index: "int | None" = None
+    ) -> worker_controller.WorkerController:
+        """
+        Returns the worker controller.
+
+        worker_index: Index of the worker in its group, None for the unbound controller.
+        """
+        if worker_index is None:
+            return self.__controller
+
+        return self.__controller.bind(self.__group, worker_index)
+
+    def get_group_name(self) -> str:
+        """
+        Returns the name of the group to address these workers with the controller.
+        """
+        return self.__group
+
+    def get_scheduling(self) -> "tuple[set[int] | None, int | None, int | None] | None":
+        """
+        Returns the CPU affinity, nice value, and SCHED_FIFO priority,
+        or None if the workers use the scheduling of main.
+        """
+        if self.__cpu_affinity is None and self.__nice is None and self.__fifo_priority is None:
+            return None
+
+        return self.__cpu_affinity, self.__nice, self.__fifo_priority
+
     def get_input_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
         """
         Returns the input queues.
         """
         return self.__input_queues
 
+    def get_output_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the output queues.
+        """
+        return self.__output_queues
+
     def get_target_name(self) -> str:
         """
         Returns the name of the target.
@@ -117,7 +411,7 @@ class WorkerProperties:
         return self.__target.__name__
 
 
-class WorkerManager:
+class WorkerManager:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
@@ -130,31 +424,69 @@ class WorkerManager:
         cls,
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
+        start_method: "str | None" = None,
+        preload: "list[str] | None" = None,
+        execution_mode: ExecutionMode = ExecutionMode.PROCESS,
     ) -> "tuple[bool, WorkerManager | None]":
         """
         Create identical workers and append them to a workers list.
 
         worker_properties: Worker properties.
         local_logger: Existing logger from process.
+        start_method: "fork", "spawn", or "forkserver", None for the program default.
+            Locks created with the fork start method cannot be passed to workers started
+            any other way, so call `mp.set_start_method()` with a method other than fork
+            before creating the controller and queues of these workers.
+        preload: Modules the forkserver imports once, so that workers forked from it
+            do not import them again. Only with the "forkserver" start method.
+            The forkserver is shared by the whole program and only uses the preload set
+            before it started, which is before the first worker with that method starts.
+        execution_mode: Whether the workers are processes or threads of main.
+            Call localize_thread_queues() once all managers are created,
+            so that queues only used by threads skip interprocess communication.
 
         Returns whether the workers were able to be created and the Worker Manager.
         """
+        if execution_mode == ExecutionMode.THREAD and (
+            start_method is not None or preload is not None
+        ):
+            local_logger.error("Start method and preload only apply to process workers", True)
+            return False, None
+
+        if start_method is not None and start_method not in mp.get_all_start_methods():
+            local_logger.error(
+                f"Start method {start_method} not one of {mp.get_all_start_methods()}", True
+            )
+            return False, None
+
+        if preload is not None and start_method != "forkserver":
+            local_logger.error(f"Preload requires the forkserver start method: {preload}", True)
+            return False, None
+
+        context = mp.get_context(start_method)
+        if preload is not None:
+            context.set_forkserver_preload(preload)
+
         workers = []
-        for _ in range(0, worker_properties.get_worker_count()):
+        report_pipes = []
+        for i in range(0, worker_properties.get_worker_count()):
+            report_pipe = WorkerManager.__create_report_pipe(context, worker_properties)
             result, worker = WorkerManager.__create_single_worker(
-                worker_properties.get_worker_target(),
-                worker_properties.get_worker_arguments(),
-                local_logger,
+                context, execution_mode, worker_properties, i, report_pipe, local_logger
             )
             if not result:
                 local_logger.error("Failed to create worker", True)
                 return False, None
 
             workers.append(worker)
+            report_pipes.append(report_pipe)
 
         return True, WorkerManager(
             cls.__create_key,
+            context,
+            execution_mode,
             workers,
+            report_pipes,
             worker_properties,
             local_logger,
         )
@@ -162,7 +494,10 @@ class WorkerManager:
     def __init__(
         self,
         class_private_create_key: object,
-        workers: "list[mp.Process]",
+        context: "mp.context.BaseContext",
+        execution_mode: ExecutionMode,
+        workers: "list[mp.Process | _ThreadWorker]",
+        report_pipes: "list[tuple[multiprocessing.connection.Connection, multiprocessing.connection.Connection] | None]",
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
     ) -> None:
@@ -171,23 +506,66 @@ class WorkerManager:
         """
         assert class_private_create_key is WorkerManager.__create_key, "Use create() method"
 
+        self.__context = context
+        self.__execution_mode = execution_mode
         self.__workers = workers
+        # Receiving and sending ends of the scheduling report of each worker, None if not needed
+        self.__report_pipes = report_pipes
         self.__worker_properties = worker_properties
         self.__local_logger = local_logger
+        # Workers from this index onwards are retiring
+        self.__active_count = len(workers)
+        # Time each worker process was started, None if not yet
+        self.__start_times: "list[float | None]" = [None] * len(workers)
 
     @staticmethod
-    def __create_single_worker(target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
+    def __create_report_pipe(
+        context: "mp.context.BaseContext", worker_properties: WorkerProperties
+    ) -> (
+        "tuple[multiprocessing.connection.Connection, multiprocessing.connection.Connection] | None"
+    ):
+        """
+        Returns the pipe for a worker to report its scheduling, None if it has none to apply.
+        """
+        if worker_properties.get_scheduling() is None:
+            return None
+
+        return context.Pipe(False)
+
+    @staticmethod
+    def __create_single_worker(
+        context: "mp.context.BaseContext",
+        execution_mode: ExecutionMode,
+        worker_properties: WorkerProperties,
+        worker_index: int,
+        report_pipe: "tuple[multiprocessing.connection.Connection, multiprocessing.connection.Connection] | None",
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, mp.Process | _ThreadWorker | None]":
         """
         Creates a single worker.
 
-        target: Function.
-        args: Target function arguments.
+        context: Multiprocessing context of the start method.
+        execution_mode: Whether the worker is a process or a thread.
+        worker_properties: Worker properties.
+        worker_index: Index of the worker in its group.
+        report_pipe: Pipe for the worker to report its scheduling on.
         local_logger: Existing logger from process.
 
         Returns whether a worker was created and the worker.
         """
+        args = (
+            worker_properties.get_worker_target(),
+            worker_properties.get_worker_arguments(worker_index),
+            worker_properties.get_controller(worker_index),
+            worker_properties.get_scheduling(),
+            None if report_pipe is None else report_pipe[1],
+        )
+
+        if execution_mode == ExecutionMode.THREAD:
+            return True, _ThreadWorker(_run_worker, args)
+
         try:
-            worker = mp.Process(target=target, args=args)
+            worker = context.Process(target=_run_worker, args=args)
         # Catching all exceptions for library call
         # pylint: disable-next=broad-exception-caught
         except Exception as e:
@@ -196,19 +574,335 @@ class WorkerManager:
 
         return True, worker
 
+    def get_worker_count(self) -> int:
+        """
+        Returns the number of workers managed.
+        """
+        return len(self.__workers)
+
+    def get_alive_worker_count(self) -> int:
+        """
+        Returns the number of workers currently running.
+        """
+        return sum(1 for worker in self.__workers if worker.is_alive())
+
+    def get_active_worker_count(self) -> int:
+        """
+        Returns the number of workers managed that are not retiring.
+        """
+        return self.__active_count
+
+    def get_input_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the input queues of the workers.
+        """
+        return self.__worker_properties.get_input_queues()
+
+    def get_output_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the output queues of the workers.
+        """
+        return self.__worker_properties.get_output_queues()
+
+    def get_execution_mode(self) -> ExecutionMode:
+        """
+        Returns whether the workers are processes or threads.
+        """
+        return self.__execution_mode
+
+    def __start_worker(self, worker_index: int) -> None:
+        """
+        Starts the worker process, timing it until its first loop iteration.
+        """
+        self.__worker_properties.get_controller().clear_first_iteration_time(
+            self.get_group_name(), worker_index
+        )
+        self.__start_times[worker_index] = time.monotonic()
+        self.__workers[worker_index].start()
+
+    def __log_scheduling_reports(self, worker_indices: "list[int]") -> None:
+        """
+        Waits for the started workers to apply their scheduling,
+        and logs a warning for each setting the OS refused.
+        """
+        waiting = {}
+        for i in worker_indices:
+            report_pipe = self.__report_pipes[i]
+            if report_pipe is not None:
+                waiting[report_pipe[0]] = i
+
+        deadline = time.monotonic() + SCHEDULING_REPORT_TIMEOUT
+        while len(waiting) > 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0.0:
+                break
+
+            for receiver in multiprocessing.connection.wait(list(waiting.keys()), remaining):
+                i = waiting.pop(receiver)
+                for failure in receiver.recv():
+                    self.__local_logger.warning(f"{self.get_group_name()} {i}: {failure}", True)
+
+        for i in waiting.values():
+            self.__local_logger.warning(
+                f"{self.get_group_name()} {i} did not report whether its scheduling was applied",
+                True,
+            )
+
     def start_workers(self) -> None:
         """
-        Start workers.
+        Start workers, then waits until they have applied their scheduling, if any.
         """
-        for worker in self.__workers:
-            worker.start()
+        for i in range(len(self.__workers)):
+            self.__start_worker(i)
 
-    def join_workers(self) -> None:
+        self.__log_scheduling_reports(list(range(len(self.__workers))))
+
+    def get_startup_times(self) -> "list[float | None]":
         """
-        Join workers.
+        Returns the time in seconds from starting each worker process to its first loop
+        iteration, None if the worker has not started or reached its loop yet.
+        Covers the latest process of each worker, so restarts are timed too.
         """
-        for worker in self.__workers:
+        startup_times = []
+        for i, start_time in enumerate(self.__start_times):
+            first_iteration_time = (
+                self.__worker_properties.get_controller().get_first_iteration_time(
+                    self.get_group_name(), i
+                )
+            )
+            if start_time is None or first_iteration_time is None:
+                startup_times.append(None)
+                continue
+
+            startup_times.append(first_iteration_time - start_time)
+
+        return startup_times
+
+    def join_workers(
+        self,
+        timeout: "float | None" = None,
+        escalation_timeout: float = JOIN_ESCALATION_TIMEOUT,
+    ) -> "list[WorkerJoinReport]":
+        """
+        Waits for all workers at once. Process workers still running after the timeout
+        are terminated, then killed, waiting up to the escalation timeout after each.
+        Thread workers cannot be ended and are reported as hung.
+
+        timeout: Time waiting in seconds before escalating, None waits forever.
+        escalation_timeout: Time waiting in seconds after terminating and after killing.
+
+        Returns a report per worker, in worker index order.
+        """
+        start_time = time.monotonic()
+        reports: "dict[int, WorkerJoinReport]" = {}
+        self.__wait_for_workers(
+            list(range(len(self.__workers))), JoinOutcome.EXITED, start_time, timeout, reports
+        )
+
+        for outcome in [JoinOutcome.TERMINATED, JoinOutcome.KILLED]:
+            running = [
+                i
+                for i, worker in enumerate(self.__workers)
+                if i not in reports and isinstance(worker, mp.process.BaseProcess)
+            ]
+            if len(running) == 0:
+                break
+
+            for i in running:
+                worker = self.__workers[i]
+                if outcome == JoinOutcome.TERMINATED:
+                    worker.terminate()
+                else:
+                    worker.kill()  # type: ignore
+
+            self.__wait_for_workers(
+                running,
+                outcome,
+                start_time,
+                time.monotonic() - start_time + escalation_timeout,
+                reports,
+            )
+
+        for i, worker in enumerate(self.__workers):
+            if i in reports:
+                continue
+
+            reports[i] = WorkerJoinReport(
+                i, worker.pid, JoinOutcome.HUNG, None, time.monotonic() - start_time
+            )
+            self.__local_logger.error(
+                f"Worker {self.get_group_name()} {i} did not end when joined", True
+            )
+
+        return [reports[i] for i in range(len(self.__workers))]
+
+    def __wait_for_workers(
+        self,
+        indices: "list[int]",
+        outcome: JoinOutcome,
+        start_time: float,
+        timeout: "float | None",
+        reports: "dict[int, WorkerJoinReport]",
+    ) -> None:
+        """
+        Waits on the sentinels of the workers until they have all ended or the timeout passes,
+        reporting each worker that ended.
+
+        indices: Indices of the workers to wait for.
+        outcome: Outcome of the workers that end.
+        start_time: Time the join started, from time.monotonic().
+        timeout: Time in seconds from the start time until giving up, None waits forever.
+        reports: Reports by worker index, added to.
+        """
+        sentinels = {self.__workers[i].sentinel: i for i in indices}
+        while len(sentinels) > 0:
+            remaining = None
+            if timeout is not None:
+                remaining = max(start_time + timeout - time.monotonic(), 0.0)
+
+            ready = multiprocessing.connection.wait(list(sentinels.keys()), remaining)
+            now = time.monotonic()
+            for sentinel in ready:
+                i = sentinels.pop(sentinel)
+                worker = self.__workers[i]
+                # The sentinel is ready once the worker ends, reap it to get the exit code
+                worker.join()
+                reports[i] = WorkerJoinReport(
+                    i, worker.pid, outcome, worker.exitcode, now - start_time
+                )
+
+            if len(ready) == 0:
+                return
+
+    def get_workers(self) -> "list[mp.Process | _ThreadWorker]":
+        """
+        Returns the worker processes, in worker index order.
+        """
+        return self.__workers
+
+    def get_group_name(self) -> str:
+        """
+        Returns the name of the group the workers are addressed with.
+        """
+        return self.__worker_properties.get_group_name()
+
+    def is_worker_exit_requested(self, worker_index: int) -> bool:
+        """
+        Returns whether main has requested the worker to exit,
+        directly, through its group, or with all workers.
+
+        worker_index: Index of the worker.
+        """
+        return self.__worker_properties.get_controller(worker_index).is_exit_requested()
+
+    def restart_worker(self, worker_index: int) -> bool:
+        """
+        Replaces the worker with a new one and starts it. Does not check that the worker is dead.
+
+        worker_index: Index of the worker.
+
+        Returns whether the worker was able to be restarted.
+        """
+        target_and_worker_name = (
+            f"{self.__worker_properties.get_target_name()} {self.__workers[worker_index].name}"
+        )
+
+        result, new_worker = WorkerManager.__create_single_worker(
+            self.__context,
+            self.__execution_mode,
+            self.__worker_properties,
+            worker_index,
+            self.__report_pipes[worker_index],
+            self.__local_logger,
+        )
+        if not result:
+            self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
+            return False
+
+        # Get Pylance to stop complaining
+        assert new_worker is not None
+
+        self.__workers[worker_index] = new_worker
+        self.__start_worker(worker_index)
+        self.__log_scheduling_reports([worker_index])
+
+        return True
+
+    def add_worker(self) -> bool:
+        """
+        Creates and starts one more worker. Fails while a retiring worker has not been removed,
+        so that worker indices stay contiguous.
+
+        Returns whether the worker was able to be added.
+        """
+        if self.__active_count < len(self.__workers):
+            self.__local_logger.error(
+                f"Cannot add a worker to {self.get_group_name()} while one is retiring", True
+            )
+            return False
+
+        worker_index = len(self.__workers)
+        report_pipe = WorkerManager.__create_report_pipe(self.__context, self.__worker_properties)
+        result, worker = WorkerManager.__create_single_worker(
+            self.__context,
+            self.__execution_mode,
+            self.__worker_properties,
+            worker_index,
+            report_pipe,
+            self.__local_logger,
+        )
+        if not result:
+            self.__local_logger.error(f"Failed to add worker to {self.get_group_name()}", True)
+            return False
+
+        # Get Pylance to stop complaining
+        assert worker is not None
+
+        self.__workers.append(worker)
+        self.__report_pipes.append(report_pipe)
+        self.__start_times.append(None)
+        self.__start_worker(worker_index)
+        self.__active_count += 1
+        self.__log_scheduling_reports([worker_index])
+
+        return True
+
+    def retire_worker(self) -> bool:
+        """
+        Requests the last active worker to exit, so it finishes its current iteration.
+        Call remove_retired_workers() to remove it once it has exited.
+
+        Returns whether there was a worker to retire.
+        """
+        if self.__active_count == 0:
+            return False
+
+        self.__active_count -= 1
+        self.__worker_properties.get_controller().request_exit(
+            self.get_group_name(), self.__active_count
+        )
+
+        return True
+
+    def remove_retired_workers(self) -> int:
+        """
+        Removes the retired workers that have exited.
+
+        Returns the number of workers removed.
+        """
+        removed = 0
+        while len(self.__workers) > self.__active_count and not self.__workers[-1].is_alive():
+            worker = self.__workers.pop()
+            self.__report_pipes.pop()
+            self.__start_times.pop()
             worker.join()
+            # The index may be reused by a new worker
+            self.__worker_properties.get_controller().clear_exit(
+                self.get_group_name(), len(self.__workers)
+            )
+            removed += 1
+
+        return removed
 
     def check_and_restart_dead_workers(self) -> bool:
         """
@@ -216,32 +910,44 @@ class WorkerManager:
 
         Returns whether the dead workers were able to be restarted.
         """
-        new_workers = []
-        for worker in self.__workers:
+        for i, worker in enumerate(self.__workers[: self.__active_count]):
             if worker.is_alive():
-                new_workers.append(worker)
                 continue
 
             # Log dead worker
-            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
             self.__local_logger.warning(
-                f"Worker died, restarting {target_and_worker_name}",
+                f"Worker died, restarting {self.__worker_properties.get_target_name()} "
+                f"{worker.name}",
                 True,
             )
 
-            # Create a new worker
-            result, new_worker = WorkerManager.__create_single_worker(
-                self.__worker_properties.get_worker_target(),
-                self.__worker_properties.get_worker_arguments(),
-                self.__local_logger,
-            )
-            if not result:
-                self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
+            if not self.restart_worker(i):
                 return False
 
-            # Append the new worker
-            new_workers.append(new_worker)
+        return True
 
-        self.__workers = new_workers
 
-        return True
+def localize_thread_queues(worker_managers: "list[WorkerManager]") -> int:
+    """
+    Switches the queues that only connect thread workers and main to the local backend.
+    Call after creating all managers and before starting any workers.
+
+    worker_managers: Managers of all workers.
+
+    Returns the number of queues switched.
+    """
+    # Queues are compared by identity, they are not hashable by value
+    queues: "dict[int, queue_proxy_wrapper.QueueProxyWrapper]" = {}
+    used_by_process: "set[int]" = set()
+    for manager in worker_managers:
+        for data_queue in manager.get_input_queues() + manager.get_output_queues():
+            queues[id(data_queue)] = data_queue
+            if manager.get_execution_mode() == ExecutionMode.PROCESS:
+                used_by_process.add(id(data_queue))
+
+    switched = 0
+    for queue_id, data_queue in queues.items():
+        if queue_id not in used_by_process and data_queue.localize():
+            switched += 1
+
+    return switched
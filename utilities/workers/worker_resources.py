@@ -0,0 +1,368 @@
+"""
+Per worker CPU, memory, context switch and I/O accounting from /proc.
+"""
+
+import collections
+import multiprocessing as mp
+import os
+import threading
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class ResourceSample:  # pylint: disable=too-many-instance-attributes
+    """
+    Resource use of a worker over one sample interval.
+    """
+
+    def __init__(
+        self,
+        sample_time: float,
+        interval: float,
+        cpu_percent: float,
+        rss: int,
+        voluntary_context_switches: int,
+        involuntary_context_switches: int,
+        read_bytes: int,
+        write_bytes: int,
+    ) -> None:
+        """
+        sample_time: Time of the sample, from time.monotonic().
+        interval: Time in seconds since the previous sample.
+        cpu_percent: User and system CPU time over the interval, 100 is one whole CPU.
+        rss: Resident set size in kB at the sample, of the whole process for thread workers.
+        voluntary_context_switches: Switches while waiting over the interval.
+        involuntary_context_switches: Preemptions over the interval.
+        read_bytes: Bytes read over the interval, including pipes and sockets.
+        write_bytes: Bytes written over the interval, including pipes and sockets.
+        """
+        self.sample_time = sample_time
+        self.interval = interval
+        self.cpu_percent = cpu_percent
+        self.rss = rss
+        self.voluntary_context_switches = voluntary_context_switches
+        self.involuntary_context_switches = involuntary_context_switches
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+
+
+class ResourceReport:
+    """
+    Recent resource use of a worker, or of the SyncManager server.
+    """
+
+    def __init__(self, name: str, pid: "int | None", samples: "list[ResourceSample]") -> None:
+        """
+        name: Group and index of the worker, or "sync_manager".
+        pid: Process id at the last sample.
+        samples: Recent samples, oldest first.
+        """
+        self.name = name
+        self.pid = pid
+        self.samples = samples
+
+    def __str__(self) -> str:
+        """
+        To string, averaged over the samples.
+        """
+        if len(self.samples) == 0:
+            return f"{self.__class__}, name: {self.name}, pid: {self.pid}, no samples"
+
+        duration = max(sum(sample.interval for sample in self.samples), 1e-9)
+        cpu_percent = (
+            sum(sample.cpu_percent * sample.interval for sample in self.samples) / duration
+        )
+        switches = sum(
+            sample.voluntary_context_switches + sample.involuntary_context_switches
+            for sample in self.samples
+        )
+        read_bytes = sum(sample.read_bytes for sample in self.samples)
+        write_bytes = sum(sample.write_bytes for sample in self.samples)
+        peak_rss = max(sample.rss for sample in self.samples)
+        return (
+            f"{self.__class__}, name: {self.name}, pid: {self.pid}, "
+            f"CPU: {cpu_percent:.1f}%, "
+            f"RSS: {self.samples[-1].rss} kB (peak {peak_rss} kB), "
+            f"context switches: {switches / duration:.0f}/s, "
+            f"read: {read_bytes / duration:.0f} B/s, write: {write_bytes / duration:.0f} B/s"
+        )
+
+
+def _read_counters(path: str) -> "tuple[int, int, int, int, int, int]":
+    """
+    Reads the counters of a process or thread.
+
+    path: /proc directory of the process, or its task directory for a thread.
+
+    Returns the CPU time in clock ticks, the RSS in kB, the voluntary and involuntary
+    context switches, and the bytes read and written.
+    """
+    with open(f"{path}/stat", encoding="utf-8") as file:
+        # The command name can contain spaces and parentheses, the fields follow the last one
+        fields = file.read().rsplit(")", 1)[1].split()
+
+    # utime and stime, fields 14 and 15 counting from the pid
+    cpu_ticks = int(fields[11]) + int(fields[12])
+
+    rss = 0
+    voluntary = 0
+    involuntary = 0
+    with open(f"{path}/status", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+            elif line.startswith("voluntary_ctxt_switches:"):
+                voluntary = int(line.split()[1])
+            elif line.startswith("nonvoluntary_ctxt_switches:"):
+                involuntary = int(line.split()[1])
+
+    read_bytes = 0
+    write_bytes = 0
+    try:
+        with open(f"{path}/io", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("rchar:"):
+                    read_bytes = int(line.split()[1])
+                elif line.startswith("wchar:"):
+                    write_bytes = int(line.split()[1])
+    # Needs the same permissions as ptrace
+    except PermissionError:
+        pass
+
+    return cpu_ticks, rss, voluntary, involuntary, read_bytes, write_bytes
+
+
+class _Series:
+    """
+    Samples of one worker and the counters of its last sample.
+    """
+
+    def __init__(self, name: str, history: int) -> None:
+        self.name = name
+        self.pid: "int | None" = None
+        self.path: "str | None" = None
+        self.samples: "collections.deque[ResourceSample]" = collections.deque(maxlen=history)
+        self.last_counters: "tuple[int, int, int, int, int, int] | None" = None
+        self.last_time = 0.0
+
+
+class ResourceMonitor:  # pylint: disable=too-many-instance-attributes
+    """
+    Background thread of main that samples the resource use of every worker,
+    and of the SyncManager server, from /proc. Linux only.
+
+    Keeps a rolling series of samples per worker, and logs a summary periodically.
+    Restarted workers continue the series of the worker they replaced.
+    Thread workers are sampled per thread, except for memory, which is shared with main.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        mp_manager: "mp.managers.SyncManager | None" = None,  # type: ignore
+        sample_period: float = 1.0,
+        history: int = 60,
+        summary_period: "float | None" = 10.0,
+    ) -> "tuple[bool, ResourceMonitor | None]":
+        """
+        Creates the monitor, start() it after the workers are started.
+
+        worker_managers: Managers of the workers to sample.
+        local_logger: Existing logger from process.
+        mp_manager: Started SyncManager whose server is sampled too, None for none.
+        sample_period: Time in seconds between samples.
+        history: Number of samples kept per worker.
+        summary_period: Time in seconds between logged summaries, None to not log them.
+
+        Returns whether the monitor was created and the monitor.
+        """
+        if not os.path.isdir("/proc/self/task"):
+            local_logger.error("Resource monitoring needs /proc", True)
+            return False, None
+
+        if sample_period <= 0.0 or history < 1:
+            local_logger.error(
+                f"Invalid sampling, period: {sample_period}, history: {history}", True
+            )
+            return False, None
+
+        if summary_period is not None and summary_period < sample_period:
+            local_logger.error(
+                f"Summary period {summary_period} is shorter than sample period {sample_period}",
+                True,
+            )
+            return False, None
+
+        return True, ResourceMonitor(
+            cls.__create_key,
+            worker_managers,
+            local_logger,
+            mp_manager,
+            sample_period,
+            history,
+            summary_period,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        mp_manager: "mp.managers.SyncManager | None",  # type: ignore
+        sample_period: float,
+        history: int,
+        summary_period: "float | None",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is ResourceMonitor.__create_key, "Use create() method"
+
+        self.__worker_managers = worker_managers
+        self.__local_logger = local_logger
+        self.__sample_period = sample_period
+        self.__history = history
+        self.__summary_period = summary_period
+        self.__clock_ticks = os.sysconf("SC_CLK_TCK")
+
+        self.__manager_pid: "int | None" = None
+        if mp_manager is not None:
+            # The server process is not exposed otherwise
+            # pylint: disable-next=protected-access
+            self.__manager_pid = mp_manager._process.pid
+
+        # Guards the series, which main reads while the thread updates them
+        self.__lock = threading.Lock()
+        self.__series: "dict[tuple[int, int], _Series]" = {}
+
+        self.__stop_event = threading.Event()
+        self.__thread: "threading.Thread | None" = None
+
+    def start(self) -> None:
+        """
+        Starts sampling in the background.
+        """
+        self.__sample()
+
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__run, name="resource_monitor", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops sampling and waits for the thread.
+        """
+        if self.__thread is None:
+            return
+
+        self.__stop_event.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def get_resource_report(self) -> "list[ResourceReport]":
+        """
+        Returns the recent samples of every worker, then of the SyncManager server.
+        """
+        with self.__lock:
+            return [
+                ResourceReport(series.name, series.pid, list(series.samples))
+                for series in self.__series.values()
+            ]
+
+    def __run(self) -> None:
+        """
+        Thread loop: samples every period, and logs a summary every summary period.
+        """
+        next_summary_time = None
+        if self.__summary_period is not None:
+            next_summary_time = time.monotonic() + self.__summary_period
+
+        while not self.__stop_event.wait(self.__sample_period):
+            self.__sample()
+
+            if next_summary_time is not None and time.monotonic() >= next_summary_time:
+                for report in self.get_resource_report():
+                    self.__local_logger.info(report, True)
+
+                next_summary_time += self.__summary_period  # type: ignore
+
+    def __get_targets(self) -> "dict[tuple[int, int], tuple[str, int | None, str | None]]":
+        """
+        Returns the name, pid and /proc directory of every worker and the server,
+        by manager and worker index. The server is manager index -1.
+        """
+        targets: "dict[tuple[int, int], tuple[str, int | None, str | None]]" = {}
+        for i, manager in enumerate(self.__worker_managers):
+            for j, worker in enumerate(manager.get_workers()):
+                name = f"{manager.get_group_name()} {j}"
+                path = None
+                if isinstance(worker, mp.process.BaseProcess):
+                    if worker.pid is not None:
+                        path = f"/proc/{worker.pid}"
+                elif worker.native_id is not None:
+                    path = f"/proc/{worker.pid}/task/{worker.native_id}"
+
+                targets[(i, j)] = (name, worker.pid, path)
+
+        if self.__manager_pid is not None:
+            targets[(-1, 0)] = ("sync_manager", self.__manager_pid, f"/proc/{self.__manager_pid}")
+
+        return targets
+
+    def __sample(self) -> None:
+        """
+        Takes a sample of every worker that is running.
+        """
+        targets = self.__get_targets()
+        with self.__lock:
+            for key in list(self.__series.keys()):
+                if key not in targets:
+                    del self.__series[key]
+
+            for key, (name, pid, path) in targets.items():
+                series = self.__series.get(key)
+                if series is None:
+                    series = _Series(name, self.__history)
+                    self.__series[key] = series
+
+                # A restarted worker is a new process, its counters start over
+                if path != series.path:
+                    series.pid = pid
+                    series.path = path
+                    series.last_counters = None
+
+                if path is None:
+                    continue
+
+                now = time.monotonic()
+                try:
+                    counters = _read_counters(path)
+                # Dead, or between restarts
+                except (FileNotFoundError, ProcessLookupError):
+                    series.last_counters = None
+                    continue
+
+                if series.last_counters is not None:
+                    interval = max(now - series.last_time, 1e-9)
+                    last = series.last_counters
+                    series.samples.append(
+                        ResourceSample(
+                            now,
+                            interval,
+                            100.0 * (counters[0] - last[0]) / self.__clock_ticks / interval,
+                            counters[1],
+                            counters[2] - last[2],
+                            counters[3] - last[3],
+                            counters[4] - last[4],
+                            counters[5] - last[5],
+                        )
+                    )
+
+                series.last_counters = counters
+                series.last_time = now
@@ -0,0 +1,103 @@
+"""
+Acknowledged shutdown of workers.
+"""
+
+import queue
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Longest wait for acknowledgements before unblocking workers again
+ROUND_TIMEOUT = 0.01  # seconds
+
+
+def _drain(data_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Removes everything currently in the queue without waiting.
+    """
+    while len(data_queue.get_many(data_queue.batch_size, 0.0)) > 0:
+        pass
+
+
+def _unblock(data_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Drains the queue to unblock its producers,
+    then puts a sentinel to unblock a consumer waiting on it.
+    """
+    _drain(data_queue)
+
+    try:
+        data_queue.queue.put_nowait(None)
+    except queue.Full:
+        pass
+
+
+def shutdown_workers(
+    controller: worker_controller.WorkerController,
+    worker_managers: "list[worker_manager.WorkerManager]",
+    queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    timeout: float,
+    local_logger: logger.Logger,
+) -> bool:
+    """
+    Requests exit and unblocks workers until every worker has acknowledged that it left its loop,
+    then joins the workers. Takes as long as the slowest worker iteration, with no fixed delays.
+    Workers still running at the deadline are terminated, then killed.
+
+    controller: Worker controller shared by all the workers.
+    worker_managers: Managers of all workers using the controller.
+    queues: All queues between workers, in topological order (first producer to last consumer).
+    timeout: Time waiting in seconds for acknowledgements and joins before escalating.
+    local_logger: Existing logger from process.
+
+    Returns whether every worker acknowledged exit and ended by itself before the deadline.
+    """
+    # Workers that already died, and were not restarted, never acknowledge
+    alive_count = sum(manager.get_alive_worker_count() for manager in worker_managers)
+    # Workers retired earlier have already acknowledged
+    expected = alive_count + controller.get_exit_acknowledgement_count()
+    deadline = time.monotonic() + timeout
+
+    controller.request_exit()
+
+    while True:
+        for data_queue in queues:
+            _unblock(data_queue)
+
+        remaining = deadline - time.monotonic()
+        if controller.wait_for_exit_acknowledgements(
+            expected,
+            max(min(ROUND_TIMEOUT, remaining), 0.0),
+        ):
+            break
+
+        if remaining <= 0.0:
+            local_logger.error(
+                f"Only {controller.get_exit_acknowledgement_count()} of {expected} workers "
+                "acknowledged exit",
+                True,
+            )
+            break
+
+    # Remove sentinels left behind
+    for data_queue in queues:
+        _drain(data_queue)
+
+    acknowledged = controller.get_exit_acknowledgement_count() >= expected
+    exited = True
+    for manager in worker_managers:
+        for report in manager.join_workers(max(deadline - time.monotonic(), 0.0)):
+            if report.outcome != worker_manager.JoinOutcome.EXITED:
+                exited = False
+                local_logger.warning(f"{manager.get_group_name()}: {report}", True)
+
+    if not (acknowledged and exited):
+        return False
+
+    local_logger.info(f"All {alive_count} workers exited", True)
+
+    return True
@@ -0,0 +1,341 @@
+"""
+Restarting dead workers in the background of main.
+"""
+
+import collections
+import enum
+import multiprocessing.connection
+import threading
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_autoscaler
+from utilities.workers import worker_manager
+
+
+class WorkerState(enum.Enum):
+    """
+    State of a supervised worker.
+    """
+
+    RUNNING = 0
+    # Dead, waiting for its backoff to restart
+    BACKOFF = 1
+    # Left after exit was requested, not restarted
+    EXITED = 2
+    # Dead and out of restart budget, or could not be restarted
+    FAILED = 3
+
+
+class WorkerStatus:
+    """
+    Snapshot of a supervised worker.
+    """
+
+    def __init__(
+        self,
+        group: str,
+        index: int,
+        state: WorkerState,
+        pid: "int | None",
+        restart_count: int,
+        last_exit_code: "int | None",
+    ) -> None:
+        """
+        group: Name of the group of the worker.
+        index: Index of the worker in its group.
+        state: Supervision state.
+        pid: Process id of the current process of the worker.
+        restart_count: Number of restarts since supervision started.
+        last_exit_code: Exit code of the last process of the worker that died, None if none has.
+        """
+        self.group = group
+        self.index = index
+        self.state = state
+        self.pid = pid
+        self.restart_count = restart_count
+        self.last_exit_code = last_exit_code
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        return (
+            f"{self.__class__}, group: {self.group}, index: {self.index}, "
+            f"state: {self.state.name}, pid: {self.pid}, restarts: {self.restart_count}, "
+            f"last exit code: {self.last_exit_code}"
+        )
+
+
+class WorkerSupervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Background thread of main that restarts dead workers.
+
+    Waits on the sentinels of the worker processes, so a dead worker is seen as soon as it dies.
+    Restarts are delayed by exponential backoff over the recent restarts of the worker,
+    and a worker that needs more restarts than its budget within the window is given up on.
+    Workers that leave after main requested them to exit are not restarted.
+
+    If given an autoscaler, also samples it periodically, so that only this thread
+    adds and removes workers.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        initial_backoff: float = 0.01,
+        max_backoff: float = 5.0,
+        max_restarts: int = 5,
+        restart_window: float = 60.0,
+        autoscaler: worker_autoscaler.WorkerAutoscaler | None = None,
+    ) -> "tuple[bool, WorkerSupervisor | None]":
+        """
+        Creates the supervisor, start() it after the workers are started.
+
+        worker_managers: Managers of the workers to supervise.
+        local_logger: Existing logger from process.
+        initial_backoff: Delay in seconds before the first restart of a worker.
+        max_backoff: Maximum delay in seconds before a restart.
+        max_restarts: Maximum number of restarts of a worker within the window.
+        restart_window: Time in seconds over which restarts count against the budget.
+        autoscaler: Autoscaler of some of the managers, None to keep worker counts fixed.
+
+        Returns whether the supervisor was created and the supervisor.
+        """
+        if initial_backoff < 0.0 or max_backoff < initial_backoff:
+            local_logger.error(
+                f"Invalid backoff, initial: {initial_backoff}, maximum: {max_backoff}", True
+            )
+            return False, None
+
+        if max_restarts < 0 or restart_window <= 0.0:
+            local_logger.error(
+                f"Invalid restart budget: {max_restarts} in {restart_window} seconds", True
+            )
+            return False, None
+
+        return True, WorkerSupervisor(
+            cls.__create_key,
+            worker_managers,
+            local_logger,
+            initial_backoff,
+            max_backoff,
+            max_restarts,
+            restart_window,
+            autoscaler,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        initial_backoff: float,
+        max_backoff: float,
+        max_restarts: int,
+        restart_window: float,
+        autoscaler: worker_autoscaler.WorkerAutoscaler | None,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerSupervisor.__create_key, "Use create() method"
+
+        self.__worker_managers = worker_managers
+        self.__local_logger = local_logger
+        self.__initial_backoff = initial_backoff
+        self.__max_backoff = max_backoff
+        self.__max_restarts = max_restarts
+        self.__restart_window = restart_window
+        self.__autoscaler = autoscaler
+
+        # Guards the statuses, which main reads while the thread updates them
+        self.__lock = threading.Lock()
+        self.__statuses: "dict[tuple[int, int], WorkerStatus]" = {}
+        # Times of recent restarts of each worker
+        self.__restart_times: "dict[tuple[int, int], collections.deque[float]]" = {}
+        # Time each dead worker is due to be restarted
+        self.__restart_due: "dict[tuple[int, int], float]" = {}
+
+        # Wakes the thread to stop
+        self.__stop_receiver, self.__stop_sender = multiprocessing.connection.Pipe(False)
+        self.__thread: "threading.Thread | None" = None
+
+    def start(self) -> None:
+        """
+        Starts supervising in the background.
+        """
+        self.__sync_statuses()
+
+        self.__thread = threading.Thread(target=self.__run, name="worker_supervisor", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops supervising and waits for the thread. Call before joining the workers.
+        """
+        if self.__thread is None:
+            return
+
+        self.__stop_sender.send(None)
+        self.__thread.join()
+        self.__thread = None
+
+    def get_status(self) -> "list[WorkerStatus]":
+        """
+        Returns a snapshot of the status of every supervised worker.
+        """
+        with self.__lock:
+            return [
+                WorkerStatus(
+                    status.group,
+                    status.index,
+                    status.state,
+                    status.pid,
+                    status.restart_count,
+                    status.last_exit_code,
+                )
+                for status in self.__statuses.values()
+            ]
+
+    def __run(self) -> None:
+        """
+        Thread loop: waits for a worker to die, a restart to be due, or a sample to be due.
+        """
+        next_sample_time = None
+        if self.__autoscaler is not None:
+            next_sample_time = time.monotonic() + self.__autoscaler.get_sample_period()
+
+        while True:
+            self.__sync_statuses()
+
+            sentinels = {}
+            with self.__lock:
+                for (i, j), status in self.__statuses.items():
+                    if status.state == WorkerState.RUNNING:
+                        sentinels[self.__worker_managers[i].get_workers()[j].sentinel] = (i, j)
+
+            due_times = list(self.__restart_due.values())
+            if next_sample_time is not None:
+                due_times.append(next_sample_time)
+
+            timeout = None
+            if len(due_times) > 0:
+                timeout = max(min(due_times) - time.monotonic(), 0.0)
+
+            ready = multiprocessing.connection.wait(
+                list(sentinels.keys()) + [self.__stop_receiver], timeout
+            )
+            if self.__stop_receiver in ready:
+                return
+
+            for sentinel in ready:
+                self.__handle_death(*sentinels[sentinel])
+
+            now = time.monotonic()
+            for key, due in list(self.__restart_due.items()):
+                if due <= now:
+                    del self.__restart_due[key]
+                    self.__restart(*key)
+
+            if next_sample_time is not None and next_sample_time <= now:
+                # Get Pylance to stop complaining
+                assert self.__autoscaler is not None
+
+                self.__autoscaler.sample()
+                next_sample_time = now + self.__autoscaler.get_sample_period()
+
+    def __sync_statuses(self) -> None:
+        """
+        Tracks workers that were added, and forgets workers that were removed.
+        """
+        with self.__lock:
+            for i, manager in enumerate(self.__worker_managers):
+                workers = manager.get_workers()
+                for j, worker in enumerate(workers):
+                    if (i, j) not in self.__statuses:
+                        self.__statuses[(i, j)] = WorkerStatus(
+                            manager.get_group_name(), j, WorkerState.RUNNING, worker.pid, 0, None
+                        )
+                        self.__restart_times[(i, j)] = collections.deque()
+
+            for i, j in list(self.__statuses.keys()):
+                if j >= len(self.__worker_managers[i].get_workers()):
+                    del self.__statuses[(i, j)]
+                    del self.__restart_times[(i, j)]
+                    self.__restart_due.pop((i, j), None)
+
+    def __handle_death(self, manager_index: int, worker_index: int) -> None:
+        """
+        Records the dead worker and schedules its restart if it is within budget.
+        """
+        manager = self.__worker_managers[manager_index]
+        worker = manager.get_workers()[worker_index]
+        # The sentinel is ready once the process ends, reap it to get the exit code
+        worker.join()
+        key = (manager_index, worker_index)
+
+        if manager.is_worker_exit_requested(worker_index):
+            self.__set_state(key, WorkerState.EXITED, worker.exitcode)
+            return
+
+        name = f"{manager.get_group_name()} {worker_index}"
+        now = time.monotonic()
+        restart_times = self.__restart_times[key]
+        while len(restart_times) > 0 and now - restart_times[0] > self.__restart_window:
+            restart_times.popleft()
+
+        if len(restart_times) >= self.__max_restarts:
+            self.__local_logger.error(
+                f"Worker {name} died with exit code {worker.exitcode}, "
+                f"out of restart budget ({self.__max_restarts} in {self.__restart_window} s)",
+                True,
+            )
+            self.__set_state(key, WorkerState.FAILED, worker.exitcode)
+            return
+
+        backoff = min(self.__initial_backoff * 2 ** len(restart_times), self.__max_backoff)
+        self.__local_logger.warning(
+            f"Worker {name} died with exit code {worker.exitcode}, restarting in {backoff} s",
+            True,
+        )
+        self.__restart_due[key] = now + backoff
+        self.__set_state(key, WorkerState.BACKOFF, worker.exitcode)
+
+    def __restart(self, manager_index: int, worker_index: int) -> None:
+        """
+        Restarts the worker, unless main requested it to exit while it was waiting.
+        """
+        manager = self.__worker_managers[manager_index]
+        key = (manager_index, worker_index)
+
+        if manager.is_worker_exit_requested(worker_index):
+            self.__set_state(key, WorkerState.EXITED, None)
+            return
+
+        if not manager.restart_worker(worker_index):
+            self.__set_state(key, WorkerState.FAILED, None)
+            return
+
+        self.__restart_times[key].append(time.monotonic())
+        with self.__lock:
+            status = self.__statuses[key]
+            status.state = WorkerState.RUNNING
+            status.pid = manager.get_workers()[worker_index].pid
+            status.restart_count += 1
+
+    def __set_state(
+        self, key: "tuple[int, int]", state: WorkerState, exit_code: "int | None"
+    ) -> None:
+        """
+        Updates the status of the worker, keeping the last exit code if there is no new one.
+        """
+        with self.__lock:
+            status = self.__statuses[key]
+            status.state = state
+            if exit_code is not None:
+                status.last_exit_code = exit_code